@@ -0,0 +1,148 @@
+import asyncio
+import random
+
+import httpx
+
+from ethos_ai.clim.async_rate_limiter import AsyncRateLimiter
+from ethos_ai.util.protocol import Protocol
+
+
+class AsyncChatClient:
+    """
+    Asynchronous client of a chat completions endpoint (OpenAI API or compatible).
+
+    The client keeps a pool of connections per event loop, limits the number of concurrent
+    requests and optionally their rate, and retries throttled or failed requests with
+    exponential backoff.
+    """
+
+    # Throttling and server errors are worth another try
+    RETRY_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str = "https://api.openai.com/v1",
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        requests_per_second: float = None,
+        timeout: float = 60.0,
+    ):
+        """
+        Initializes the client.
+
+        :param api_key: The API key sent as bearer token.
+        :param api_base: The base URL of the API, the client posts to /chat/completions.
+        :param max_concurrency: The number of requests sent at the same time.
+        :param max_retries: The number of retries of a throttled or failed request.
+        :param backoff: The delay in seconds before the first retry, doubled for each retry.
+        :param requests_per_second: Optional limit of the request rate.
+        :param timeout: The timeout of a request in seconds.
+        """
+        self.protocol = Protocol()
+        self.api_key: str = api_key
+        self.api_base: str = api_base.rstrip("/")
+        self.max_concurrency: int = max_concurrency
+        self.max_retries: int = max_retries
+        self.backoff: float = backoff
+        self.timeout: float = timeout
+        self.rate_limiter: AsyncRateLimiter = (
+            AsyncRateLimiter(requests_per_second, burst=max_concurrency)
+            if requests_per_second
+            else None
+        )
+        # The connection pool and semaphore belong to the event loop that created them
+        self._loop = None
+        self._client: httpx.AsyncClient = None
+        self._semaphore: asyncio.Semaphore = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._discard_client()
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _discard_client(self):
+        """
+        Closes the connection pool of the previous event loop if that loop still runs,
+        otherwise drops it; the connections of a closed loop cannot be closed from another
+        loop and are released with it.
+        """
+        client, loop = self._client, self._loop
+        self._client = None
+        self._loop = None
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def chat(
+        self,
+        messages: list[dict],
+        model: str,
+        max_tokens: int = None,
+        temperature: float = 0.7,
+    ) -> str:
+        """
+        Requests a chat completion and returns the content of its first choice.
+
+        :param messages: The conversation, e.g. [{"role": "user", "content": "..."}].
+        :param model: The model of the completion.
+        :param max_tokens: Optional limit of the generated tokens.
+        :param temperature: The sampling temperature.
+        :raises httpx.HTTPError: If the request still fails after all retries.
+        """
+        client = self._get_client()
+        payload = {"model": model, "messages": messages, "n": 1}
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        if temperature is not None:
+            payload["temperature"] = temperature
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            delay = self.backoff * (2**attempt) * (0.5 + random.random() / 2)
+            try:
+                async with self._semaphore:
+                    response = await client.post("/chat/completions", json=payload)
+                if (
+                    response.status_code in AsyncChatClient.RETRY_STATUS_CODES
+                    and attempt < self.max_retries
+                ):
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after is not None:
+                        try:
+                            delay = max(delay, float(retry_after))
+                        except ValueError:
+                            pass
+                    self.protocol.warning(
+                        f"Chat completion returned {response.status_code}, retry {attempt + 1} in {delay:.2f}s."
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json()["choices"][0]["message"]["content"].strip()
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.protocol.warning(
+                    f"Chat completion failed: {str(e)}, retry {attempt + 1} in {delay:.2f}s."
+                )
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Closes the connections of the client."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+        elif self._client is not None:
+            self._discard_client()
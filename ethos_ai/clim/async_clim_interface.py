@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+
+from ethos_ai.clim.clim_data import CLIMData
+
+
+class AsyncCLIMInterface(ABC):
+    """
+    Coroutine counterparts of the CLIMInterface calls that wait for a model.
+
+    API backed layers await their requests without blocking a thread, so the requests of
+    several layers and prompts overlap. Local models run their blocking calls in worker threads.
+    """
+
+    @abstractmethod
+    async def agenerate_text(self, input_text: str) -> str:
+        pass
+
+    @abstractmethod
+    async def aprocess(self, type: str, input_data: CLIMData) -> CLIMData:
+        pass
+
+    @abstractmethod
+    async def agenerate_answer_list(self, prompt, options=None):
+        pass
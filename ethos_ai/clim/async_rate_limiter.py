@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiting the rate of requests.
+
+    The bucket holds up to `burst` tokens and refills with `rate` tokens per second; every
+    request takes one token and waits until one is available. The bucket is kept across event
+    loops, its lock belongs to the event loop that uses the limiter.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initializes the rate limiter.
+
+        :param rate: The number of requests per second.
+        :param burst: The number of requests that may be sent at once after an idle time.
+        """
+        if rate <= 0:
+            raise ValueError("The rate must be positive.")
+        self.rate: float = rate
+        self.burst: int = max(1, burst)
+        self._tokens: float = self.burst
+        self._updated: float = time.monotonic()
+        self._loop = None
+        self._lock: asyncio.Lock = None
+
+    async def acquire(self):
+        """Waits until a request may be sent and takes its token."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
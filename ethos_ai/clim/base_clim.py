@@ -1,17 +1,21 @@
+import asyncio
 import json
 import os
 import yaml
 from abc import ABC
 from threading import RLock
 
+from ethos_ai.clim.async_clim_interface import AsyncCLIMInterface
 from ethos_ai.clim.clim_data import CLIMData
 from ethos_ai.clim.clim_interface import CLIMInterface
 from ethos_ai.clim.decision import Decision
-from ethos_ai.clim.gpt_model_wrapper import GPTModelWrapper
+from ethos_ai.clim.layer_residency_manager import LayerResidencyManager
 from ethos_ai.clim.prompt_manager import PromptManager
+from ethos_ai.clim.training_scheduler import TrainingScheduler
 from ethos_ai.individual.base_individual import BaseIndividual
 from ethos_ai.instruction.instruction import Instruction
 from ethos_ai.security.securied_identity_card import SecuredIdentityCard
+from ethos_ai.state.priority import Priority
 from ethos_ai.security.security_level import SecurityLevel
 from ethos_ai.tool.script_generator import ScriptGenerator
 from ethos_ai.tool.tool_manager import ToolManager
@@ -20,7 +24,7 @@ from ethos_ai.util.protocol import Protocol
 from ethos_ai.util.translate import Translations
 
 
-class BaseCLIM(CLIMInterface):
+class BaseCLIM(CLIMInterface, AsyncCLIMInterface):
 
     def __init__(
         self,
@@ -77,7 +81,28 @@ class BaseCLIM(CLIMInterface):
         """
         try:
             return method_lambda()
-        except ValueError as e:
+        except Exception as e:
+            self._log_method_error(e, method_name)
+            return default_return
+
+    async def amethod_wrapper(
+        self, coroutine_function, method_name: str, default_return=None
+    ):
+        """
+        The coroutine counterpart of `method_wrapper`, awaits the coroutine function.
+
+        :param coroutine_function: The coroutine function (without arguments) to await.
+        :param method_name: The name of the method being executed.
+        :return: The result of the coroutine or the default return if an error occurs.
+        """
+        try:
+            return await coroutine_function()
+        except Exception as e:
+            self._log_method_error(e, method_name)
+            return default_return
+
+    def _log_method_error(self, e: Exception, method_name: str):
+        if isinstance(e, ValueError):
             self.protocol.error(
                 Translations.translate(
                     "CLIM_VALUE_ERROR",
@@ -86,8 +111,7 @@ class BaseCLIM(CLIMInterface):
                     str(e),
                 )
             )
-            return default_return
-        except IOError as e:
+        elif isinstance(e, IOError):
             self.protocol.error(
                 Translations.translate(
                     "CLIM_IO_ERROR_ERROR",
@@ -96,8 +120,7 @@ class BaseCLIM(CLIMInterface):
                     str(e),
                 )
             )
-            return default_return
-        except Exception as e:
+        else:
             self.protocol.error(
                 Translations.translate(
                     "CLIM_UNEXPECTED_ERROR",
@@ -106,7 +129,6 @@ class BaseCLIM(CLIMInterface):
                     str(e),
                 )
             )
-            return default_return
 
     def initialze(self, config: dict):
         """
@@ -119,7 +141,32 @@ class BaseCLIM(CLIMInterface):
         self.api_key = config.get("api_key", None)
         self.max_length = config.get("max_length", 250)
         self.max_new_tokens = config.get("max_new_tokens", None)
-        # Initialize the model wrapper with the loaded configuration
+        self.max_batch_size = config.get("max_batch_size", 8)
+        self.training_mode = config.get("training_mode", "adapter")
+        self.adapter_rank = config.get("adapter_rank", 8)
+        self.adapter_alpha = config.get("adapter_alpha", 16)
+        self.response_cache_size = config.get("response_cache_size", 1024)
+        self.response_cache_ttl = config.get("response_cache_ttl", None)
+        self.persist_response_cache = config.get("persist_response_cache", False)
+        # "text" parses the decision from a generated response, "head" scores the decisions
+        self.decision_mode = config.get("decision_mode", "text")
+        # Stop the generation of a response once a line with a decision is complete
+        self.stop_at_decision = config.get("stop_at_decision", False)
+        self.api_base = config.get("api_base", "https://api.openai.com/v1")
+        self.api_max_concurrency = config.get("api_max_concurrency", 8)
+        self.api_max_retries = config.get("api_max_retries", 3)
+        self.api_requests_per_second = config.get("api_requests_per_second", None)
+        # "quantized" generates with an int8 copy of the model on the CPU
+        self.inference_mode = config.get("inference_mode", "default")
+        self.inference_threads = config.get("inference_threads", None)
+        # Load the model on the first generation instead of on start
+        self.lazy_loading = config.get("lazy_loading", True)
+        # Saved checkpoint versions kept per layer, older versions are removed
+        self.checkpoint_retention = config.get("checkpoint_retention", 3)
+        # Initialize the model wrapper with the loaded configuration. The wrapper pulls in
+        # torch and transformers, so it is only imported once a layer is initialized.
+        from ethos_ai.clim.gpt_model_wrapper import GPTModelWrapper
+
         self.model = GPTModelWrapper(
             model_name=self.model_name,
             use_api=self.use_api,
@@ -127,9 +174,24 @@ class BaseCLIM(CLIMInterface):
             api_model=None,
             max_length=self.max_length,
             max_new_tokens=self.max_new_tokens,
+            max_batch_size=self.max_batch_size,
             life_name=self.identity.name,
             gptwrapper_name=self.name,
             start_model=False,
+            training_mode=self.training_mode,
+            adapter_rank=self.adapter_rank,
+            adapter_alpha=self.adapter_alpha,
+            response_cache_size=self.response_cache_size,
+            response_cache_ttl=self.response_cache_ttl,
+            persist_response_cache=self.persist_response_cache,
+            api_base=self.api_base,
+            api_max_concurrency=self.api_max_concurrency,
+            api_max_retries=self.api_max_retries,
+            api_requests_per_second=self.api_requests_per_second,
+            inference_mode=self.inference_mode,
+            inference_threads=self.inference_threads,
+            lazy_loading=self.lazy_loading,
+            checkpoint_retention=self.checkpoint_retention,
         )
 
     def get_default_config(self) -> dict:
@@ -144,6 +206,23 @@ class BaseCLIM(CLIMInterface):
             "api_key": None,
             "max_length": 0,
             "max_new_tokens": None,
+            "max_batch_size": 8,
+            "training_mode": "adapter",
+            "adapter_rank": 8,
+            "adapter_alpha": 16,
+            "response_cache_size": 1024,
+            "response_cache_ttl": None,
+            "persist_response_cache": False,
+            "decision_mode": "text",
+            "stop_at_decision": False,
+            "api_base": "https://api.openai.com/v1",
+            "api_max_concurrency": 8,
+            "api_max_retries": 3,
+            "api_requests_per_second": None,
+            "inference_mode": "default",
+            "inference_threads": None,
+            "lazy_loading": True,
+            "checkpoint_retention": 3,
         }
 
     # Deprecated method
@@ -233,13 +312,33 @@ class BaseCLIM(CLIMInterface):
             lambda: self.model.persist_model(), self.persist_model.__name__
         )
 
+    def set_training_scheduler(self, training_scheduler: TrainingScheduler):
+        """Sets the scheduler that queues the training runs of this CLIM instance."""
+        self.method_wrapper(
+            lambda: self.model.set_training_scheduler(training_scheduler),
+            self.set_training_scheduler.__name__,
+        )
+
+    def set_residency_manager(self, residency_manager: LayerResidencyManager):
+        """
+        Sets the manager that unloads the model of this layer when idle or over the memory budget.
+
+        :param residency_manager: The residency manager shared by the layers of the stack.
+        """
+        self.model.set_residency_manager(residency_manager)
+
     def start_training_async(
-        self, training_data, epochs=3, batch_size=2, learning_rate=5e-5
+        self,
+        training_data,
+        epochs=3,
+        batch_size=2,
+        learning_rate=5e-5,
+        priority: Priority = Priority.NORMAL,
     ):
         """Start the training process in a separate thread."""
         self.method_wrapper(
             lambda: self.model.start_training_async(
-                training_data, epochs, batch_size, learning_rate
+                training_data, epochs, batch_size, learning_rate, priority
             ),
             self.start_training_async.__name__,
         )
@@ -249,6 +348,26 @@ class BaseCLIM(CLIMInterface):
             lambda: self.model.get_training_status(), self.get_training_status.__name__
         )
 
+    def get_training_progress(self):
+        return self.method_wrapper(
+            lambda: self.model.get_training_progress(),
+            self.get_training_progress.__name__,
+        )
+
+    def add_training_progress_callback(self, callback):
+        """Registers a callback for the per-epoch progress and the completion of the training."""
+        self.method_wrapper(
+            lambda: self.model.add_training_progress_callback(callback),
+            self.add_training_progress_callback.__name__,
+        )
+
+    def wait_for_training(self, timeout: float = None, stop_event=None) -> bool:
+        return self.method_wrapper(
+            lambda: self.model.wait_for_training(timeout, stop_event),
+            self.wait_for_training.__name__,
+            default_return=True,
+        )
+
     def request_cancellation_of_training(self):
         self.method_wrapper(
             lambda: self.model.request_cancellation_of_training(),
@@ -299,12 +418,116 @@ class BaseCLIM(CLIMInterface):
         If no valid decision can be parsed, a default "IMPROVE" decision is set. If the prompt cannot
         be generated, an error is logged and a "STOP" decision is assigned.
 
+        In the decision mode "head" no response is generated: the decisions are scored with one
+        forward pass and the most probable one is taken, the last response is passed on unchanged.
+        If the decisions cannot be scored (e.g. API backend), the response is generated as usual.
+        With "stop_at_decision" the response is streamed and its generation stops as soon as a
+        line naming a decision is complete.
+
         :param type: A string indicating the type of processing to be performed (e.g., "prerun", "final").
         :param input_data: The CLIMData object containing the input data for processing. If None, a new CLIMData object is created.
         :return: The updated CLIMData object containing the processed results, including the last response and decision.
         """
         if input_data is None:
             input_data = CLIMData()
+        that_dict, prompt = self._prepare_process(type, input_data)
+        response = None
+        if prompt and self.decision_mode == "head":
+            probabilities = self.score_decisions(prompt)
+            if probabilities is not None:
+                self._complete_process_by_head(that_dict, input_data, probabilities)
+                return input_data
+        if prompt:
+            # The static prompt prefix lets the model reuse its encoded state
+            prefix_key = self.prompt_manager.get_prompt_key(type, self.name)
+            prefix = self.prompt_manager.get_prompt_prefix(type, self.name)
+            if self.stop_at_decision:
+                response = self.method_wrapper(
+                    lambda: self._generate_until_decision(prompt, prefix_key, prefix),
+                    self.process.__name__,
+                )
+            else:
+                response = self.generate_text(
+                    prompt, prefix_key=prefix_key, prefix=prefix
+                )
+        self._complete_process(that_dict, input_data, prompt, response)
+        return input_data
+
+    def _generate_until_decision(
+        self, prompt: str, prefix_key: str = None, prefix: str = None
+    ) -> str:
+        """Streams the response to the prompt until a complete line names a decision."""
+        generated = ""
+        for chunk in self.model.stream_text(prompt, prefix_key, prefix):
+            generated += chunk
+            lines = generated.split("\n")
+            # The last line may still be incomplete
+            if any(Decision.parse(line) is not None for line in lines[:-1]):
+                break
+        # Like generated texts, the response starts with the prompt
+        return prompt + generated
+
+    async def aprocess(self, type: str, input_data: CLIMData) -> CLIMData:
+        """
+        Processes the input data like `process` without blocking the event loop.
+
+        The response of an API backed layer is awaited on the async client; local models,
+        decision scoring and streaming run `process` in a worker thread.
+
+        :param type: A string indicating the type of processing to be performed (e.g., "prerun", "final").
+        :param input_data: The CLIMData object containing the input data for processing.
+        :return: The updated CLIMData object.
+        """
+        if not self.use_api or self.decision_mode == "head" or self.stop_at_decision:
+            return await asyncio.to_thread(self.process, type, input_data)
+        if input_data is None:
+            input_data = CLIMData()
+        that_dict, prompt = self._prepare_process(type, input_data)
+        response = await self.agenerate_text(prompt) if prompt else None
+        self._complete_process(that_dict, input_data, prompt, response)
+        return input_data
+
+    def process_many(self, type: str, input_datas: list[CLIMData]) -> list[CLIMData]:
+        """
+        Processes several inputs through this CLIM layer with one batched generation.
+
+        Each input is handled like in `process`, but the prompts of all inputs are generated
+        together by `generate_text_batch`.
+
+        :param type: A string indicating the type of processing to be performed (e.g., "prerun", "final").
+        :param input_datas: The CLIMData objects to process, None entries are replaced by new ones.
+        :return: The updated CLIMData objects in input order.
+        """
+        input_datas = [
+            input_data if input_data is not None else CLIMData()
+            for input_data in input_datas
+        ]
+        pending = [
+            (input_data, *self._prepare_process(type, input_data))
+            for input_data in input_datas
+        ]
+        if self.decision_mode == "head":
+            # Inputs whose decisions could be scored need no generation
+            generate = []
+            for input_data, that_dict, prompt in pending:
+                probabilities = self.score_decisions(prompt) if prompt else None
+                if probabilities is None:
+                    generate.append((input_data, that_dict, prompt))
+                else:
+                    self._complete_process_by_head(that_dict, input_data, probabilities)
+            pending = generate
+        prompts = [prompt for _, _, prompt in pending if prompt]
+        responses = iter(
+            (self.generate_text_batch(prompts) if prompts else None)
+            or [None] * len(prompts)
+        )
+        for input_data, that_dict, prompt in pending:
+            response = next(responses) if prompt else None
+            self._complete_process(that_dict, input_data, prompt, response)
+        return input_datas
+
+    def _prepare_process(self, type: str, input_data: CLIMData):
+        """Creates the layer entry of the input data and returns it with the prompt."""
         that_dict = input_data.get_or_create_clim_data(self.get_name(), type)
         that_dict["layer"] = self.name
         last_response = input_data.get_last_response()
@@ -312,9 +535,13 @@ class BaseCLIM(CLIMInterface):
             type=type, layer_name=self.name, input_data=last_response
         )
         that_dict["prompt"] = prompt
+        return that_dict, prompt
 
+    def _complete_process(
+        self, that_dict: dict, input_data: CLIMData, prompt: str, response: str
+    ):
+        """Stores the response of a prompt and the decision parsed from it."""
         if prompt:
-            response = self.generate_text(prompt)
             if response is None:
                 that_dict["response"] = self.prompt_manager.get_error_prompt(
                     reason="Response generation failed", input_data=input_data
@@ -346,7 +573,33 @@ class BaseCLIM(CLIMInterface):
             that_dict["subject_of_decision"] = "Code: Fix unknown layer error"
 
         input_data.set_last_decision(that_dict["decision"])
-        return input_data
+
+    def _complete_process_by_head(
+        self, that_dict: dict, input_data: CLIMData, probabilities: dict[str, float]
+    ):
+        """Stores the most probable decision and the probabilities of all decisions."""
+        decision = max(probabilities, key=probabilities.get)
+        that_dict["response"] = decision
+        that_dict["decision"] = decision
+        that_dict["decision_probabilities"] = probabilities
+        that_dict["subject_of_decision"] = (
+            f"Decision head: {decision} ({probabilities[decision]:.2f})"
+        )
+        input_data.set_last_decision(decision)
+
+    def score_decisions(self, input_text: str) -> dict[str, float]:
+        """
+        Scores all decisions as answers to the input text with one forward pass of the model.
+
+        :param input_text: The prompt to score the decisions for.
+        :return: The probability of each translated decision, or None if the model cannot score.
+        """
+        return self.method_wrapper(
+            lambda: self.model.score_decisions(
+                input_text, Decision.get_all_decisions()
+            ),
+            self.score_decisions.__name__,
+        )
 
     def get_layer(self, layer: str = None) -> CLIMInterface:
         """
@@ -363,15 +616,100 @@ class BaseCLIM(CLIMInterface):
             return self
         return None
 
-    def generate_text(self, input_text: str) -> str:
+    def generate_text(
+        self, input_text: str, prefix_key: str = None, prefix: str = None
+    ) -> str:
         """
         Generates text based on the input text using the model.
 
+        :param input_text: The input text to generate from.
+        :param prefix_key: Optional key of the prompt template the input text is built from.
+        :param prefix: Optional static prefix of the prompt template, whose encoded state is cached.
+        :return: The generated text or None if an error occurs.
+        """
+        return self.method_wrapper(
+            lambda: self.model.generate_text(input_text, prefix_key, prefix),
+            self.generate_text.__name__,
+        )
+
+    async def agenerate_text(self, input_text: str) -> str:
+        """
+        Generates text based on the input text without blocking the event loop.
+
         :param input_text: The input text to generate from.
         :return: The generated text or None if an error occurs.
         """
+        return await self.amethod_wrapper(
+            lambda: self.model.agenerate_text(input_text),
+            self.agenerate_text.__name__,
+        )
+
+    async def agenerate_answer_list(self, prompt, options=None):
+        """
+        Generates a list of answers based on the given prompt without blocking the event loop.
+
+        :param prompt: The prompt to generate answers from.
+        :param options: Optional list of options to guide the answer generation.
+        :return: A list of generated answers or None if an error occurs.
+        """
+        return await self.amethod_wrapper(
+            lambda: self.model.agenerate_answer_list(prompt, options),
+            self.agenerate_answer_list.__name__,
+        )
+
+    async def aclose(self):
+        """Closes the connections of the async API client."""
+        await self.amethod_wrapper(lambda: self.model.aclose(), self.aclose.__name__)
+
+    def stream_text(self, input_text: str, prefix_key: str = None, prefix: str = None):
+        """
+        Generates text based on the input text and yields it in chunks as it is produced.
+
+        Closing the returned generator stops the generation.
+
+        :param input_text: The input text to generate from.
+        :param prefix_key: Optional key of the prompt template the input text is built from.
+        :param prefix: Optional static prefix of the prompt template, whose encoded state is cached.
+        :return: A generator of text chunks, without the input text.
+        """
+        return self.model.stream_text(input_text, prefix_key, prefix)
+
+    def generate_text_batch(self, input_texts: list[str]) -> list[str]:
+        """
+        Generates texts for several input texts at once using the model.
+
+        The local model left-pads the prompts and runs one generation per micro-batch
+        of at most `max_batch_size` prompts.
+
+        :param input_texts: The input texts to generate from.
+        :return: The generated texts in input order or None if an error occurs.
+        """
+        return self.method_wrapper(
+            lambda: self.model.generate_text_batch(input_texts),
+            self.generate_text_batch.__name__,
+        )
+
+    def get_response_cache_statistics(self) -> dict:
+        """
+        Returns the statistics of the response cache of the model.
+
+        :return: The entries, hits, misses, evictions and hit rate, or None if the cache is disabled.
+        """
+        return self.method_wrapper(
+            lambda: self.model.get_response_cache_statistics(),
+            self.get_response_cache_statistics.__name__,
+        )
+
+    def get_weights_id(self) -> str:
+        """
+        Returns the identity of the model weights of the layer.
+
+        :return: The identity, which is the same after a restart for weights loaded from disk,
+            or the model name for API models.
+        """
         return self.method_wrapper(
-            lambda: self.model.generate_text(input_text), self.generate_text.__name__
+            lambda: self.model.get_weights_id() or self.model_name,
+            self.get_weights_id.__name__,
         )
 
     def generate_output(self, input_text):
@@ -0,0 +1,335 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import time
+import uuid
+from threading import RLock
+
+import torch
+from safetensors.torch import save_file
+
+from ethos_ai.util.protocol import Protocol
+
+
+class CheckpointStore:
+    """
+    Versioned, content-addressed checkpoints of a model in one directory.
+
+    Every tensor is stored once as a safetensors blob named by the hash of its content, a
+    version is a manifest mapping the tensor names to their blobs (plus the config and
+    tokenizer files of full models). Saving writes only the blobs that do not exist yet and
+    switches the `CURRENT` pointer atomically once the new version is complete, so a crash
+    leaves the previous version current. Old versions and unreferenced blobs are removed
+    beyond the retention. Blobs are loaded memory-mapped, without copying the weights.
+
+    Layout::
+
+        <path>/CURRENT                      name of the current version
+        <path>/versions/<name>/manifest.json
+        <path>/blobs/<sha256>.safetensors
+    """
+
+    FULL = "full"
+    ADAPTER = "adapter"
+    CURRENT_NAME = "CURRENT"
+    MANIFEST_NAME = "manifest.json"
+    VERSIONS_DIR = "versions"
+    BLOBS_DIR = "blobs"
+    BLOB_SUFFIX = ".safetensors"
+    # The key of the single tensor of a blob
+    TENSOR_KEY = "tensor"
+    TEMP_PREFIX = ".tmp-"
+
+    _DTYPES = {
+        "F64": torch.float64,
+        "F32": torch.float32,
+        "F16": torch.float16,
+        "BF16": torch.bfloat16,
+        "I64": torch.int64,
+        "I32": torch.int32,
+        "I16": torch.int16,
+        "I8": torch.int8,
+        "U8": torch.uint8,
+        "BOOL": torch.bool,
+    }
+
+    def __init__(self, path: str, retention: int = 3):
+        """
+        :param path: The model directory of the checkpoints.
+        :param retention: The number of latest versions kept; older versions are removed.
+        """
+        self.protocol = Protocol()
+        self.path = path
+        self.retention = max(1, retention)
+        self._lock = RLock()
+
+    def _versions_dir(self) -> str:
+        return os.path.join(self.path, CheckpointStore.VERSIONS_DIR)
+
+    def _blobs_dir(self) -> str:
+        return os.path.join(self.path, CheckpointStore.BLOBS_DIR)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, CheckpointStore.CURRENT_NAME))
+
+    @staticmethod
+    def is_version(path: str) -> bool:
+        """Returns True if the path is the directory of a checkpoint version."""
+        return os.path.isfile(os.path.join(path, CheckpointStore.MANIFEST_NAME))
+
+    def get_current_name(self) -> str:
+        """Returns the name of the current version, or None if nothing is saved."""
+        try:
+            with open(os.path.join(self.path, CheckpointStore.CURRENT_NAME)) as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def get_current(self) -> str:
+        """Returns the directory of the current version, or None if nothing is saved."""
+        name = self.get_current_name()
+        if name is None:
+            return None
+        return os.path.join(self._versions_dir(), name)
+
+    def get_versions(self) -> list[str]:
+        """Returns the names of the complete versions, oldest first."""
+        if not os.path.isdir(self._versions_dir()):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self._versions_dir())
+            if not name.startswith(CheckpointStore.TEMP_PREFIX)
+            and CheckpointStore.is_version(os.path.join(self._versions_dir(), name))
+        )
+
+    @staticmethod
+    def read_manifest(version_path: str) -> dict:
+        with open(os.path.join(version_path, CheckpointStore.MANIFEST_NAME)) as file:
+            return json.load(file)
+
+    @staticmethod
+    def _hash_tensor(tensor: torch.Tensor) -> str:
+        digest = hashlib.sha256(f"{tensor.dtype}:{list(tensor.shape)}".encode())
+        if tensor.numel() > 0:
+            digest.update(tensor.reshape(-1).view(torch.uint8).numpy())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _sync(path: str):
+        with open(path, "r+b") as file:
+            os.fsync(file.fileno())
+
+    def _write_blob(self, digest: str, tensor: torch.Tensor) -> bool:
+        """Writes the blob of a tensor, unless it exists. Returns True if it was written."""
+        path = os.path.join(self._blobs_dir(), digest + CheckpointStore.BLOB_SUFFIX)
+        if os.path.exists(path):
+            return False
+        temp_path = os.path.join(
+            self._blobs_dir(), f"{CheckpointStore.TEMP_PREFIX}{uuid.uuid4().hex}"
+        )
+        save_file({CheckpointStore.TENSOR_KEY: tensor}, temp_path)
+        CheckpointStore._sync(temp_path)
+        os.replace(temp_path, path)
+        return True
+
+    def save(
+        self,
+        tensors: dict,
+        kind: str = FULL,
+        config: dict = None,
+        save_files=None,
+    ) -> str:
+        """
+        Saves the tensors as a new version and makes it the current version.
+
+        :param tensors: The tensors by name, e.g. a state dict. Tensors may share memory.
+        :param kind: FULL for the weights of a whole model, ADAPTER for the weights of an adapter.
+        :param config: Settings stored in the manifest, e.g. the adapter configuration.
+        :param save_files: Optional callable that writes further files (config, tokenizer)
+            into the version directory it is called with.
+        :return: The directory of the current version; the existing one if nothing changed.
+        """
+        with self._lock:
+            os.makedirs(self._versions_dir(), exist_ok=True)
+            os.makedirs(self._blobs_dir(), exist_ok=True)
+            digests = {}
+            written = 0
+            for name, tensor in tensors.items():
+                tensor = tensor.detach().cpu().contiguous()
+                digests[name] = CheckpointStore._hash_tensor(tensor)
+                if self._write_blob(digests[name], tensor):
+                    written += 1
+
+            snapshot = hashlib.sha256(
+                json.dumps(
+                    {"kind": kind, "config": config, "tensors": digests},
+                    sort_keys=True,
+                ).encode()
+            ).hexdigest()
+            current = self.get_current()
+            if (
+                current is not None
+                and CheckpointStore.read_manifest(current).get("snapshot") == snapshot
+            ):
+                self.protocol.info(
+                    f"Checkpoint {current} is unchanged, no new version saved."
+                )
+                return current
+
+            versions = self.get_versions()
+            name = f"{int(versions[-1]) + 1 if versions else 1:06d}"
+            temp_path = os.path.join(
+                self._versions_dir(), f"{CheckpointStore.TEMP_PREFIX}{uuid.uuid4().hex}"
+            )
+            os.makedirs(temp_path)
+            if save_files is not None:
+                save_files(temp_path)
+            manifest = {
+                "version": name,
+                "kind": kind,
+                "created": time.time(),
+                "parent": self.get_current_name(),
+                "snapshot": snapshot,
+                "config": config,
+                "tensors": digests,
+            }
+            manifest_path = os.path.join(temp_path, CheckpointStore.MANIFEST_NAME)
+            with open(manifest_path, "w") as file:
+                json.dump(manifest, file, indent=4)
+            CheckpointStore._sync(manifest_path)
+            version_path = os.path.join(self._versions_dir(), name)
+            os.rename(temp_path, version_path)
+            self._set_current(name)
+            self.protocol.info(
+                f"Checkpoint {version_path} saved, {written} of {len(digests)} tensors written."
+            )
+            self.collect_garbage()
+            return version_path
+
+    def _set_current(self, name: str):
+        """Switches the current pointer atomically."""
+        path = os.path.join(self.path, CheckpointStore.CURRENT_NAME)
+        # Stores of the same path do not share a lock, each switch has its own file
+        temp_path = os.path.join(
+            self.path, f"{CheckpointStore.TEMP_PREFIX}{uuid.uuid4().hex}"
+        )
+        with open(temp_path, "w") as file:
+            file.write(name)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    def collect_garbage(self) -> int:
+        """
+        Removes the versions beyond the retention and the blobs no kept version refers to.
+
+        The current version and the base versions of kept adapters are always kept. Blobs that
+        cannot be removed (e.g. mapped files on Windows) are removed by a later collection.
+
+        :return: The number of removed versions.
+        """
+        with self._lock:
+            versions = self.get_versions()
+            keep = set(versions[-self.retention :])
+            current = self.get_current_name()
+            if current is not None:
+                keep.add(current)
+            versions_dir = os.path.realpath(self._versions_dir())
+            manifests = {}
+            for name in list(keep):
+                manifests[name] = CheckpointStore.read_manifest(
+                    os.path.join(self._versions_dir(), name)
+                )
+                base_model = (manifests[name].get("config") or {}).get("base_model")
+                if (
+                    base_model
+                    and os.path.realpath(os.path.dirname(base_model)) == versions_dir
+                ):
+                    base_name = os.path.basename(base_model.rstrip("/\\"))
+                    if base_name in versions and base_name not in manifests:
+                        keep.add(base_name)
+                        manifests[base_name] = CheckpointStore.read_manifest(
+                            os.path.join(self._versions_dir(), base_name)
+                        )
+
+            removed = 0
+            for name in os.listdir(self._versions_dir()):
+                if name not in keep:
+                    shutil.rmtree(
+                        os.path.join(self._versions_dir(), name), ignore_errors=True
+                    )
+                    removed += name in versions
+
+            referenced = {
+                digest + CheckpointStore.BLOB_SUFFIX
+                for manifest in manifests.values()
+                for digest in manifest["tensors"].values()
+            }
+            for filename in os.listdir(self._blobs_dir()):
+                if filename not in referenced:
+                    try:
+                        os.remove(os.path.join(self._blobs_dir(), filename))
+                    except OSError:
+                        pass
+            return removed
+
+    @staticmethod
+    def _read_blob(path: str) -> torch.Tensor:
+        """Returns the tensor of a blob backed by a copy-on-write mapping of the file."""
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        header_size = struct.unpack("<Q", buffer[:8])[0]
+        entry = json.loads(buffer[8 : 8 + header_size])[CheckpointStore.TENSOR_KEY]
+        dtype = CheckpointStore._DTYPES[entry["dtype"]]
+        start, end = entry["data_offsets"]
+        if end == start:
+            return torch.empty(entry["shape"], dtype=dtype)
+        # The tensor keeps the mapping alive, writes (training) copy the touched pages
+        return torch.frombuffer(
+            buffer,
+            dtype=dtype,
+            count=(end - start) // torch.empty((), dtype=dtype).element_size(),
+            offset=8 + header_size + start,
+        ).reshape(entry["shape"])
+
+    @staticmethod
+    def load_tensors(version_path: str) -> dict:
+        """
+        Returns the tensors of a version by name, memory-mapped without copying.
+
+        Names that refer to the same blob (e.g. tied weights) get the same tensor.
+        """
+        manifest = CheckpointStore.read_manifest(version_path)
+        blobs_dir = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(version_path))),
+            CheckpointStore.BLOBS_DIR,
+        )
+        blobs = {}
+        tensors = {}
+        for name, digest in manifest["tensors"].items():
+            if digest not in blobs:
+                blobs[digest] = CheckpointStore._read_blob(
+                    os.path.join(blobs_dir, digest + CheckpointStore.BLOB_SUFFIX)
+                )
+            tensors[name] = blobs[digest]
+        return tensors
+
+    @staticmethod
+    def load_model(version_path: str):
+        """Returns the GPT-2 model of a full version, its weights mapped from the blobs."""
+        from transformers import GPT2Config, GPT2LMHeadModel
+        from transformers.modeling_utils import no_init_weights
+
+        config = GPT2Config.from_pretrained(version_path)
+        # The random initialization is skipped, the weights are replaced by the mapped tensors
+        with no_init_weights():
+            model = GPT2LMHeadModel(config)
+        model.load_state_dict(CheckpointStore.load_tensors(version_path), assign=True)
+        model.tie_weights()
+        model.eval()
+        return model
@@ -1,3 +1,4 @@
+import copy
 from typing import Dict, Optional, Union
 
 """
@@ -13,6 +14,12 @@ Methods:
 - get_last_decision() -> Optional[str]: Retrieves the last decision.
 - set_last_decision(decision: str) -> None: Sets the last decision.
 - initialize_clim_data(clim_name: str) -> None: Initializes the CLIM data for a given clim_name if it doesn't exist.
+- add_stage_timing(pipeline: str, stage: str, layer: str, seconds: float, decision: str) -> None: Records the duration of a pipeline stage.
+- get_stage_timings() -> list[Dict[str, Union[str, float]]]: Retrieves the recorded stage durations.
+- get_skipped_stages() -> int: Retrieves the number of pipeline stages skipped by terminal decisions and bypasses.
+- set_skipped_stages(count: int) -> None: Sets the number of skipped pipeline stages.
+- fork() -> CLIMData: Returns an independent copy for a concurrently running stage.
+- merge(other: CLIMData) -> None: Merges the CLIM datas of a fork back.
 """
 
 
@@ -57,6 +64,51 @@ class CLIMData:
         if clim_name not in self.data:
             self.data[clim_name] = {}
 
+    # Durations of the pipeline stages that processed the data
+    def add_stage_timing(
+        self, pipeline: str, stage: str, layer: str, seconds: float, decision: str
+    ) -> None:
+        self.data.setdefault("stage_timings", []).append(
+            {
+                "pipeline": pipeline,
+                "stage": stage,
+                "layer": layer,
+                "seconds": seconds,
+                "decision": decision,
+            }
+        )
+
+    def get_stage_timings(self) -> list[Dict[str, Union[str, float]]]:
+        return self.data.get("stage_timings", [])
+
+    def get_skipped_stages(self) -> int:
+        return self.data.get("skipped_stages", 0)
+
+    def set_skipped_stages(self, count: int) -> None:
+        self.data["skipped_stages"] = count
+
+    # Forks are processed concurrently by the stages of a parallel pipeline group
+    def fork(self) -> "CLIMData":
+        forked = CLIMData()
+        forked.data = copy.deepcopy(self.data)
+        return forked
+
+    def merge(self, other: "CLIMData") -> None:
+        for clim_name, value in other.data.items():
+            if clim_name in (
+                "last_response",
+                "last_decision",
+                "stage_timings",
+                "skipped_stages",
+            ):
+                continue
+            if isinstance(value, dict):
+                datas = self.data.setdefault(clim_name, {})
+                for key, clim_data in value.items():
+                    datas.setdefault(key, {}).update(clim_data)
+            else:
+                self.data[clim_name] = value
+
     def __str__(self):
         return str(self.data)
 
@@ -20,6 +20,11 @@ class CLIMInterface(ABC):
     def generate_text(self, input_text: str) -> str:
         pass
 
+    @abstractmethod
+    def generate_text_batch(self, input_texts: list[str]) -> list[str]:
+        """Generate the texts for several prompts at once, returned in input order."""
+        pass
+
     @abstractmethod
     def generate_output(self, input_text):
         pass
@@ -52,6 +57,16 @@ class CLIMInterface(ABC):
         """Return the current status of the training process."""
         pass
 
+    @abstractmethod
+    def get_training_progress(self):
+        """Return the status, queue position and progress of the training process."""
+        pass
+
+    @abstractmethod
+    def wait_for_training(self, timeout: float = None, stop_event=None) -> bool:
+        """Block until the training has finished, the timeout elapsed or the stop event is set."""
+        pass
+
     @abstractmethod
     def request_cancellation_of_training(self):
         """Request to cancel the ongoing training."""
@@ -1,19 +1,26 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
-
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ethos_ai.clim.async_clim_interface import AsyncCLIMInterface
 from ethos_ai.clim.clim_interface import CLIMInterface
 from ethos_ai.clim.base_clim import BaseCLIM
 from ethos_ai.clim.clim_data import CLIMData
-from ethos_ai.clim.decision import Decision
 from ethos_ai.clim.ethic_clim import EthicCLIM
 from ethos_ai.clim.individual_clim import IndividualCLIM
+from ethos_ai.clim.layer_residency_manager import LayerResidencyManager
 from ethos_ai.clim.ltclim import LTCLIM
-from ethos_ai.clim.pipelines import Pipelines
+from ethos_ai.clim.pipeline_engine import PipelineEngine
 from ethos_ai.clim.samt_clim import SAMTCLIM
+from ethos_ai.clim.training_scheduler import TrainingScheduler
 from ethos_ai.individual.base_individual import BaseIndividual
 from ethos_ai.instruction.instruction import Instruction
 from ethos_ai.security.securied_identity_card import SecuredIdentityCard
 from ethos_ai.security.security_level import SecurityLevel
+from ethos_ai.state.priority import Priority
 from ethos_ai.tool.script_generator import ScriptGenerator
 from ethos_ai.tool.tool_manager import ToolManager
 from ethos_ai.topic.to_do_topic import ToDoTopic
@@ -21,13 +28,33 @@ from ethos_ai.util.protocol import Protocol
 from ethos_ai.util.translate import Translations
 
 
-class CLIM(CLIMInterface):
+class CLIM(CLIMInterface, AsyncCLIMInterface):
     def __init__(
         self,
         identity_card: SecuredIdentityCard,
         password: str,
         tool_manager: ToolManager,
+        max_concurrent_training_jobs: int = 1,
+        threads_per_training_job: int = None,
+        layer_timeout: float = 300.0,
+        memory_budget_mb: float = None,
+        idle_timeout: float = None,
     ):
+        """
+        Initializes the CLIM stack.
+
+        :param identity_card: The secured identity card of the life.
+        :param password: The password of the identity card.
+        :param tool_manager: The tool manager for managing tools.
+        :param max_concurrent_training_jobs: The number of layers trained at the same time.
+        :param threads_per_training_job: The intra-op threads of each training job,
+            by default the CPU cores divided by the concurrent jobs.
+        :param layer_timeout: The time in seconds a layer may take to answer a fan-out call
+            (generate_text, generate_output, generate_answer_list), None waits without limit.
+        :param memory_budget_mb: The megabytes the loaded layer models may take, None for no limit.
+        :param idle_timeout: The seconds after which the model of an unused layer is unloaded,
+            None keeps loaded models. Layers load their models on first use (config lazy_loading).
+        """
         self.protocol = Protocol()
         self.name: str = "Stacked CLIM"
         self.identity: SecuredIdentityCard = identity_card
@@ -44,6 +71,44 @@ class CLIM(CLIMInterface):
         self.ltclim_layer: BaseCLIM = LTCLIM(
             identity=identity_card, password=password, tool_manager=tool_manager
         )
+        # Layer models are loaded on use and unloaded when idle or over the memory budget
+        self.residency_manager: LayerResidencyManager = LayerResidencyManager(
+            memory_budget=(
+                int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+            ),
+            idle_timeout=idle_timeout,
+        )
+        # Layer trainings are queued instead of competing for the same cores
+        self.training_scheduler: TrainingScheduler = TrainingScheduler(
+            max_concurrent_jobs=max_concurrent_training_jobs,
+            threads_per_job=threads_per_training_job,
+        )
+        for layer in [
+            self.ethic_layer,
+            self.individual_layer,
+            self.samt_layer,
+            self.ltclim_layer,
+        ]:
+            layer.set_training_scheduler(self.training_scheduler)
+            layer.set_residency_manager(self.residency_manager)
+            layer.add_training_progress_callback(self._on_training_progress)
+        # The layers of fan-out calls are independent and run concurrently
+        self.layer_timeout: float = layer_timeout
+        self.inference_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="CLIM-Inference"
+        )
+        # The pipelines are data (resources/pipelines), compiled once and run by the engine
+        self.pipeline_engine: PipelineEngine = PipelineEngine(
+            layers={
+                "ETHIC": self.ethic_layer,
+                "INDIVIDUAL": self.individual_layer,
+                "SAMT": self.samt_layer,
+                "LTCLIM": self.ltclim_layer,
+            }
+        )
+        # Notified whenever a layer reports training progress or completion
+        self._training_condition = threading.Condition()
+        self._training_progress_callbacks: list = []
 
     def get_name(self) -> str:
         return self.name
@@ -55,6 +120,7 @@ class CLIM(CLIMInterface):
         The process includes standard pipeline steps, such as ethic checks, individual adjustments,
         and both short-term and long-term optimizations. Additionally, the method can handle emergency
         situations by invoking specialized bypass stages based on the decision levels.
+        The pipelines and their transitions are defined in resources/pipelines/pipelines.json.
 
         :param input_data: The CLIMData object containing the input data for processing.
         :return: The final result of the processing pipeline.
@@ -62,35 +128,38 @@ class CLIM(CLIMInterface):
 
         that_dict = input_data.get_or_create_clim_data(self.get_name(), type)
 
-        decision = None
-        pipeline = Pipelines.standard_pipeline(
-            ethic=self.ethic_layer,
-            individual=self.individual_layer,
-            samt=self.samt_layer,
-            lclim=self.ltclim_layer,
-        )
-        while decision != Decision.STOP.translated_name:
-            if decision is Decision.EMERGENCY_SURVIVAL.translated_name:
-                pipeline = Pipelines.emergency_survival_pipeline(
-                    ethic=self.ethic_layer, samt=self.samt_layer
-                )
-            elif decision is Decision.EMERGENCY_ESSENTIAL.translated_name:
-                pipeline = Pipelines.emergency_essential_pipeline(
-                    ethic=self.ethic_layer,
-                    samt=self.samt_layer,
-                    individual=self.individual_layer,
-                )
-            elif decision is Decision.EMERGENCY_RECOMMENDED.translated_name:
-                pipeline = Pipelines.emergency_recommended_pipeline(
-                    samt=self.samt_layer, individual=self.individual_layer
-                )
+        return self.pipeline_engine.run(input_data=input_data)
+
+    async def aprocess(self, type: str, input_data: CLIMData) -> CLIMData:
+        """
+        Processes the input data through the pipelines like `process`, awaiting the layers.
+
+        :param input_data: The CLIMData object containing the input data for processing.
+        :return: The final result of the processing pipeline.
+        """
+        that_dict = input_data.get_or_create_clim_data(self.get_name(), type)
+
+        return await self.pipeline_engine.arun(input_data=input_data)
+
+    def process_many(self, type: str, input_datas: list[CLIMData]) -> list[CLIMData]:
+        """
+        Processes several inputs through the pipelines like `process`, in lockstep.
 
-            if not pipeline or pipeline == []:
-                break
-            type, clim = pipeline.pop(0)
-            input_data = clim.process(type=type, input_data=input_data)
-            decision = input_data.get_last_decision()
-        return input_data
+        All inputs advance stage by stage; the inputs at the same stage of the same layer are
+        generated in one batched call (see BaseCLIM.process_many). Every input follows its own
+        decisions, e.g. into an emergency pipeline.
+
+        :param input_datas: The CLIMData objects to process, None entries are replaced by new ones.
+        :return: The processed CLIMData objects in input order.
+        """
+        input_datas = [
+            input_data if input_data is not None else CLIMData()
+            for input_data in input_datas
+        ]
+        for input_data in input_datas:
+            input_data.get_or_create_clim_data(self.get_name(), type)
+
+        return self.pipeline_engine.run_many(input_datas)
 
     def persist_model(self):
         """Persist the model to the file system."""
@@ -107,27 +176,31 @@ class CLIM(CLIMInterface):
             self.protocol.error("Failed to persist model(s).")  # pragma: no cover
 
     def start_training_async(
-        self, training_data, epochs=3, batch_size=2, learning_rate=5e-5
+        self,
+        training_data,
+        epochs=3,
+        batch_size=2,
+        learning_rate=5e-5,
+        priorities: dict[str, Priority] = None,
     ):
-        """Start the training process in a separate thread."""
+        """
+        Queue the training of the layers on the training scheduler.
+
+        :param training_data: The training data by layer name.
+        :param priorities: Optional training priorities by layer name, default NORMAL.
+        """
         self.protocol.info("Starting the CLIM model training asynchron...")
         if isinstance(training_data, dict):
+            priorities = priorities or {}
             for key in training_data:
-                if key == "ETHIC":
-                    self.ethic_layer.start_training_async(
-                        training_data[key], epochs, batch_size, learning_rate
-                    )
-                elif key == "INDIVIDUAL":
-                    self.individual_layer.start_training_async(
-                        training_data[key], epochs, batch_size, learning_rate
-                    )
-                elif key == "SAMT":
-                    self.samt_layer.start_training_async(
-                        training_data[key], epochs, batch_size, learning_rate
-                    )
-                elif key == "LTCLIM":
-                    self.ltclim_layer.start_training_async(
-                        training_data[key], epochs, batch_size, learning_rate
+                layer = self.get_layer(key)
+                if layer is not None:
+                    layer.start_training_async(
+                        training_data[key],
+                        epochs,
+                        batch_size,
+                        learning_rate,
+                        priorities.get(key, Priority.NORMAL),
                     )
                 else:
                     self.protocol.error(
@@ -182,6 +255,100 @@ class CLIM(CLIMInterface):
             "LTCLIM": self.ltclim_layer.get_training_status(),
         }
 
+    def get_response_cache_statistics(self):
+        """Return the response cache statistics of each layer."""
+        return {
+            "ETHIC": self.ethic_layer.get_response_cache_statistics(),
+            "INDIVIDUAL": self.individual_layer.get_response_cache_statistics(),
+            "SAMT": self.samt_layer.get_response_cache_statistics(),
+            "LTCLIM": self.ltclim_layer.get_response_cache_statistics(),
+        }
+
+    def get_model_version(self) -> str:
+        """
+        Return the version of the stack: a hash of the weights identities of all layers.
+
+        It changes whenever the weights of a layer change and is the same after a restart.
+        """
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "ETHIC": self.ethic_layer.get_weights_id(),
+                    "INDIVIDUAL": self.individual_layer.get_weights_id(),
+                    "SAMT": self.samt_layer.get_weights_id(),
+                    "LTCLIM": self.ltclim_layer.get_weights_id(),
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    def get_pipeline_statistics(self):
+        """Return the number of processed runs, stages and stages skipped by terminal decisions."""
+        return self.pipeline_engine.get_statistics()
+
+    def get_residency_status(self):
+        """Return whether the model of each layer is loaded, its idle time and memory."""
+        return self.residency_manager.get_status()
+
+    def get_training_progress(self):
+        """Return the status, queue position and progress of the training of each layer."""
+        return {
+            "ETHIC": self.ethic_layer.get_training_progress(),
+            "INDIVIDUAL": self.individual_layer.get_training_progress(),
+            "SAMT": self.samt_layer.get_training_progress(),
+            "LTCLIM": self.ltclim_layer.get_training_progress(),
+        }
+
+    def add_training_progress_callback(self, callback):
+        """
+        Registers a callback for the training progress of all layers.
+
+        The callback is called with the layer model name and its progress dict after every
+        epoch and when the training of the layer has finished.
+        """
+        self._training_progress_callbacks.append(callback)
+
+    def _on_training_progress(self, name: str, progress: dict):
+        for callback in list(self._training_progress_callbacks):
+            try:
+                callback(name, progress)
+            except Exception as e:
+                self.protocol.error(f"Training progress callback failed: {str(e)}")
+        with self._training_condition:
+            self._training_condition.notify_all()
+
+    def wait_for_training(
+        self, timeout: float = None, stop_event: threading.Event = None
+    ) -> bool:
+        """
+        Blocks until the training of all layers has finished.
+
+        Returns as soon as the last layer finishes. A set stop event interrupts the wait;
+        it is checked every 100 ms.
+
+        :param timeout: The maximum time to wait in seconds, None waits without limit.
+        :param stop_event: Optional event that interrupts the wait when set.
+        :return: True if all layers have finished training, False on timeout or stop.
+        """
+        layers = [
+            self.ethic_layer,
+            self.individual_layer,
+            self.samt_layer,
+            self.ltclim_layer,
+        ]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._training_condition:
+            while not all(layer.wait_for_training(0) for layer in layers):
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    return False
+                if stop_event is not None:
+                    wait = 0.1 if wait is None else min(wait, 0.1)
+                self._training_condition.wait(wait)
+        return True
+
     def request_cancellation_of_training(self):
         """Request to cancel the ongoing training."""
         self.ethic_layer.request_cancellation_of_training()
@@ -195,9 +362,11 @@ class CLIM(CLIMInterface):
         self.individual_layer.start()
         self.samt_layer.start()
         self.ltclim_layer.start()
+        self.residency_manager.start()
 
     def stop(self):
         """Stop the clim stack."""
+        self.residency_manager.stop()
         self.ethic_layer.stop()
         self.individual_layer.stop()
         self.samt_layer.stop()
@@ -232,6 +401,119 @@ class CLIM(CLIMInterface):
         else:
             return None
 
+    def _fan_out(self, call) -> dict[str, any]:
+        """
+        Calls all layers concurrently on the inference executor.
+
+        :param call: The function called with each layer.
+        :return: The results by layer name, in layer order. Layers that fail or do not
+            answer within the layer timeout are logged and have the result None.
+        """
+        futures = {
+            layer.name.upper(): self.inference_executor.submit(call, layer)
+            for layer in [
+                self.ethic_layer,
+                self.individual_layer,
+                self.samt_layer,
+                self.ltclim_layer,
+            ]
+        }
+        # The timeout applies to each layer, all of them started at the same time
+        wait(futures.values(), timeout=self.layer_timeout)
+        results = {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                self.protocol.error(
+                    f"Layer {name} did not answer within {self.layer_timeout} seconds."
+                )
+                results[name] = None
+            elif future.exception() is not None:
+                self.protocol.error(f"Layer {name} failed: {str(future.exception())}")
+                results[name] = None
+            else:
+                results[name] = future.result()
+        return results
+
+    async def _afan_out(self, call) -> dict[str, any]:
+        """
+        Awaits the coroutines of all layers concurrently.
+
+        :param call: The function returning the coroutine of a layer.
+        :return: The results by layer name, in layer order. Layers that fail or do not
+            answer within the layer timeout are logged and have the result None.
+        """
+        layers = [
+            self.ethic_layer,
+            self.individual_layer,
+            self.samt_layer,
+            self.ltclim_layer,
+        ]
+        outcomes = await asyncio.gather(
+            *[asyncio.wait_for(call(layer), self.layer_timeout) for layer in layers],
+            return_exceptions=True,
+        )
+        results = {}
+        for layer, outcome in zip(layers, outcomes):
+            name = layer.name.upper()
+            if isinstance(outcome, asyncio.TimeoutError):
+                self.protocol.error(
+                    f"Layer {name} did not answer within {self.layer_timeout} seconds."
+                )
+                results[name] = None
+            elif isinstance(outcome, Exception):
+                self.protocol.error(f"Layer {name} failed: {str(outcome)}")
+                results[name] = None
+            else:
+                results[name] = outcome
+        return results
+
+    async def agenerate_text(self, input_text: str) -> str:
+        """
+        Generates text based on the input text with all layers concurrently, awaiting the layers.
+
+        :param input_text: The input text to generate text from.
+        :return: The generated texts of all layers, joined by new lines.
+        """
+        texts = await self._afan_out(lambda layer: layer.agenerate_text(input_text))
+        return ("\n").join(text for text in texts.values() if text is not None)
+
+    async def agenerate_answer_list(self, prompt, options=None):
+        """
+        Generates the answer lists of all layers concurrently, awaiting the layers.
+
+        :param prompt: The prompt for generating answers.
+        :param options: The options for generating answers.
+        :return: The list of generated answers of all layers, in layer order.
+        """
+        answer_lists = await self._afan_out(
+            lambda layer: layer.agenerate_answer_list(prompt=prompt, options=options)
+        )
+        return [
+            answer
+            for layer_answers in answer_lists.values()
+            for answer in layer_answers or []
+        ]
+
+    async def aclose(self):
+        """Closes the connections of the async API clients of all layers."""
+        for layer in [
+            self.ethic_layer,
+            self.individual_layer,
+            self.samt_layer,
+            self.ltclim_layer,
+        ]:
+            await layer.aclose()
+
+    def generate_text_by_layer(self, input_text: str) -> dict[str, str]:
+        """
+        Generates text based on the input text with all layers concurrently.
+
+        :param input_text: The input text to generate text from.
+        :return: The generated texts by layer name, None for layers that failed or timed out.
+        """
+        return self._fan_out(lambda layer: layer.generate_text(input_text))
+
     def generate_text(self, input_text: str) -> str:
         """
         Generates text based on the input text.
@@ -240,31 +522,41 @@ class CLIM(CLIMInterface):
         :return: The generated text.
         """
         answers = ("\n").join(
-            [
-                layer.generate_text(input_text)
-                for layer in [
-                    self.ethic_layer,
-                    self.individual_layer,
-                    self.samt_layer,
-                    self.ltclim_layer,
-                ]
-            ]
+            text
+            for text in self.generate_text_by_layer(input_text).values()
+            if text is not None
         )
         return answers
 
+    def generate_text_batch(self, input_texts: list[str]) -> list[str]:
+        """
+        Generates texts for several input texts at once, with one batched generation per layer.
+
+        :param input_texts: The input texts to generate text from.
+        :return: The generated texts in input order, each joined over all layers.
+        """
+        layer_answers = [
+            layer.generate_text_batch(input_texts) or [None] * len(input_texts)
+            for layer in [
+                self.ethic_layer,
+                self.individual_layer,
+                self.samt_layer,
+                self.ltclim_layer,
+            ]
+        ]
+        return [
+            ("\n").join(text for text in texts if text is not None)
+            for texts in zip(*layer_answers)
+        ]
+
     def generate_output(self, input_text):
         """
         Generates output based on the input text.
 
         :param input_text: The input text to generate output from.
-        :return: The generated output.
+        :return: The generated output by layer name.
         """
-        answers = dict()
-        answers["ETHIC"] = self.ethic_layer.generate_output(input_text)
-        answers["INDIVIDUAL"] = self.individual_layer.generate_output(input_text)
-        answers["SAMT"] = self.samt_layer.generate_output(input_text)
-        answers["LTCLIM"] = self.ltclim_layer.generate_output(input_text)
-        return answers
+        return self._fan_out(lambda layer: layer.generate_output(input_text))
 
     def decode_output(self, output) -> str:
         """
@@ -281,8 +573,8 @@ class CLIM(CLIMInterface):
                 self.samt_layer,
                 self.ltclim_layer,
             ]:
-                if layer.name in output:
-                    answers += layer.decode_output(output[layer.name])
+                if output.get(layer.name.upper()) is not None:
+                    answers += layer.decode_output(output[layer.name.upper()])
             return answers
         return ""
 
@@ -302,21 +594,29 @@ class CLIM(CLIMInterface):
 
         :param prompt: The prompt for generating answers.
         :param options: The options for generating answers.
-        :return: The list of generated answers.
+        :return: The list of generated answers of all layers, in layer order.
         """
-        answers = ("\n").join(
-            [
-                layer.generate_answer_list(prompt=prompt, options=options)
-                for layer in [
-                    self.ethic_layer,
-                    self.individual_layer,
-                    self.samt_layer,
-                    self.ltclim_layer,
-                ]
-            ]
-        )
+        answers = [
+            answer
+            for layer_answers in self.generate_answer_list_by_layer(
+                prompt, options
+            ).values()
+            for answer in layer_answers or []
+        ]
         return answers
 
+    def generate_answer_list_by_layer(self, prompt, options=None) -> dict[str, list]:
+        """
+        Generates the answer lists of all layers concurrently.
+
+        :param prompt: The prompt for generating answers.
+        :param options: The options for generating answers.
+        :return: The answer lists by layer name, None for layers that failed or timed out.
+        """
+        return self._fan_out(
+            lambda layer: layer.generate_answer_list(prompt=prompt, options=options)
+        )
+
     def set_generation_parameters(self, max_length=None, max_new_tokens=None):
         """
         Sets the generation parameters for text generation.
@@ -0,0 +1,69 @@
+from ethos_ai.clim.decision import Decision
+from ethos_ai.clim.pipeline_stage import PipelineStage
+
+
+class CompiledPipeline:
+    """
+    A pipeline compiled from its definition into a sequence of stage groups.
+
+    A group with several stages runs its stages concurrently. After each group the
+    decisions of its stages select the transition: the end of the processing, another
+    pipeline, or by default the next group.
+    """
+
+    END = PipelineStage.END
+
+    def __init__(
+        self,
+        name: str,
+        groups: tuple[tuple[PipelineStage, ...], ...],
+        transitions: dict[Decision, str],
+    ):
+        self.name: str = name
+        self.groups: tuple[tuple[PipelineStage, ...], ...] = groups
+        self.transitions: dict[Decision, str] = transitions
+
+    @staticmethod
+    def from_definition(name: str, definition: dict) -> "CompiledPipeline":
+        """
+        Compiles a pipeline definition.
+
+        The stages are a list of stage definitions; an entry {"parallel": [...]} is a group
+        of stages that run concurrently. Transitions map Decision names to a target,
+        terminal_decisions lists the Decision names that end the processing.
+
+        :param name: The name of the pipeline.
+        :param definition: The pipeline definition with stages and transitions.
+        """
+        groups = []
+        for entry in definition["stages"]:
+            if "parallel" in entry:
+                groups.append(
+                    tuple(
+                        PipelineStage.from_definition(stage)
+                        for stage in entry["parallel"]
+                    )
+                )
+            else:
+                groups.append((PipelineStage.from_definition(entry),))
+        return CompiledPipeline(
+            name=name,
+            groups=tuple(groups),
+            transitions=PipelineStage.compile_transitions(definition),
+        )
+
+    def get_transition(self, stage: PipelineStage, decision: Decision) -> str:
+        """Returns the transition target of a stage decision, or None to continue."""
+        if decision is None:
+            return None
+        return stage.transitions.get(decision) or self.transitions.get(decision)
+
+    def count_stages_after(self, group_index: int) -> int:
+        """Returns the number of stages in the groups after the given group."""
+        return sum(len(group) for group in self.groups[group_index + 1 :])
+
+    def get_stages(self) -> list[PipelineStage]:
+        return [stage for group in self.groups for stage in group]
+
+    def __repr__(self):
+        return f"CompiledPipeline({self.name}, {len(self.groups)} groups)"
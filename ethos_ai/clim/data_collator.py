@@ -0,0 +1,29 @@
+import torch
+
+
+class DynamicPaddingCollator:
+    """
+    Collates token id sequences of different lengths into a padded training batch.
+
+    The batch is padded only to its longest sequence. Padding is masked out of the
+    attention and of the labels (-100), so the model never learns to predict padding.
+    """
+
+    IGNORE_INDEX = -100
+
+    def __init__(self, pad_token_id: int):
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, examples: list) -> dict:
+        longest = max(len(example) for example in examples)
+        input_ids = torch.full((len(examples), longest), self.pad_token_id)
+        attention_mask = torch.zeros((len(examples), longest), dtype=torch.long)
+        for row, example in enumerate(examples):
+            input_ids[row, : len(example)] = torch.as_tensor(example)
+            attention_mask[row, : len(example)] = 1
+        labels = input_ids.masked_fill(attention_mask == 0, self.IGNORE_INDEX)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": labels,
+        }
@@ -1,3 +1,4 @@
+import re
 from enum import Enum, auto
 from ethos_ai.util.translate import Translations
 
@@ -47,6 +48,47 @@ class Decision(Enum):
                 return decision
         return None
 
+    @classmethod
+    def get_pattern(cls):
+        """
+        Returns the compiled pattern matching any translated decision as a whole word.
+
+        The pattern is compiled once per set of translated names; longer names come first in
+        the alternation, so that no name matches as part of another (GO in NOGO).
+        """
+        names = tuple(decision.translated_name for decision in cls)
+        cached = getattr(cls, "_pattern_cache", None)
+        if cached is None or cached[0] != names:
+            alternatives = sorted(set(names), key=len, reverse=True)
+            pattern = re.compile(
+                r"(?<!\w)("
+                + "|".join(re.escape(name) for name in alternatives)
+                + r")(?!\w)",
+                re.IGNORECASE,
+            )
+            lookup = {}
+            for decision in cls:
+                lookup.setdefault(decision.translated_name.lower(), decision)
+            cached = (names, pattern, lookup)
+            cls._pattern_cache = cached
+        return cached[1], cached[2]
+
+    @classmethod
+    def parse(cls, text: str):
+        """
+        Returns the Decision found in the text, or None.
+
+        Decisions are matched as whole words in a single scan. If the text names several
+        decisions, the one declared first in the enum wins.
+        """
+        if not text:
+            return None
+        pattern, lookup = cls.get_pattern()
+        found = {lookup[match.lower()] for match in pattern.findall(text)}
+        if not found:
+            return None
+        return min(found, key=lambda decision: decision.value)
+
     @classmethod
     def parse_for_decision(cls, layer_name: str, text: str) -> dict[str, str]:
         """
@@ -57,17 +99,10 @@ class Decision(Enum):
         :param text: The text to parse for a decision.
         :return: A dictionary mapping the layer name to the found decision, or None if no decision is found.
         """
-        decision_dict = {}
-        text_lower = text.lower() if text else ""
-
-        # Iterate through all decisions and check if any are in the text
-        for decision in cls:
-            if decision.translated_name.lower() in text_lower:
-                decision_dict[layer_name] = decision.translated_name
-                return decision_dict
-
-        # Return None if no decision is found
-        return None
+        decision = cls.parse(text)
+        if decision is None:
+            return None
+        return {layer_name: decision.translated_name}
 
     def __str__(self):
         return self.name
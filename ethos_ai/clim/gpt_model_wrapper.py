@@ -1,23 +1,49 @@
+import asyncio
+import copy
 import gc
+import hashlib
 import os
-import shutil
 import threading
 import time
+import uuid
+from contextlib import contextmanager, nullcontext
 import torch
-from transformers import GPT2Tokenizer, GPT2LMHeadModel, AdamW
-from torch.utils.data import DataLoader
+from transformers import (
+    GPT2Tokenizer,
+    GPT2LMHeadModel,
+    AdamW,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
 from tqdm import tqdm
 import openai  # OpenAI API
 
+from ethos_ai.clim.async_chat_client import AsyncChatClient
+from ethos_ai.clim.async_clim_interface import AsyncCLIMInterface
+from ethos_ai.clim.checkpoint_store import CheckpointStore
 from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.layer_residency_manager import LayerResidencyManager
+from ethos_ai.clim.lora_adapter import LoRAAdapter
+from ethos_ai.clim.model_quantizer import ModelQuantizer
+from ethos_ai.clim.model_registry import ModelRegistry
+from ethos_ai.clim.prefix_cache import PrefixCache
+from ethos_ai.clim.response_cache import ResponseCache
 from ethos_ai.clim.text_data_set import TextDataset
+from ethos_ai.clim.tokenized_corpus_cache import TokenizedCorpusCache
+from ethos_ai.clim.training_job import TrainingJob
+from ethos_ai.clim.training_scheduler import TrainingScheduler
 from ethos_ai.clim.training_status import TrainingStatus
 from ethos_ai.individual.advisor import Advisor
+from ethos_ai.state.priority import Priority
 from ethos_ai.clim.clim_interface import CLIMInterface
 from ethos_ai.util.protocol import Protocol
 
 
-class GPTModelWrapper(CLIMInterface):
+class GPTModelWrapper(CLIMInterface, AsyncCLIMInterface):
+    # Precedes the decision in the training texts (see TrainListGenerator)
+    DECISION_CUE = "\nDecision:"
+
     def __init__(
         self,
         model_name: str = "gpt2",
@@ -25,11 +51,26 @@ class GPTModelWrapper(CLIMInterface):
         api_key: str = None,
         max_length: int = 50,
         max_new_tokens: int = None,
+        max_batch_size: int = 8,  # Maximum number of prompts per generate call
         api_model: str = "gpt-3.5-turbo",  # OpenAI API model (e.g., GPT-4, gpt-3.5-turbo)
         model_directory: str = "./models",  # Directory for personalized models
         life_name: str = "LIFE1",  # Default life entity (LIFE1, LIFE2, etc.)
         gptwrapper_name: str = "INDIVIDUAL",  # GPTWrapper for specific aspect (ETHIC, etc.)
         start_model: bool = True,  # Start the model on initialization
+        training_mode: str = "adapter",  # "adapter" (LoRA on frozen base) or "full"
+        adapter_rank: int = 8,  # Rank of the low-rank adapter matrices
+        adapter_alpha: float = 16,  # Scaling of the adapter delta (alpha / rank)
+        response_cache_size: int = 1024,  # Cached responses of local generation, 0 disables
+        response_cache_ttl: float = None,  # Time to live of cached responses in seconds
+        persist_response_cache: bool = False,  # Save the response cache next to the model
+        api_base: str = "https://api.openai.com/v1",  # Base URL of the async API client
+        api_max_concurrency: int = 8,  # Concurrent async API requests
+        api_max_retries: int = 3,  # Retries of throttled or failed async API requests
+        api_requests_per_second: float = None,  # Rate limit of the async API requests
+        inference_mode: str = "default",  # "default" (fp32) or "quantized" (int8 on CPU)
+        inference_threads: int = None,  # Intra-op threads pinned for the local model
+        lazy_loading: bool = False,  # Load the local model on first use instead of on start
+        checkpoint_retention: int = 3,  # Saved checkpoint versions kept in the model path
     ):
         self.protocol = Protocol()
         self._model_name: str = model_name
@@ -37,15 +78,39 @@ class GPTModelWrapper(CLIMInterface):
         self._api_key: str = api_key
         self._max_length: int = max_length
         self._max_new_tokens: int = max_new_tokens
+        self._max_batch_size: int = max_batch_size
         self._api_model: str = api_model
         self._model_directory: str = model_directory
         self._life_name: str = life_name
         self._gptwrapper_name: str = gptwrapper_name
         self._start_model: bool = start_model
+        self._training_mode: str = training_mode
+        self._adapter_rank: int = adapter_rank
+        self._adapter_alpha: float = adapter_alpha
         self._status: TrainingStatus = TrainingStatus.NONE
         self._cancel_requested: bool = False
         self._changed: bool = False
+        self._training_progress: float = 0.0
+        # Optional scheduler that queues the training runs, else each run gets its own thread
+        self._training_scheduler: TrainingScheduler = None
+        self._training_job: TrainingJob = None
+        # Set while no training is pending or running
+        self._training_done: threading.Event = threading.Event()
+        self._training_done.set()
+        self._training_progress_callbacks: list = []
         self._model = None
+        # Registry key of the shared base model, None if the model is private
+        self._shared_model_key: str = None
+        self._base_model_name: str = None
+        self._adapter: LoRAAdapter = None
+        self._model_version: int = 0
+        # Identity of the weights, stable across restarts for weights loaded from disk
+        self._weights_id: str = None
+        self._prefix_cache: PrefixCache = PrefixCache()
+        # Token ids of training corpora, shared by all layers of the model directory
+        self._corpus_cache: TokenizedCorpusCache = TokenizedCorpusCache(
+            os.path.join(self._model_directory, "corpus_cache")
+        )
 
         # Check for personalized finetuned model and load it
         self.model_path = os.path.join(
@@ -56,48 +121,98 @@ class GPTModelWrapper(CLIMInterface):
         )
         if not os.path.exists(self.model_path):
             os.makedirs(self.model_path)
+        # Versioned checkpoints of the finetuned model or adapter in the model path
+        self._checkpoint_store: CheckpointStore = CheckpointStore(
+            self.model_path, retention=checkpoint_retention
+        )
+
+        self._response_cache: ResponseCache = None
+        if response_cache_size > 0:
+            self._response_cache = ResponseCache(
+                max_entries=response_cache_size,
+                ttl=response_cache_ttl,
+                persist_path=(
+                    os.path.join(
+                        os.path.dirname(self.model_path), "response_cache.json"
+                    )
+                    if persist_response_cache
+                    else None
+                ),
+            )
+
+        self._inference_mode: str = inference_mode
+        self._inference_threads: int = inference_threads
+        # The int8 copy used for generation in the quantized inference mode
+        self._inference_model = None
+        self._quantization_lock = threading.Lock()
+        self._lazy_loading: bool = lazy_loading
+        # Optional manager that unloads idle layers and keeps the loaded models within a budget
+        self._residency_manager: LayerResidencyManager = None
+        self._load_lock = threading.RLock()
+        self._residency_lock = threading.RLock()
+        self._in_use_count: int = 0
+        self._last_used: float = time.monotonic()
+        # Created on the first async API call
+        self._async_chat_client: AsyncChatClient = None
+        self._api_base: str = api_base
+        self._api_max_concurrency: int = api_max_concurrency
+        self._api_max_retries: int = api_max_retries
+        self._api_requests_per_second: float = api_requests_per_second
 
         if self._start_model:
             self._start()
 
-    def _train_model(self, training_data, epochs=3, batch_size=2, learning_rate=5e-5):
-        """Internal method to handle the actual training logic in a separate thread."""
-        self._status = TrainingStatus.STARTED
-        self.protocol.info(
-            f"Training of {self._life_name}-{self._gptwrapper_name}: Initializing training process."
-        )
+    def _prepare_training(self):
+        """Prepare the model for training and return the device and the parameters to optimize."""
+        with self._load_lock:
+            if self._model is None:
+                # Lazy layers and the int8 copy of the quantized inference mode load the weights now
+                self._load_weights()
+        if self._training_mode == "adapter":
+            # Only the low-rank adapter is trained, the (shared) base model stays frozen in eval mode
+            if self._adapter is None:
+                self._adapter = LoRAAdapter(
+                    self._model,
+                    self.get_name(),
+                    rank=self._adapter_rank,
+                    alpha=self._adapter_alpha,
+                )
+            for name, parameter in self._model.named_parameters():
+                if ".lora_" not in name:
+                    parameter.requires_grad_(False)
+            device = next(self._model.parameters()).device
+            return device, list(self._adapter.parameters())
 
+        # Full fine-tuning changes all weights, it must not touch a shared base model
+        self._ensure_private_model()
         # Check if CUDA is available and move the model to GPU if available
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self._model.to(device)
-        self.protocol.info(
-            f"Training of {self._life_name}-{self._gptwrapper_name}: Model moved to {device}."
-        )
-
-        # Prepare the dataset
-        train_dataset = TextDataset(training_data, self.tokenizer)
-        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
-
-        # Define optimizer
-        optimizer = AdamW(self._model.parameters(), lr=learning_rate)
-
-        # Training loop
         self._model.train()
-        self.protocol.info(
-            f"Training of {self._life_name}-{self._gptwrapper_name}: Starting training loop."
-        )
+        return device, list(self._model.parameters())
+
+    def _train_model(
+        self, training_data, epochs=3, batch_size=2, learning_rate=5e-5, job=None
+    ):
+        """Internal method to handle the actual training logic in a separate thread."""
+        if self._cancel_requested:
+            self._finish_training(TrainingStatus.STOPPED)
+            return
+        self._status = TrainingStatus.STARTED
+        self._training_progress = 0.0
         try:
-            self._training_loop(train_loader, optimizer, device, epochs)
-            self._changed = True
+            self._run_training(training_data, epochs, batch_size, learning_rate, job)
         except Exception as e:
             self.protocol.error(
                 f"Training of {self._life_name}-{self._gptwrapper_name} failed: {str(e)}"
             )
-            self._status = TrainingStatus.FAILED
+            self._finish_training(TrainingStatus.FAILED)
+            if job is not None:
+                # The training scheduler records the failure of its job
+                raise
             return
 
         if not self._cancel_requested:
-            self._status = TrainingStatus.STOPPED
             self.protocol.info(
                 f"Training of {self._life_name}-{self._gptwrapper_name} completed."
             )
@@ -105,60 +220,214 @@ class GPTModelWrapper(CLIMInterface):
             self.protocol.info(
                 f"Training of {self._life_name}-{self._gptwrapper_name} was canceled."
             )
-            self._status = TrainingStatus.STOPPED
+        self._finish_training(TrainingStatus.STOPPED)
+
+    def _run_training(self, training_data, epochs, batch_size, learning_rate, job):
+        self.protocol.info(
+            f"Training of {self._life_name}-{self._gptwrapper_name}: Initializing {self._training_mode} training process."
+        )
+        device, parameters = self._prepare_training()
+        self.protocol.info(
+            f"Training of {self._life_name}-{self._gptwrapper_name}: Training {sum(p.numel() for p in parameters)} parameters on {device}."
+        )
 
-    def _training_loop(self, train_loader, optimizer, device, epochs):
+        # Prepare the dataset
+        train_dataset = TextDataset(
+            training_data, self.tokenizer, corpus_cache=self._corpus_cache
+        )
+        train_loader = train_dataset.create_data_loader(batch_size, shuffle=True)
+
+        # Define optimizer
+        optimizer = AdamW(parameters, lr=learning_rate)
+
+        # Training loop
+        self.protocol.info(
+            f"Training of {self._life_name}-{self._gptwrapper_name}: Starting training loop."
+        )
+        try:
+            with self._activated(training=True):
+                self._training_loop(
+                    train_loader, optimizer, parameters, device, epochs, job
+                )
+            self._changed = True
+            self._weights_changed()
+        finally:
+            self._model.eval()
+
+    def _finish_training(self, status: TrainingStatus):
+        """Sets the final training status, signals the completion and notifies the callbacks."""
+        self._status = status
+        self._training_done.set()
+        self._notify_training_progress()
+
+    def _notify_training_progress(self, **details):
+        progress = dict(self.get_training_progress(), **details)
+        for callback in list(self._training_progress_callbacks):
+            try:
+                callback(self.get_name(), progress)
+            except Exception as e:
+                self.protocol.error(
+                    f"Training progress callback of {self.get_name()} failed: {str(e)}"
+                )
+
+    def _training_loop(
+        self, train_loader, optimizer, parameters, device, epochs, job=None
+    ):
+        total_steps = max(1, epochs * len(train_loader))
         for epoch in range(epochs):
             if self._cancel_requested:
                 self._status = TrainingStatus.CANCELLATION_IS_REQUESTED
                 break
             epoch_loss = 0
             progress_bar = tqdm(train_loader, desc=f"Epoch {epoch+1}")
-            for batch in progress_bar:
-                batch = batch.to(device)
-                outputs = self._model(batch, labels=batch)
+            for step, batch in enumerate(progress_bar):
+                batch = {key: value.to(device) for key, value in batch.items()}
+                outputs = self._model(**batch)
                 loss = outputs.loss
                 loss.backward()
 
                 # Clip the gradients for stable training
-                torch.nn.utils.clip_grad_norm_(self._model.parameters(), max_norm=1.0)
+                torch.nn.utils.clip_grad_norm_(parameters, max_norm=1.0)
 
                 optimizer.step()
                 optimizer.zero_grad()
 
                 epoch_loss += loss.item()
                 progress_bar.set_postfix({"loss": loss.item()})
+                self._training_progress = (
+                    epoch * len(train_loader) + step + 1
+                ) / total_steps
+                if job is not None:
+                    job.report_progress(self._training_progress)
             self.protocol.info(
                 f"Training of {self._life_name}-{self._gptwrapper_name}: Epoch {epoch+1} completed with average loss: {epoch_loss / len(train_loader)}"
             )
+            self._notify_training_progress(
+                epoch=epoch + 1, epochs=epochs, loss=epoch_loss / len(train_loader)
+            )
 
     def _create_model(self, model_name):
-        """Load base GPT-2 model if no finetuned model exists"""
+        """Use the shared base GPT-2 model if no finetuned model exists"""
         self.protocol.info(
             f"Creating model for {self._life_name}-{self._gptwrapper_name}."
         )
         self.tokenizer = GPT2Tokenizer.from_pretrained(model_name)
-        self._model = GPT2LMHeadModel.from_pretrained(model_name)
+        self._shared_model_key, self._model = ModelRegistry.acquire(model_name)
+        self._base_model_name = model_name
         self.protocol.info(
             f"Base model loaded for {self._life_name}-{self._gptwrapper_name}."
         )
         self._changed = False
+        self._weights_changed(model_name)
         return True
 
-        # Work Fix for model lib bug: Save a model to a path, while a model is already saved to this path, fails
-        # Work Fix:
-        #           Save the current model to the backup path, and when loading the model again overwrite the model
-        #           path with the backup model path and then load from model path.
+    def _load_weights(self):
+        """Load the current checkpoint, a finetuned adapter or model, else the shared base model."""
+        try:
+            version_path = self._checkpoint_store.get_current()
+            if version_path is not None:
+                self._load_checkpoint(version_path)
+                return
+            if LoRAAdapter.exists(self.model_path):
+                self._load_adapter_model(self.model_path)
+                return
+            if os.listdir(self.model_path):
+                self._load_model(self.model_path)
+                return
+        except Exception as e:
+            self.protocol.error(f"Error loading model: {str(e)}")
+        self._create_model(self._model_name)
 
-    def _work_fix_overwite_model_with_backup_model_and_then_loadbecause_save_model_bug(
-        self, model_path
-    ):
-        """Work Fix: Save the current model to a specified path, when a model is already saved to this path.
+    def _get_weights_sources(self) -> tuple:
+        """Return the sources `_load_weights` would load the weights from, without loading them."""
+        version_path = self._checkpoint_store.get_current()
+        if version_path is not None:
+            manifest = CheckpointStore.read_manifest(version_path)
+            if manifest["kind"] == CheckpointStore.ADAPTER:
+                return (
+                    manifest["config"].get("base_model", self._model_name),
+                    version_path,
+                )
+            return (version_path,)
+        if LoRAAdapter.exists(self.model_path):
+            base_model_name = LoRAAdapter.load_config(self.model_path).get(
+                "base_model", self._model_name
+            )
+            return (base_model_name, self.model_path)
+        if os.listdir(self.model_path):
+            return (self.model_path,)
+        return (self._model_name,)
+
+    def _load_quantized_model(self) -> bool:
+        """Load the cached int8 copy of the weights on disk, if it is up to date."""
+        try:
+            sources = self._get_weights_sources()
+            model = ModelQuantizer.load(
+                ModelQuantizer.get_path(self.model_path),
+                GPTModelWrapper._fingerprint(*sources),
+            )
+            if model is None:
+                return False
+            self.tokenizer = GPT2Tokenizer.from_pretrained(sources[0])
+            self._changed = False
+            self._weights_changed(*sources)
+            self._inference_model = model
+            self.protocol.info(
+                f"Quantized model of {self._life_name}-{self._gptwrapper_name} loaded."
+            )
+            return True
+        except Exception as e:
+            self.protocol.error(f"Error loading quantized model: {str(e)}")
+            return False
+
+    def _quantize_model(self):
+        """Build the int8 copy of the current weights used for generation.
 
-        1. Saving is done to a backup path.
-        2. Before loading the existing model check for backup path, and if so, overwrite the existing model with the backup model.
-        3. Then load the model.
+        The copy of unchanged weights is cached next to the model path, and the fp32 model is
+        released; it is loaded again for training.
         """
+        with self._quantization_lock:
+            if self._inference_model is not None:
+                return
+            self.protocol.info(
+                f"Quantizing model of {self._life_name}-{self._gptwrapper_name}."
+            )
+            adapter_name = self._adapter.name if self._adapter is not None else None
+            if self._shared_model_key is not None:
+                model = ModelRegistry.copy_model(self._shared_model_key, adapter_name)
+            else:
+                model = LoRAAdapter.unwrap(
+                    copy.deepcopy(self._model), merge_name=adapter_name
+                )
+            model = ModelQuantizer.quantize(model)
+            # States computed with the fp32 weights do not apply to the int8 copy
+            self._model_version += 1
+            self._prefix_cache.invalidate(self.get_name(), self._model_version)
+            self._inference_model = model
+            if self._changed or not self._training_done.is_set():
+                return
+            try:
+                ModelQuantizer.save(
+                    ModelQuantizer.get_path(self.model_path), model, self._weights_id
+                )
+            except Exception as e:
+                self.protocol.error(f"Error saving quantized model: {str(e)}")
+            self._release_model(keep_inference_model=True)
+
+    def _get_generation_model(self):
+        """Return the model used for generation: the int8 copy in the quantized inference mode."""
+        if self._inference_mode == "quantized" and not self._use_api:
+            if self._inference_model is None:
+                self._quantize_model()
+            return self._inference_model
+        return self._model
+
+    def _inference(self):
+        """Return the context of the generation calls of this thread."""
+        if self._inference_mode == "quantized":
+            # The int8 copy has the adapter merged and is never trained
+            return torch.inference_mode()
+        return self._activated()
 
     def _load_model(self, model_path):
         """Load a model from a specified path."""
@@ -168,73 +437,248 @@ class GPTModelWrapper(CLIMInterface):
         )
         self.tokenizer = GPT2Tokenizer.from_pretrained(self.model_path)
         self._model = GPT2LMHeadModel.from_pretrained(self.model_path)
+        self._base_model_name = self.model_path
         self.protocol.info(
             f"Finetuned model of {self._life_name}-{self._gptwrapper_name} loaded from {self.model_path}."
         )
         self._changed = False
+        self._weights_changed(self.model_path)
         return True
 
+    def _load_adapter_model(self, model_path):
+        """Load the adapter saved in the specified path on top of the shared base model."""
+        self.model_path = model_path
+        self.protocol.info(
+            f"Loading adapter of {self._life_name}-{self._gptwrapper_name} from {self.model_path}."
+        )
+        base_model_name = LoRAAdapter.load_config(model_path).get(
+            "base_model", self._model_name
+        )
+        self.tokenizer = GPT2Tokenizer.from_pretrained(base_model_name)
+        self._shared_model_key, self._model = ModelRegistry.acquire(base_model_name)
+        self._base_model_name = base_model_name
+        self._adapter = LoRAAdapter.load(self._model, self.get_name(), model_path)
+        self.protocol.info(
+            f"Adapter of {self._life_name}-{self._gptwrapper_name} loaded on shared base model {self._shared_model_key}."
+        )
+        self._changed = False
+        self._weights_changed(base_model_name, model_path)
+        return True
+
+    def _load_checkpoint(self, version_path):
+        """Load a checkpoint version: an adapter on the shared base model, or a full model mapped from disk."""
+        self.protocol.info(
+            f"Loading checkpoint of {self._life_name}-{self._gptwrapper_name} from {version_path}."
+        )
+        manifest = CheckpointStore.read_manifest(version_path)
+        if manifest["kind"] == CheckpointStore.ADAPTER:
+            base_model_name = manifest["config"].get("base_model", self._model_name)
+            self.tokenizer = GPT2Tokenizer.from_pretrained(base_model_name)
+            self._shared_model_key, self._model = ModelRegistry.acquire(base_model_name)
+            self._base_model_name = base_model_name
+            self._adapter = LoRAAdapter.create(
+                self._model,
+                self.get_name(),
+                manifest["config"],
+                CheckpointStore.load_tensors(version_path),
+            )
+            sources = (base_model_name, version_path)
+        else:
+            self.tokenizer = GPT2Tokenizer.from_pretrained(version_path)
+            self._model = CheckpointStore.load_model(version_path)
+            self._base_model_name = version_path
+            sources = (version_path,)
+        self.protocol.info(
+            f"Checkpoint of {self._life_name}-{self._gptwrapper_name} loaded from {version_path}."
+        )
+        self._changed = False
+        self._weights_changed(*sources)
+        return True
+
+    def _release_model(self, keep_inference_model: bool = False):
+        """Detach the adapter and release the (shared) model."""
+        if not keep_inference_model:
+            self._inference_model = None
+        if self._adapter is not None:
+            self._adapter.remove()
+            self._adapter = None
+        if self._shared_model_key is not None:
+            ModelRegistry.release(self._shared_model_key)
+            self._shared_model_key = None
+        del self._model
+        self._model = None
+
+    def _ensure_private_model(self):
+        """Replace a shared base model by a private copy with the adapter merged into it."""
+        if self._shared_model_key is None:
+            return
+        self.protocol.info(
+            f"Copying shared base model {self._shared_model_key} for {self._life_name}-{self._gptwrapper_name}."
+        )
+        adapter_name = self._adapter.name if self._adapter is not None else None
+        model = ModelRegistry.make_private(self._shared_model_key, adapter_name)
+        self._shared_model_key = None
+        # The private weights exist only in memory until they are saved
+        self._base_model_name = None
+        if self._adapter is not None:
+            self._adapter.remove()
+            self._adapter = None
+        self._model = model
+
+    def _activated(self, training: bool = False):
+        """Return a context in which the model calls of this thread use the adapter of this layer."""
+        if self._adapter is not None:
+            return self._adapter.activate(training)
+        return nullcontext()
+
     def _save_model(self, model_path):
-        """Save the current model to a specified path."""
+        """Save the current model as a new checkpoint version (only the adapter if it has one)."""
+        if self._model is None:
+            # Only the int8 copy of the unchanged weights on disk is loaded
+            self.protocol.info(
+                f"{self._life_name}-{self._gptwrapper_name} has no changed weights, nothing to save."
+            )
+            return True
         self.protocol.info(
             f"Saving finetuned model of {self._life_name}-{self._gptwrapper_name} to {model_path}."
         )
-        self._model.save_pretrained(model_path)
-        self.tokenizer.save_pretrained(model_path)
+        if self._adapter is not None and self._base_model_name is None:
+            # The base of the adapter is not on disk, save the merged model instead
+            LoRAAdapter.unwrap(self._model, merge_name=self._adapter.name)
+            self._adapter = None
+        store = (
+            self._checkpoint_store
+            if model_path == self.model_path
+            else CheckpointStore(model_path, retention=self._checkpoint_store.retention)
+        )
+        version_path = None
+        if self._adapter is not None:
+            version_path = store.save(
+                self._adapter.state_dict(),
+                CheckpointStore.ADAPTER,
+                config=dict(
+                    self._adapter.get_config(), base_model=self._base_model_name
+                ),
+            )
+        elif self._shared_model_key is not None:
+            self.protocol.info(
+                f"{self._life_name}-{self._gptwrapper_name} uses the unchanged shared base model, nothing to save."
+            )
+        else:
+
+            def save_files(path):
+                self._model.config.save_pretrained(path)
+                self.tokenizer.save_pretrained(path)
+
+            version_path = store.save(
+                self._model.state_dict(), CheckpointStore.FULL, save_files=save_files
+            )
+            self._base_model_name = version_path
         self.protocol.info(
             f"Finetuned model of {self._life_name}-{self._gptwrapper_name} saved to {model_path}."
         )
         self._changed = False
+        sources = (self._base_model_name,)
+        if self._adapter is not None:
+            sources = (self._base_model_name, version_path)
+        if self._response_cache is not None:
+            # Saving does not change the weights, the cached responses stay valid
+            self._response_cache.rebind(
+                self._weights_id, GPTModelWrapper._fingerprint(*sources)
+            )
+        # Saving does not change the weights, the int8 copy stays valid as well
+        inference_model = self._inference_model
+        self._weights_changed(*sources)
+        self._inference_model = inference_model
+        if self._response_cache is not None:
+            self._response_cache.save()
         return True
 
     def get_name(self) -> str:
         return f"{self._life_name}-{self._gptwrapper_name}-{self._model_name}"
 
+    def get_model_version(self) -> int:
+        """Return the version of the model weights, which changes whenever they are swapped or changed."""
+        return self._model_version
+
+    def get_weights_id(self) -> str:
+        """Return the identity of the model weights, which is the same after a restart for weights loaded from disk."""
+        return self._weights_id
+
+    def _weights_changed(self, *sources: str):
+        """
+        Bump the model version and drop all state computed with older weights.
+
+        :param sources: The model names or directories the weights were loaded from or saved to.
+            Without sources the weights exist only in memory (e.g. after training).
+        """
+        self._model_version += 1
+        self._weights_id = (
+            GPTModelWrapper._fingerprint(*sources) if sources else uuid.uuid4().hex
+        )
+        self._prefix_cache.invalidate(self.get_name(), self._model_version)
+        if self._response_cache is not None:
+            self._response_cache.invalidate(self._weights_id)
+        self._inference_model = None
+
+    @staticmethod
+    def _fingerprint(*sources: str) -> str:
+        """Return a hash of the model names and of the files (names, sizes, times) of model directories."""
+        fingerprint = hashlib.sha256()
+        for source in sources:
+            fingerprint.update(str(source).encode())
+            if source and os.path.isdir(source):
+                for root, _, files in sorted(os.walk(source)):
+                    for filename in sorted(files):
+                        stat = os.stat(os.path.join(root, filename))
+                        fingerprint.update(
+                            f"{filename}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+                        )
+        return fingerprint.hexdigest()
+
+    def _get_response_cache_key(self, input_text: str) -> str:
+        return ResponseCache.create_key(
+            self.get_name(),
+            input_text,
+            {
+                "max_length": self._max_length,
+                "max_new_tokens": self._max_new_tokens,
+                "inference_mode": self._inference_mode,
+            },
+        )
+
+    def get_response_cache_statistics(self) -> dict:
+        """Return the entries, hits, misses, evictions and hit rate of the response cache."""
+        if self._response_cache is None:
+            return None
+        return self._response_cache.get_statistics()
+
     def persist_model(self):
-        """Persist the model to the disk."""
-        try:
-            # Attempt to save the model to the main path
-            return self._save_model(self.model_path)
-        except Exception as e:
-            # Check if the model path is not empty
-            if os.path.exists(self.model_path) and os.listdir(self.model_path):
-                # Workaround for the model library bug:
-                # Saving a model to a path where a model already exists fails.
-                # Workaround steps:
-                # - Save the current model to a backup path.
-                # - Remove the original model path.
-                # - Rename the backup path to the original model path.
-
-                # Backup path for the model
-                model_path_backup = self.model_path + "_backup_" + str(time.time())
-
-                # Ensure backup directory exists before proceeding
-                if not os.path.exists(model_path_backup):
-                    os.makedirs(model_path_backup)
-
-                # Save the model to the backup path
-                success = self._save_model(model_path_backup)
-
-                if success:
-                    # If backup is successful, replace the model path with the backup
-                    if os.path.exists(self.model_path):
-                        # Remove the old model directory
-                        shutil.rmtree(self.model_path)
-
-                    # Move the backup model to the original model path
-                    os.rename(model_path_backup, self.model_path)
-                    self.protocol.info(
-                        f"Model {model_path_backup} renamed successfully to {self.model_path}."
-                    )
+        """Persist the model to the disk as a new checkpoint version.
+
+        The previous version stays current until the new version is completely written, a
+        failed save leaves it untouched.
+        """
+        return self._save_model(self.model_path)
 
-                    return success
-            # If the directory wasn't found or another error occurred, re-raise the exception
-            raise e
+    def set_training_scheduler(self, training_scheduler: TrainingScheduler):
+        """Sets the scheduler that queues the training runs of this model."""
+        self._training_scheduler = training_scheduler
 
     def start_training_async(
-        self, training_data, epochs=3, batch_size=2, learning_rate=5e-5
+        self,
+        training_data,
+        epochs=3,
+        batch_size=2,
+        learning_rate=5e-5,
+        priority: Priority = Priority.NORMAL,
     ):
-        """Start the training process in a separate thread."""
+        """
+        Start the training process in a separate thread.
+
+        With a training scheduler the training is queued by priority and runs once the
+        scheduler has a free slot, otherwise it starts in its own thread right away.
+        """
         if (
             self._status == TrainingStatus.STARTED
             or self._status == TrainingStatus.PENDING
@@ -243,12 +687,24 @@ class GPTModelWrapper(CLIMInterface):
             return
 
         self._cancel_requested = False
-        self.training_thread = threading.Thread(
-            target=self._train_model,
-            args=(training_data, epochs, batch_size, learning_rate),
-        )
-        self.training_thread.start()
+        self._training_progress = 0.0
         self._status = TrainingStatus.PENDING
+        self._training_done.clear()
+        if self._training_scheduler is not None:
+            self._training_job = self._training_scheduler.submit(
+                self.get_name(),
+                lambda job: self._train_model(
+                    training_data, epochs, batch_size, learning_rate, job
+                ),
+                priority,
+            )
+        else:
+            self._training_job = None
+            self.training_thread = threading.Thread(
+                target=self._train_model,
+                args=(training_data, epochs, batch_size, learning_rate),
+            )
+            self.training_thread.start()
         self.protocol.info(
             f"Training started for {self._life_name}-{self._gptwrapper_name}."
         )
@@ -260,6 +716,10 @@ class GPTModelWrapper(CLIMInterface):
             or self._status == TrainingStatus.PENDING
         ):
             self._cancel_requested = True
+            if self._training_job is not None and self._training_scheduler.cancel(
+                self._training_job
+            ):
+                self._finish_training(TrainingStatus.STOPPED)
             self.protocol.info(
                 f"Cancellation requested for {self._life_name}-{self._gptwrapper_name}."
             )
@@ -272,16 +732,69 @@ class GPTModelWrapper(CLIMInterface):
         """Return the current status of the training process."""
         return self._status
 
+    def get_training_progress(self) -> dict:
+        """
+        Return the status of the training process with its queue position and progress.
+
+        :return: A dict with the status, the 1-based queue position (0 if not queued)
+            and the progress as a fraction between 0 and 1.
+        """
+        queue_position = 0
+        if self._training_job is not None:
+            queue_position = self._training_scheduler.get_queue_position(
+                self._training_job
+            )
+        return {
+            "status": self._status,
+            "queue_position": queue_position,
+            "progress": self._training_progress,
+        }
+
+    def add_training_progress_callback(self, callback):
+        """
+        Registers a callback for the training progress.
+
+        The callback is called with the model name and the progress dict (see
+        get_training_progress) after every epoch, with epoch, epochs and average loss added,
+        and once more when the training has finished.
+        """
+        self._training_progress_callbacks.append(callback)
+
+    def remove_training_progress_callback(self, callback):
+        if callback in self._training_progress_callbacks:
+            self._training_progress_callbacks.remove(callback)
+
+    def wait_for_training(
+        self, timeout: float = None, stop_event: threading.Event = None
+    ) -> bool:
+        """
+        Blocks until no training is pending or running anymore.
+
+        :param timeout: The maximum time to wait in seconds, None waits without limit.
+        :param stop_event: Optional event that interrupts the wait when set.
+        :return: True if the training has finished, False on timeout or stop.
+        """
+        if stop_event is None:
+            return self._training_done.wait(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not stop_event.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return self._training_done.is_set()
+            if self._training_done.wait(wait):
+                return True
+        return self._training_done.is_set()
+
     def _start(self):
         if not self._use_api:
-            # Try to load a finetuned model
-            try:
-                if os.listdir(self.model_path):
-                    self._load_model(self.model_path)
-                    return
-            except Exception as e:
-                self.protocol.error(f"Error loading model: {str(e)}")
-            self._create_model(self._model_name)
+            if self._lazy_loading:
+                # Known without loading, so that cached responses are served right away
+                self._weights_id = GPTModelWrapper._fingerprint(
+                    *self._get_weights_sources()
+                )
+                return
+            self._load()
+            self._notify_loaded()
             return
         else:
             if self._api_key is None:
@@ -289,10 +802,123 @@ class GPTModelWrapper(CLIMInterface):
             openai.api_key = self._api_key
             self._model_name = self._model_name
 
+    def _load(self):
+        """Load the local model (its int8 copy in the quantized inference mode)."""
+        with self._load_lock:
+            if self._inference_threads:
+                torch.set_num_threads(self._inference_threads)
+            if self._inference_mode == "quantized":
+                if not self._load_quantized_model():
+                    self._load_weights()
+                    self._quantize_model()
+            else:
+                self._load_weights()
+            self._last_used = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._use_api or self.is_loaded():
+            return
+        with self._load_lock:
+            if self.is_loaded():
+                return
+            self.protocol.info(
+                f"Loading {self._life_name}-{self._gptwrapper_name} model on first use."
+            )
+            self._load()
+        # Outside the load lock, the manager may unload other layers
+        self._notify_loaded()
+
+    def _notify_loaded(self):
+        if self._residency_manager is not None:
+            self._residency_manager.on_loaded(self)
+
+    @contextmanager
+    def _in_use(self):
+        """Load the model if needed and keep it loaded while the context is active."""
+        with self._residency_lock:
+            self._in_use_count += 1
+            self._last_used = time.monotonic()
+        try:
+            self._ensure_loaded()
+            yield
+        finally:
+            with self._residency_lock:
+                self._in_use_count -= 1
+                self._last_used = time.monotonic()
+
+    def set_residency_manager(self, residency_manager: LayerResidencyManager):
+        """Set the manager that unloads this layer when idle or over the memory budget."""
+        if self._residency_manager is not None:
+            self._residency_manager.unregister(self)
+        self._residency_manager = residency_manager
+        if residency_manager is not None:
+            residency_manager.register(self)
+
+    def is_loaded(self) -> bool:
+        return self._model is not None or self._inference_model is not None
+
+    def is_idle(self) -> bool:
+        """Return True if the model is neither generating nor training."""
+        with self._residency_lock:
+            return self._in_use_count == 0 and self._training_done.is_set()
+
+    def get_last_used(self) -> float:
+        """Return the time (time.monotonic) the model was last used."""
+        return self._last_used
+
+    def get_memory_footprint(self) -> dict[str, int]:
+        """Return the bytes of the loaded models by identity; shared models have the registry key."""
+        footprint = {}
+        for model in (self._model, self._inference_model):
+            if model is None:
+                continue
+            identity = (
+                self._shared_model_key
+                if model is self._model and self._shared_model_key is not None
+                else f"{self.get_name()}:{id(model)}"
+            )
+            footprint[identity] = sum(
+                GPTModelWrapper._tensor_bytes(value)
+                for value in model.state_dict().values()
+            )
+        if self._adapter is not None:
+            footprint[f"{self.get_name()}:adapter"] = sum(
+                parameter.numel() * parameter.element_size()
+                for parameter in self._adapter.parameters()
+            )
+        return footprint
+
+    @staticmethod
+    def _tensor_bytes(value) -> int:
+        # Quantized modules keep their packed weights in tuples
+        if isinstance(value, (tuple, list)):
+            return sum(GPTModelWrapper._tensor_bytes(item) for item in value)
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        return 0
+
+    def unload(self) -> bool:
+        """Persist changed weights and release the model until its next use.
+
+        :return: False if the model is in use (generating or training) and stays loaded.
+        """
+        # Users wait for the release (residency lock) and then load the model again
+        with self._load_lock, self._residency_lock:
+            if not self.is_loaded() or not self.is_idle():
+                return False
+            self.protocol.info(
+                f"Unloading {self._life_name}-{self._gptwrapper_name} model."
+            )
+            if self._changed:
+                self.persist_model()
+            self._release_model()
+            gc.collect()
+            return True
+
     def start(self):
         """Start the model."""
         self.protocol.info(f"Starting {self._life_name}-{self._gptwrapper_name} model.")
-        if self._model is not None:
+        if self._model is not None or self._inference_model is not None:
             self.stop()
         self._start()
         self.protocol.info(f"{self._life_name}-{self._gptwrapper_name} model started.")
@@ -305,8 +931,12 @@ class GPTModelWrapper(CLIMInterface):
                 self.persist_model()
             except Exception as e:
                 self.protocol.error(f"Error saving model: {str(e)}")
-        del self._model
-        self._model = None
+        if self._response_cache is not None:
+            try:
+                self._response_cache.save()
+            except Exception as e:
+                self.protocol.error(f"Error saving response cache: {str(e)}")
+        self._release_model()
         gc.collect()
         self.protocol.info(f"{self._life_name}-{self._gptwrapper_name} model stopped.")
 
@@ -315,7 +945,7 @@ class GPTModelWrapper(CLIMInterface):
         self.protocol.info(
             f"Restarting {self._life_name}-{self._gptwrapper_name} model."
         )
-        if self._model is not None:
+        if self._model is not None or self._inference_model is not None:
             self.stop()
         self._start()
         self.protocol.info(
@@ -334,6 +964,9 @@ class GPTModelWrapper(CLIMInterface):
         )
         raise NotImplementedError
 
+    async def aprocess(self, type: str, input_data: CLIMData) -> CLIMData:
+        return self.process(type, input_data)
+
     def decode_output(self, output) -> str:
         if not self._use_api:
             return self.tokenizer.decode(output[0], skip_special_tokens=True)
@@ -341,21 +974,70 @@ class GPTModelWrapper(CLIMInterface):
             # Decode output from OpenAI API
             return output["choices"][0]["message"]["content"].strip()
 
-    def generate_output(self, input_text):
+    def _generation_length_kwargs(self, input_length: int) -> dict:
+        """Return the length arguments for `generate` for inputs of the given token length."""
+        if self._max_new_tokens:
+            return {"max_new_tokens": self._max_new_tokens}
+        max_length = self._max_length if self._max_length > 0 else input_length + 50
+        return {"max_length": max_length}
+
+    def _generation_budget(self, input_length: int) -> int:
+        """Return the number of new tokens `generate` may add to an input of the given length."""
+        if self._max_new_tokens:
+            return self._max_new_tokens
+        if self._max_length > 0:
+            return max(0, self._max_length - input_length)
+        return 50
+
+    def _get_prefix_past_key_values(self, prefix_key: str, prefix: str, input_ids):
+        """Return the cached state of the encoded prompt prefix, or None if it does not apply.
+
+        The state is computed once per template key and model version. It applies only if the
+        prompt starts with exactly the prefix tokens and has at least one token after them.
+        """
+        if not prefix_key or not prefix:
+            return None
+        model_identity = self.get_name()
+        model_version = self._model_version
+        entry = self._prefix_cache.get(prefix_key, model_identity, model_version)
+        if entry is None:
+            prefix_ids = self.tokenizer(prefix)["input_ids"]
+            with torch.no_grad(), self._inference():
+                outputs = self._get_generation_model()(
+                    input_ids=torch.tensor([prefix_ids]), use_cache=True
+                )
+            entry = (prefix_ids, outputs.past_key_values)
+            self._prefix_cache.put(prefix_key, model_identity, model_version, *entry)
+        prefix_ids, past_key_values = entry
+        if (
+            len(input_ids) <= len(prefix_ids)
+            or input_ids[: len(prefix_ids)].tolist() != prefix_ids
+        ):
+            return None
+        # Cache objects are extended in place during generation, legacy tuples are not
+        if hasattr(past_key_values, "get_seq_length"):
+            past_key_values = copy.deepcopy(past_key_values)
+        return past_key_values
+
+    def generate_output(self, input_text, prefix_key: str = None, prefix: str = None):
         if not self._use_api:
             # Local model generation
-            inputs = self.tokenizer(input_text, return_tensors="pt")
-            if self._max_new_tokens:
-                return self._model.generate(
-                    **inputs, max_new_tokens=self._max_new_tokens
+            with self._in_use():
+                inputs = self.tokenizer(input_text, return_tensors="pt")
+                length_kwargs = self._generation_length_kwargs(
+                    inputs["input_ids"].shape[-1]
                 )
-            else:
-                max_length = (
-                    self._max_length
-                    if self._max_length > 0
-                    else inputs["input_ids"].shape[-1] + 50
+                # Start from the cached state of the static prompt prefix if available
+                past_key_values = self._get_prefix_past_key_values(
+                    prefix_key, prefix, inputs["input_ids"][0]
                 )
-                return self._model.generate(**inputs, max_length=max_length)
+                model = self._get_generation_model()
+                with self._inference():
+                    if past_key_values is not None:
+                        return model.generate(
+                            **inputs, past_key_values=past_key_values, **length_kwargs
+                        )
+                    return model.generate(**inputs, **length_kwargs)
         else:
             # Use OpenAI API for text generation
             try:
@@ -372,12 +1054,250 @@ class GPTModelWrapper(CLIMInterface):
                 self.protocol.error(f"OpenAI API error: {str(e)}")
                 return None
 
-    def generate_text(self, input_text: str) -> str:
-        outputs = self.generate_output(input_text)
+    def generate_text(
+        self, input_text: str, prefix_key: str = None, prefix: str = None
+    ) -> str:
+        # Only local generation is greedy and therefore cacheable
+        cache = self._response_cache if not self._use_api else None
+        if cache is not None:
+            key = self._get_response_cache_key(input_text)
+            text = cache.get(key, self._weights_id)
+            if text is not None:
+                return text
+        outputs = self.generate_output(input_text, prefix_key, prefix)
         if outputs is not None:
-            return self.decode_output(outputs)
+            text = self.decode_output(outputs)
+            if cache is not None:
+                cache.put(key, text, self._weights_id)
+            return text
         return "Error generating text."
 
+    def stream_text(self, input_text: str, prefix_key: str = None, prefix: str = None):
+        """Yield the generated text in chunks as the tokens are produced.
+
+        Only the continuation of the prompt is yielded. Closing the generator (e.g. leaving a
+        for loop early) stops the generation after the current token. Cached responses are
+        yielded at once, complete local generations are cached.
+        """
+        if self._use_api:
+            yield from self._stream_api_text(input_text)
+            return
+        cache = self._response_cache
+        if cache is not None:
+            key = self._get_response_cache_key(input_text)
+            text = cache.get(key, self._weights_id)
+            if text is not None:
+                # Cached texts contain the prompt like decoded outputs
+                yield text[len(input_text) :] if text.startswith(input_text) else text
+                return
+        with self._in_use():
+            inputs = self.tokenizer(input_text, return_tensors="pt")
+            past_key_values = self._get_prefix_past_key_values(
+                prefix_key, prefix, inputs["input_ids"][0]
+            )
+            if past_key_values is not None:
+                inputs["past_key_values"] = past_key_values
+            streamer = TextIteratorStreamer(
+                self.tokenizer, skip_prompt=True, skip_special_tokens=True
+            )
+            stop_event = threading.Event()
+            errors = []
+
+            def generate():
+                try:
+                    # The adapter or inference mode is activated per thread
+                    with self._inference():
+                        self._get_generation_model().generate(
+                            **inputs,
+                            streamer=streamer,
+                            stopping_criteria=StoppingCriteriaList(
+                                [_EventStoppingCriteria(stop_event)]
+                            ),
+                            **self._generation_length_kwargs(
+                                inputs["input_ids"].shape[-1]
+                            ),
+                        )
+                except Exception as e:
+                    errors.append(e)
+                    streamer.end()
+
+            thread = threading.Thread(
+                target=generate, name=f"{self.get_name()}-stream", daemon=True
+            )
+            thread.start()
+            chunks = []
+            completed = False
+            try:
+                for chunk in streamer:
+                    if chunk:
+                        chunks.append(chunk)
+                        yield chunk
+                completed = True
+            finally:
+                stop_event.set()
+                thread.join()
+            if errors:
+                raise errors[0]
+            if completed and cache is not None:
+                cache.put(key, input_text + "".join(chunks), self._weights_id)
+
+    def _stream_api_text(self, input_text: str):
+        """Yield the content deltas of a streamed chat completion."""
+        response = openai.ChatCompletion.create(
+            model=self._api_model,
+            messages=[{"role": "user", "content": input_text}],
+            max_tokens=self._max_length,
+            n=1,
+            stop=None,
+            temperature=0.7,
+            stream=True,
+        )
+        try:
+            for chunk in response:
+                content = chunk["choices"][0].get("delta", {}).get("content")
+                if content:
+                    yield content
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+    def score_decisions(
+        self, input_text: str, decisions: list[str]
+    ) -> dict[str, float]:
+        """Return the probability of each decision as the answer to the prompt.
+
+        All decisions are scored in one batched forward pass as continuations of the prompt
+        and a "Decision:" cue, the way decisions appear in the training texts. The logits are
+        restricted to the tokens of the decisions, so only their rows of the output embedding
+        are used. The API backend cannot score continuations and returns None.
+        """
+        if self._use_api or not decisions:
+            return None
+        with self._in_use():
+            context_ids = self.tokenizer(input_text + GPTModelWrapper.DECISION_CUE)[
+                "input_ids"
+            ]
+            decision_ids = [
+                self.tokenizer(" " + decision)["input_ids"] for decision in decisions
+            ]
+            vocabulary = sorted({token for ids in decision_ids for token in ids})
+            vocabulary_index = {token: i for i, token in enumerate(vocabulary)}
+            longest = max(len(ids) for ids in decision_ids)
+            pad_token_id = self.tokenizer.eos_token_id
+            input_ids = torch.full(
+                (len(decisions), len(context_ids) + longest), pad_token_id
+            )
+            attention_mask = torch.zeros_like(input_ids)
+            targets = torch.zeros((len(decisions), longest), dtype=torch.long)
+            target_mask = torch.zeros((len(decisions), longest))
+            for row, ids in enumerate(decision_ids):
+                input_ids[row, : len(context_ids) + len(ids)] = torch.tensor(
+                    context_ids + ids
+                )
+                attention_mask[row, : len(context_ids) + len(ids)] = 1
+                targets[row, : len(ids)] = torch.tensor(
+                    [vocabulary_index[token] for token in ids]
+                )
+                target_mask[row, : len(ids)] = 1
+            model = self._get_generation_model()
+            with torch.no_grad(), self._inference():
+                hidden_states = model.base_model(
+                    input_ids=input_ids, attention_mask=attention_mask
+                ).last_hidden_state
+                # The hidden state before each decision token predicts that token
+                start = len(context_ids) - 1
+                hidden_states = hidden_states[:, start : start + longest]
+                weights = model.get_output_embeddings().weight
+                if callable(weights):
+                    # Quantized Linear modules return their packed int8 weight
+                    weights = weights().dequantize()
+                weights = weights[vocabulary]
+                log_probs = torch.log_softmax(hidden_states @ weights.T, dim=-1)
+                token_log_probs = log_probs.gather(-1, targets.unsqueeze(-1)).squeeze(
+                    -1
+                )
+                scores = (token_log_probs * target_mask).sum(dim=-1)
+                probabilities = torch.softmax(scores, dim=0)
+            return {
+                decision: probability
+                for decision, probability in zip(decisions, probabilities.tolist())
+            }
+
+    def _generate_local_text_batch(self, input_texts: list[str], batch_size: int):
+        """Generate the texts for several prompts with one `generate` call per micro-batch.
+
+        The prompts are sorted by token length, so that each micro-batch carries as little
+        padding as possible, and left-padded, so that all rows continue right after their prompt.
+        A micro-batch generates up to the largest budget of new tokens of its rows and each row
+        is cut to its own budget, so that it equals the output of `generate_text`.
+        """
+        with self._in_use():
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            pad_token_id = self.tokenizer.pad_token_id
+            encodings = [self.tokenizer(text)["input_ids"] for text in input_texts]
+            order = sorted(range(len(encodings)), key=lambda i: len(encodings[i]))
+            texts = [None] * len(encodings)
+            for start in range(0, len(order), batch_size):
+                indices = order[start : start + batch_size]
+                longest = max(len(encodings[i]) for i in indices)
+                budgets = [self._generation_budget(len(encodings[i])) for i in indices]
+                input_ids = torch.full((len(indices), longest), pad_token_id)
+                attention_mask = torch.zeros((len(indices), longest), dtype=torch.long)
+                for row, i in enumerate(indices):
+                    length = len(encodings[i])
+                    input_ids[row, longest - length :] = torch.tensor(encodings[i])
+                    attention_mask[row, longest - length :] = 1
+                with self._inference():
+                    outputs = self._get_generation_model().generate(
+                        input_ids=input_ids,
+                        attention_mask=attention_mask,
+                        pad_token_id=pad_token_id,
+                        max_new_tokens=max(1, max(budgets)),
+                    )
+                for row, i in enumerate(indices):
+                    texts[i] = self.tokenizer.decode(
+                        outputs[row, : longest + budgets[row]], skip_special_tokens=True
+                    )
+            return texts
+
+    def generate_text_batch(self, input_texts: list[str], batch_size: int = None):
+        """Generate the texts for several prompts, returned in input order."""
+        if not input_texts:
+            return []
+        if not self._use_api:
+            if self._response_cache is None:
+                return self._generate_local_text_batch(
+                    input_texts, batch_size or self._max_batch_size
+                )
+            # Generate only the prompts that are not cached
+            keys = [self._get_response_cache_key(text) for text in input_texts]
+            texts = [self._response_cache.get(key, self._weights_id) for key in keys]
+            missing = [i for i, text in enumerate(texts) if text is None]
+            if missing:
+                generated = self._generate_local_text_batch(
+                    [input_texts[i] for i in missing],
+                    batch_size or self._max_batch_size,
+                )
+                for i, text in zip(missing, generated):
+                    texts[i] = text
+                    # Rows equal the output of generate_text and share its cache entries,
+                    # except for prompts without a budget, which generate_text rejects
+                    input_length = len(self.tokenizer(input_texts[i])["input_ids"])
+                    if self._generation_budget(input_length) > 0:
+                        self._response_cache.put(keys[i], text, self._weights_id)
+            return texts
+        # The chat completions API takes one conversation per request
+        return [self.generate_text(input_text) for input_text in input_texts]
+
+    def generate_batch(self, prompts: list[str], batch_size: int = None):
+        """Generate and filter the answers for several prompts, returned in input order."""
+        texts = self.generate_text_batch(prompts, batch_size)
+        return [
+            self.filter_answer(text, prompt) for text, prompt in zip(texts, prompts)
+        ]
+
     def filter_answer(self, answer: str, prompt: str):
         filtered = answer.replace(prompt + "\n", "").split("\n")
         filtered = [cleaned.strip() for cleaned in filtered if cleaned.strip()]
@@ -387,6 +1307,51 @@ class GPTModelWrapper(CLIMInterface):
         text = self.generate_text(prompt)
         return self.filter_answer(text, prompt)
 
+    def _get_async_chat_client(self) -> AsyncChatClient:
+        if self._async_chat_client is None:
+            if self._api_key is None:
+                raise ValueError("API key must be provided when using OpenAI API.")
+            self._async_chat_client = AsyncChatClient(
+                api_key=self._api_key,
+                api_base=self._api_base,
+                max_concurrency=self._api_max_concurrency,
+                max_retries=self._api_max_retries,
+                requests_per_second=self._api_requests_per_second,
+            )
+        return self._async_chat_client
+
+    async def agenerate_text(
+        self, input_text: str, prefix_key: str = None, prefix: str = None
+    ) -> str:
+        """Generate text without blocking the event loop.
+
+        API requests are awaited on the pooled async client, local generations run in a
+        worker thread.
+        """
+        if not self._use_api:
+            return await asyncio.to_thread(
+                self.generate_text, input_text, prefix_key, prefix
+            )
+        try:
+            return await self._get_async_chat_client().chat(
+                messages=[{"role": "user", "content": input_text}],
+                model=self._api_model or "gpt-3.5-turbo",
+                max_tokens=self._max_length,
+                temperature=0.7,
+            )
+        except Exception as e:
+            self.protocol.error(f"OpenAI API error: {str(e)}")
+            return "Error generating text."
+
+    async def agenerate_answer_list(self, prompt, options=None):
+        text = await self.agenerate_text(prompt)
+        return self.filter_answer(text, prompt)
+
+    async def aclose(self):
+        """Close the connections of the async API client."""
+        if self._async_chat_client is not None:
+            await self._async_chat_client.aclose()
+
     def set_generation_parameters(self, max_length=None, max_new_tokens=None):
         """Set parameters for text generation."""
         if max_length:
@@ -411,47 +1376,55 @@ class GPTModelWrapper(CLIMInterface):
             self.protocol.error("Training is only supported for local models, not API.")
             raise NotImplementedError
 
-        self.protocol.info(f"Training of {self.name}: Initializing training process.")
-        # Check if CUDA is available and move the model to GPU if available
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self._model.to(device)
+        self.protocol.info(
+            f"Training of {self.get_name()}: Initializing {self._training_mode} training process."
+        )
+        device, parameters = self._prepare_training()
 
-        self.protocol.info(f"Training of {self.name}: Preparing the dataset.")
+        self.protocol.info(f"Training of {self.get_name()}: Preparing the dataset.")
         # Prepare the dataset
-        train_dataset = TextDataset(training_data, self.tokenizer)
-        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
+        train_dataset = TextDataset(
+            training_data, self.tokenizer, corpus_cache=self._corpus_cache
+        )
+        train_loader = train_dataset.create_data_loader(batch_size, shuffle=True)
 
         # Define optimizer
-        optimizer = AdamW(self._model.parameters(), lr=learning_rate)
+        optimizer = AdamW(parameters, lr=learning_rate)
 
-        self.protocol.info(f"Training of {self.name}: Starting training loop.")
+        self.protocol.info(f"Training of {self.get_name()}: Starting training loop.")
         # Training loop
-        self._model.train()
-        for epoch in range(epochs):
-            epoch_loss = 0
-            progress_bar = tqdm(train_loader, desc=f"Epoch {epoch+1}")
-            for batch in progress_bar:
-                batch = batch.to(device)
-                outputs = self._model(batch, labels=batch)
-                loss = outputs.loss
-                loss.backward()
+        with self._activated(training=True):
+            for epoch in range(epochs):
+                epoch_loss = 0
+                progress_bar = tqdm(train_loader, desc=f"Epoch {epoch+1}")
+                for batch in progress_bar:
+                    batch = {key: value.to(device) for key, value in batch.items()}
+                    outputs = self._model(**batch)
+                    loss = outputs.loss
+                    loss.backward()
 
-                optimizer.step()
-                optimizer.zero_grad()
+                    optimizer.step()
+                    optimizer.zero_grad()
 
-                epoch_loss += loss.item()
-                progress_bar.set_postfix({"loss": loss.item()})
+                    epoch_loss += loss.item()
+                    progress_bar.set_postfix({"loss": loss.item()})
 
-            self.protocol.info(
-                f"Training of {self.name}: Epoch {epoch+1} completed with average loss: {epoch_loss / len(train_loader)}"
-            )
-        self.protocol.info(f"Training of {self.name}: Training completed.")
+                self.protocol.info(
+                    f"Training of {self.get_name()}: Epoch {epoch+1} completed with average loss: {epoch_loss / len(train_loader)}"
+                )
+        self._model.eval()
+        self._changed = True
+        self._weights_changed()
+        self.protocol.info(f"Training of {self.get_name()}: Training completed.")
 
-        # Save the fine-tuned model
-        self._model.save_pretrained("./fine_tuned_gpt2")
-        self.tokenizer.save_pretrained("./fine_tuned_gpt2")
+        # Save the fine-tuned model (only the adapter in adapter mode)
+        if self._adapter is not None and self._base_model_name is not None:
+            self._adapter.save("./fine_tuned_gpt2", base_model=self._base_model_name)
+        else:
+            self._model.save_pretrained("./fine_tuned_gpt2")
+            self.tokenizer.save_pretrained("./fine_tuned_gpt2")
         self.protocol.info(
-            f"Training of {self.name}: Model saved to ./fine_tuned_gpt2."
+            f"Training of {self.get_name()}: Model saved to ./fine_tuned_gpt2."
         )
 
     def execute_advised(self, todos: list = None):
@@ -465,3 +1438,15 @@ class GPTModelWrapper(CLIMInterface):
             "Unadvised execution is not supported for GPTModelWrapper. Please use a different model."
         )
         raise NotImplementedError
+
+
+class _EventStoppingCriteria(StoppingCriteria):
+    """Stops a generation as soon as the event is set."""
+
+    def __init__(self, stop_event: threading.Event):
+        self.stop_event = stop_event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full(
+            (input_ids.shape[0],), self.stop_event.is_set(), dtype=torch.bool
+        )
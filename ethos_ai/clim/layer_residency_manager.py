@@ -0,0 +1,147 @@
+import threading
+import time
+
+from ethos_ai.util.protocol import Protocol
+
+
+class LayerResidencyManager:
+    """
+    Keeps the models of the CLIM layers in memory only while they are used.
+
+    Layers load their models on first use and report to the manager. The manager unloads
+    (persisting changed weights first) layers that have been idle longer than idle_timeout and,
+    whenever the loaded models exceed memory_budget bytes, the least recently used idle layers.
+    Layers that are generating or training are never unloaded. Models shared by several
+    layers count once and are freed when the last of them is unloaded.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = None,
+        idle_timeout: float = None,
+        check_interval: float = 10.0,
+    ):
+        """
+        Initializes the residency manager.
+
+        :param memory_budget: The bytes the loaded models may take, None for no limit.
+        :param idle_timeout: The seconds after which an idle layer is unloaded, None to keep it.
+        :param check_interval: The seconds between two checks for idle layers.
+        """
+        self.protocol = Protocol()
+        self.memory_budget: int = memory_budget
+        self.idle_timeout: float = idle_timeout
+        self.check_interval: float = check_interval
+        self._lock = threading.RLock()
+        self._layers: list = []
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: threading.Thread = None
+
+    def register(self, layer):
+        """Registers a layer model (GPTModelWrapper), it reports its loads to the manager."""
+        with self._lock:
+            if layer not in self._layers:
+                self._layers.append(layer)
+
+    def unregister(self, layer):
+        with self._lock:
+            if layer in self._layers:
+                self._layers.remove(layer)
+
+    def start(self):
+        """Starts the thread that unloads idle layers, if an idle timeout is set."""
+        with self._lock:
+            if self.idle_timeout is None or (
+                self._thread is not None and self._thread.is_alive()
+            ):
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._watch, name="LayerResidencyManager", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stops the thread that unloads idle layers."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                self.protocol.error(f"Unloading idle layers failed: {str(e)}")
+
+    def on_loaded(self, layer):
+        """Called by a layer after it loaded its model, unloads other layers over the budget."""
+        self.enforce_budget(exclude=layer)
+
+    def get_memory_usage(self) -> int:
+        """Returns the bytes taken by the models of all loaded layers, shared models once."""
+        footprints = {}
+        with self._lock:
+            layers = list(self._layers)
+        for layer in layers:
+            footprints.update(layer.get_memory_footprint())
+        return sum(footprints.values())
+
+    def evict_idle(self) -> list[str]:
+        """Unloads the layers idle longer than the idle timeout and returns their names."""
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            layers = list(self._layers)
+        evicted = []
+        for layer in layers:
+            if (
+                layer.is_loaded()
+                and layer.is_idle()
+                and now - layer.get_last_used() > self.idle_timeout
+                and layer.unload()
+            ):
+                evicted.append(layer.get_name())
+        if evicted:
+            self.protocol.info(f"Unloaded idle layers: {', '.join(evicted)}.")
+        return evicted
+
+    def enforce_budget(self, exclude=None) -> list[str]:
+        """Unloads least recently used idle layers until the loaded models fit the budget."""
+        if self.memory_budget is None:
+            return []
+        evicted = []
+        while self.get_memory_usage() > self.memory_budget:
+            with self._lock:
+                candidates = [
+                    layer
+                    for layer in self._layers
+                    if layer is not exclude and layer.is_loaded() and layer.is_idle()
+                ]
+            candidates.sort(key=lambda layer: layer.get_last_used())
+            unloaded = next((layer for layer in candidates if layer.unload()), None)
+            if unloaded is None:
+                break
+            evicted.append(unloaded.get_name())
+        if evicted:
+            self.protocol.info(
+                f"Unloaded layers over the memory budget: {', '.join(evicted)}."
+            )
+        return evicted
+
+    def get_status(self) -> dict:
+        """Returns whether each layer is loaded and the seconds since it was last used."""
+        now = time.monotonic()
+        with self._lock:
+            layers = list(self._layers)
+        return {
+            layer.get_name(): {
+                "loaded": layer.is_loaded(),
+                "idle_seconds": now - layer.get_last_used(),
+                "memory": sum(layer.get_memory_footprint().values()),
+            }
+            for layer in layers
+        }
@@ -0,0 +1,49 @@
+import random
+
+from torch.utils.data import Sampler
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Batch sampler that groups examples of similar length into the same batch.
+
+    The examples are shuffled, split into buckets of `batch_size * bucket_size_multiplier`
+    examples, sorted by length within each bucket and cut into batches. The order of the
+    batches is shuffled again, so each epoch still sees the data in a random order while
+    every batch needs little padding.
+    """
+
+    def __init__(
+        self,
+        lengths: list[int],
+        batch_size: int,
+        shuffle: bool = True,
+        bucket_size_multiplier: int = 50,
+        seed: int = None,
+    ):
+        self.lengths = lengths
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_size = batch_size * bucket_size_multiplier
+        self.random = random.Random(seed)
+
+    def __iter__(self):
+        indices = list(range(len(self.lengths)))
+        if self.shuffle:
+            self.random.shuffle(indices)
+        batches = []
+        for start in range(0, len(indices), self.bucket_size):
+            bucket = sorted(
+                indices[start : start + self.bucket_size],
+                key=lambda i: self.lengths[i],
+            )
+            batches.extend(
+                bucket[i : i + self.batch_size]
+                for i in range(0, len(bucket), self.batch_size)
+            )
+        if self.shuffle:
+            self.random.shuffle(batches)
+        return iter(batches)
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
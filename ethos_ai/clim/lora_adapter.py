@@ -0,0 +1,213 @@
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+import torch
+import torch.nn as nn
+from transformers.pytorch_utils import Conv1D
+
+# The adapter active in the current thread. Several CLIM layers share one base model, each
+# layer activates its own adapter around its model calls.
+_active = threading.local()
+
+
+class LoRAConv1D(nn.Module):
+    """
+    Wraps a (frozen) GPT-2 Conv1D projection and adds the low-rank deltas of all adapters
+    attached to it. Only the delta of the adapter active in the calling thread is applied.
+    """
+
+    def __init__(self, base: Conv1D):
+        super(LoRAConv1D, self).__init__()
+        self.base = base
+        self.lora_A = nn.ParameterDict()
+        self.lora_B = nn.ParameterDict()
+        self.scaling = {}
+        self.dropout = {}
+
+    def add(self, name: str, rank: int, alpha: float, dropout: float):
+        in_features, out_features = self.base.weight.shape
+        lora_A = nn.Parameter(torch.empty(in_features, rank))
+        nn.init.kaiming_uniform_(lora_A, a=math.sqrt(5))
+        # B starts with zeros, so a new adapter does not change the base model
+        self.lora_A[name] = lora_A
+        self.lora_B[name] = nn.Parameter(torch.zeros(rank, out_features))
+        self.scaling[name] = alpha / rank
+        self.dropout[name] = dropout
+
+    def remove(self, name: str):
+        if name in self.lora_A:
+            del self.lora_A[name]
+            del self.lora_B[name]
+            del self.scaling[name]
+            del self.dropout[name]
+
+    def delta_weight(self, name: str) -> torch.Tensor:
+        return (self.lora_A[name] @ self.lora_B[name]) * self.scaling[name]
+
+    def forward(self, x):
+        output = self.base(x)
+        name = getattr(_active, "name", None)
+        if name is not None and name in self.lora_A:
+            # Dropout only while the adapter is trained, the shared base stays in eval mode
+            lora_x = nn.functional.dropout(
+                x, self.dropout[name], training=getattr(_active, "training", False)
+            )
+            output = (
+                output
+                + (lora_x @ self.lora_A[name] @ self.lora_B[name]) * self.scaling[name]
+            )
+        return output
+
+
+class LoRAAdapter:
+    """
+    A named low-rank adapter (LoRA) on top of a GPT-2 model.
+
+    The adapter attaches its weights to the attention projections of the model and only
+    takes effect while it is activated. The base weights are never changed, so one base
+    model can serve several CLIM layers with their own adapters.
+    """
+
+    WEIGHTS_NAME = "adapter.pt"
+    CONFIG_NAME = "adapter_config.json"
+
+    def __init__(
+        self,
+        model: nn.Module,
+        name: str,
+        rank: int = 8,
+        alpha: float = 16,
+        dropout: float = 0.05,
+        target_modules: tuple = ("c_attn",),
+    ):
+        self.model = model
+        # Parameter names must not contain dots
+        self.name = name.replace(".", "_")
+        self.rank = rank
+        self.alpha = alpha
+        self.dropout = dropout
+        self.target_modules = tuple(target_modules)
+        self.modules: dict[str, LoRAConv1D] = {}
+        for module_name, module in LoRAAdapter._inject(model, self.target_modules):
+            module.remove(self.name)
+            module.add(self.name, rank, alpha, dropout)
+            self.modules[module_name] = module
+
+    @staticmethod
+    def _inject(model: nn.Module, target_modules: tuple):
+        """Wraps the target projections of the model (once) and yields the wrappers."""
+        for parent_name, parent in list(model.named_modules()):
+            for child_name, child in list(parent.named_children()):
+                if child_name not in target_modules:
+                    continue
+                if isinstance(child, Conv1D):
+                    child = LoRAConv1D(child)
+                    setattr(parent, child_name, child)
+                if isinstance(child, LoRAConv1D):
+                    full_name = (
+                        f"{parent_name}.{child_name}" if parent_name else child_name
+                    )
+                    yield full_name, child
+
+    @staticmethod
+    def unwrap(model: nn.Module, merge_name: str = None):
+        """
+        Replaces all LoRA wrappers of the model by their base projections.
+
+        :param model: The model to unwrap, usually a private copy of a shared model.
+        :param merge_name: Optional adapter whose delta is merged into the base weights.
+        """
+        for parent in list(model.modules()):
+            for child_name, child in list(parent.named_children()):
+                if isinstance(child, LoRAConv1D):
+                    if merge_name is not None and merge_name in child.lora_A:
+                        with torch.no_grad():
+                            child.base.weight += child.delta_weight(merge_name)
+                    setattr(parent, child_name, child.base)
+        return model
+
+    @contextmanager
+    def activate(self, training: bool = False):
+        """Activates the adapter for all model calls of the current thread."""
+        previous = (getattr(_active, "name", None), getattr(_active, "training", False))
+        _active.name, _active.training = self.name, training
+        try:
+            yield self
+        finally:
+            _active.name, _active.training = previous
+
+    def parameters(self):
+        for module in self.modules.values():
+            yield module.lora_A[self.name]
+            yield module.lora_B[self.name]
+
+    def num_parameters(self) -> int:
+        return sum(parameter.numel() for parameter in self.parameters())
+
+    def state_dict(self) -> dict:
+        state = {}
+        for module_name, module in self.modules.items():
+            state[f"{module_name}.lora_A"] = module.lora_A[self.name].detach().clone()
+            state[f"{module_name}.lora_B"] = module.lora_B[self.name].detach().clone()
+        return state
+
+    def load_state_dict(self, state: dict):
+        with torch.no_grad():
+            for module_name, module in self.modules.items():
+                module.lora_A[self.name].copy_(state[f"{module_name}.lora_A"])
+                module.lora_B[self.name].copy_(state[f"{module_name}.lora_B"])
+
+    def get_config(self) -> dict:
+        return {
+            "rank": self.rank,
+            "alpha": self.alpha,
+            "dropout": self.dropout,
+            "target_modules": list(self.target_modules),
+        }
+
+    def remove(self):
+        """Detaches the adapter weights from the model."""
+        for module in self.modules.values():
+            module.remove(self.name)
+        self.modules = {}
+
+    def save(self, path: str, base_model: str):
+        """Saves the adapter weights and configuration (not the base model) to a directory."""
+        os.makedirs(path, exist_ok=True)
+        torch.save(self.state_dict(), os.path.join(path, LoRAAdapter.WEIGHTS_NAME))
+        with open(os.path.join(path, LoRAAdapter.CONFIG_NAME), "w") as file:
+            json.dump(dict(self.get_config(), base_model=base_model), file, indent=4)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, LoRAAdapter.CONFIG_NAME))
+
+    @staticmethod
+    def load_config(path: str) -> dict:
+        with open(os.path.join(path, LoRAAdapter.CONFIG_NAME), "r") as file:
+            return json.load(file)
+
+    @staticmethod
+    def load(model: nn.Module, name: str, path: str) -> "LoRAAdapter":
+        """Attaches an adapter saved in a directory to the model."""
+        state = torch.load(
+            os.path.join(path, LoRAAdapter.WEIGHTS_NAME), map_location="cpu"
+        )
+        return LoRAAdapter.create(model, name, LoRAAdapter.load_config(path), state)
+
+    @staticmethod
+    def create(model: nn.Module, name: str, config: dict, state: dict) -> "LoRAAdapter":
+        """Attaches an adapter with the given configuration and weights to the model."""
+        adapter = LoRAAdapter(
+            model,
+            name,
+            rank=config.get("rank", 8),
+            alpha=config.get("alpha", 16),
+            dropout=config.get("dropout", 0.05),
+            target_modules=tuple(config.get("target_modules", ["c_attn"])),
+        )
+        adapter.load_state_dict(state)
+        return adapter
@@ -0,0 +1,73 @@
+import os
+
+import torch
+import torch.nn as nn
+from torch.ao.quantization import quantize_dynamic
+from transformers.pytorch_utils import Conv1D
+
+
+class ModelQuantizer:
+    """
+    Builds and caches int8 inference copies of GPT-2 models for the CPU.
+
+    GPT-2 projects with Conv1D modules, which dynamic quantization does not know; they are
+    converted to equivalent Linear modules first. The weights of all Linear modules are then
+    quantized to int8, their activations are quantized on the fly.
+    """
+
+    SUFFIX = ".int8.pt"
+
+    @staticmethod
+    def convert_conv1d_to_linear(model: nn.Module) -> nn.Module:
+        """Replaces the Conv1D modules of the model (in place) by equivalent Linear modules."""
+        for parent in list(model.modules()):
+            for child_name, child in list(parent.named_children()):
+                if isinstance(child, Conv1D):
+                    in_features, out_features = child.weight.shape
+                    linear = nn.Linear(in_features, out_features)
+                    with torch.no_grad():
+                        # Conv1D computes x @ W + b, Linear x @ W.T + b
+                        linear.weight.copy_(child.weight.T)
+                        linear.bias.copy_(child.bias)
+                    setattr(parent, child_name, linear)
+        return model
+
+    @staticmethod
+    def quantize(model: nn.Module) -> nn.Module:
+        """
+        Returns the dynamically int8 quantized inference version of a model.
+
+        :param model: A private copy of the model without adapter wrappers, changed in place.
+        """
+        ModelQuantizer.convert_conv1d_to_linear(model)
+        model.eval()
+        model.requires_grad_(False)
+        return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    @staticmethod
+    def get_path(model_path: str) -> str:
+        """Returns the path of the quantized artifact cached next to a model path."""
+        return model_path.rstrip("/\\") + ModelQuantizer.SUFFIX
+
+    @staticmethod
+    def save(path: str, model: nn.Module, weights_id: str):
+        """Saves a quantized model with the identity of the weights it was built from."""
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        torch.save({"weights_id": weights_id, "model": model}, temporary_path)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path: str, weights_id: str) -> nn.Module:
+        """
+        Returns the quantized model saved for the given weights, or None.
+
+        :param path: The path of the quantized artifact.
+        :param weights_id: The identity of the current weights; artifacts of other weights are stale.
+        """
+        if not os.path.isfile(path):
+            return None
+        # The artifact is a pickled module written by this class
+        artifact = torch.load(path, map_location="cpu", weights_only=False)
+        if artifact.get("weights_id") != weights_id:
+            return None
+        return artifact["model"]
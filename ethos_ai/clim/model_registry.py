@@ -0,0 +1,105 @@
+import copy
+import gc
+import os
+from threading import RLock
+
+from transformers import GPT2LMHeadModel
+
+from ethos_ai.clim.checkpoint_store import CheckpointStore
+from ethos_ai.clim.lora_adapter import LoRAAdapter
+from ethos_ai.util.protocol import Protocol
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of read-only base models.
+
+    CLIM layers whose models resolve to the same model name or path share one base model
+    instead of loading a full copy each. The shared model is frozen and stays in eval mode;
+    layer specific fine-tunes live in adapters on top of it (see LoRAAdapter).
+    Models are reference counted and dropped when the last layer releases them.
+    """
+
+    _lock = RLock()
+    _models = {}
+    _references = {}
+
+    @staticmethod
+    def resolve_key(model_name_or_path: str) -> str:
+        """Returns the registry key: the real path of local models, else the model name."""
+        if os.path.isdir(model_name_or_path):
+            return os.path.realpath(model_name_or_path)
+        return model_name_or_path
+
+    @classmethod
+    def acquire(cls, model_name_or_path: str):
+        """
+        Returns the shared base model for the given model name or path, loading it on first use.
+
+        :param model_name_or_path: The model name (e.g. gpt2), local model directory or
+            checkpoint version directory.
+        :return: The tuple (registry key, shared model).
+        """
+        key = cls.resolve_key(model_name_or_path)
+        with cls._lock:
+            model = cls._models.get(key)
+            if model is None:
+                Protocol().info(f"Loading shared base model {key}.")
+                if CheckpointStore.is_version(model_name_or_path):
+                    model = CheckpointStore.load_model(model_name_or_path)
+                else:
+                    model = GPT2LMHeadModel.from_pretrained(model_name_or_path)
+                model.eval()
+                model.requires_grad_(False)
+                cls._models[key] = model
+                cls._references[key] = 0
+            cls._references[key] += 1
+            return key, model
+
+    @classmethod
+    def release(cls, key: str):
+        """Releases one reference to a shared model and drops the model after the last one."""
+        with cls._lock:
+            if key not in cls._references:
+                return
+            cls._references[key] -= 1
+            if cls._references[key] <= 0:
+                Protocol().info(f"Releasing shared base model {key}.")
+                del cls._references[key]
+                del cls._models[key]
+                gc.collect()
+
+    @classmethod
+    def make_private(cls, key: str, adapter_name: str = None):
+        """
+        Returns a private, trainable copy of a shared model and releases the shared reference.
+
+        The copy contains no adapter wrappers; the delta of the given adapter is merged into
+        its weights.
+
+        :param key: The registry key of the shared model.
+        :param adapter_name: Optional adapter to merge into the private copy.
+        """
+        model = cls.copy_model(key, adapter_name)
+        model.requires_grad_(True)
+        cls.release(key)
+        return model
+
+    @classmethod
+    def copy_model(cls, key: str, adapter_name: str = None):
+        """
+        Returns a private copy of a shared model without adapter wrappers.
+
+        :param key: The registry key of the shared model.
+        :param adapter_name: Optional adapter to merge into the copy.
+        """
+        with cls._lock:
+            model = copy.deepcopy(cls._models[key])
+        LoRAAdapter.unwrap(model, merge_name=adapter_name)
+        return model
+
+    @classmethod
+    def get_reference_counts(cls) -> dict[str, int]:
+        """Returns the number of layers sharing each loaded model."""
+        with cls._lock:
+            return dict(cls._references)
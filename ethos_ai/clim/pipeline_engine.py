@@ -0,0 +1,339 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+
+import yaml
+
+from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.clim_interface import CLIMInterface
+from ethos_ai.clim.compiled_pipeline import CompiledPipeline
+from ethos_ai.clim.decision import Decision
+from ethos_ai.clim.pipeline_run import PipelineRun
+from ethos_ai.clim.pipeline_stage import PipelineStage
+from ethos_ai.util.protocol import Protocol
+
+
+class PipelineEngine:
+    """
+    Runs inputs through the CLIM layers along pipelines defined as data.
+
+    The pipeline definitions (JSON or YAML) are compiled once per file version and cached.
+    After each stage group the decision of the stages selects the transition: end, switch to
+    another pipeline (e.g. an emergency bypass) or continue with the next group. A run never
+    enters the same pipeline twice, so decisions cannot make it loop. Terminal decisions (e.g.
+    NOGO of the ethic prerun) end a run at once; the engine counts the stages skipped that way. Stages of a parallel group
+    run concurrently on forks of the input data, which are merged afterwards. The duration of
+    every stage is recorded in the input data.
+
+    Several inputs can be run in lockstep (`run_many`): each step advances every unfinished
+    run by one group, and the stages of all runs that call the same layer with the same type
+    are processed in one batched call of the layer.
+    """
+
+    DEFAULT_PIPELINES_FILE = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "resources",
+        "pipelines",
+        "pipelines.json",
+    )
+
+    _lock = RLock()
+    _compiled: dict[str, tuple[float, dict[str, CompiledPipeline]]] = {}
+
+    def __init__(
+        self,
+        layers: dict[str, CLIMInterface],
+        pipelines_file: str = None,
+        max_workers: int = 4,
+    ):
+        """
+        Initializes the pipeline engine.
+
+        :param layers: The CLIM layers by upper case layer name (e.g. ETHIC).
+        :param pipelines_file: The JSON or YAML file with the pipeline definitions.
+        :param max_workers: The number of stages of a parallel group that run at the same time.
+        """
+        self.protocol = Protocol()
+        self.layers: dict[str, CLIMInterface] = layers
+        self.pipelines_file: str = (
+            pipelines_file or PipelineEngine.DEFAULT_PIPELINES_FILE
+        )
+        self.max_workers: int = max_workers
+        self._executor: ThreadPoolExecutor = None
+        self._statistics_lock = RLock()
+        self._statistics = {"runs": 0, "stages": 0, "skipped_stages": 0}
+
+    @staticmethod
+    def load_definitions(pipelines_file: str) -> dict:
+        with open(pipelines_file, "r", encoding="utf-8") as file:
+            if pipelines_file.endswith(".yaml") or pipelines_file.endswith(".yml"):
+                return yaml.safe_load(file)
+            return json.load(file)
+
+    @classmethod
+    def compile(cls, pipelines_file: str) -> dict[str, CompiledPipeline]:
+        """
+        Returns the compiled pipelines of a file, compiling them only if the file changed.
+
+        :param pipelines_file: The JSON or YAML file with the pipeline definitions.
+        :raises ValueError: If a transition targets an unknown pipeline.
+        """
+        modified = os.path.getmtime(pipelines_file)
+        with cls._lock:
+            cached = cls._compiled.get(pipelines_file)
+            if cached is not None and cached[0] == modified:
+                return cached[1]
+            definitions = cls.load_definitions(pipelines_file)
+            pipelines = {
+                name: CompiledPipeline.from_definition(name, definition)
+                for name, definition in definitions.items()
+            }
+            for pipeline in pipelines.values():
+                targets = list(pipeline.transitions.values()) + [
+                    target
+                    for stage in pipeline.get_stages()
+                    for target in stage.transitions.values()
+                ]
+                for target in targets:
+                    if target != CompiledPipeline.END and target not in pipelines:
+                        raise ValueError(
+                            f"Pipeline {pipeline.name} has a transition to the unknown pipeline {target}."
+                        )
+            cls._compiled[pipelines_file] = (modified, pipelines)
+            return pipelines
+
+    def get_statistics(self) -> dict:
+        """Returns the number of finished runs, processed stages and skipped stages."""
+        with self._statistics_lock:
+            return dict(self._statistics)
+
+    def get_pipeline(self, name: str) -> CompiledPipeline:
+        return PipelineEngine.compile(self.pipelines_file)[name]
+
+    def start(self, input_data: CLIMData, pipeline: str = "standard") -> PipelineRun:
+        """Returns a new run of the input data, starting with the first group of the pipeline."""
+        return PipelineRun(self.get_pipeline(pipeline), input_data)
+
+    def run(self, input_data: CLIMData, pipeline: str = "standard") -> CLIMData:
+        """
+        Runs the input data through the pipeline and the pipelines it transitions to.
+
+        :param input_data: The CLIMData object containing the input data for processing.
+        :param pipeline: The name of the pipeline to start with.
+        :return: The processed input data.
+        """
+        run = self.start(input_data, pipeline)
+        while not run.finished:
+            self.advance(run)
+        return run.input_data
+
+    def run_many(
+        self, input_datas: list[CLIMData], pipeline: str = "standard"
+    ) -> list[CLIMData]:
+        """
+        Runs several inputs through the pipelines in lockstep, batching equal stages.
+
+        Every input transitions on its own decisions, e.g. into an emergency pipeline, and
+        continues to be batched with the inputs at the same (type, layer) stage.
+
+        :param input_datas: The CLIMData objects containing the input data for processing.
+        :param pipeline: The name of the pipeline to start with.
+        :return: The processed input data in input order.
+        """
+        runs = [self.start(input_data, pipeline) for input_data in input_datas]
+        active = [run for run in runs if not run.finished]
+        while active:
+            self.advance_many(active)
+            active = [run for run in active if not run.finished]
+        return [run.input_data for run in runs]
+
+    def advance_many(self, runs: list[PipelineRun]):
+        """Runs the current stage group of each run, batched by (type, layer), and applies the transitions."""
+        batches: dict[tuple[str, str], list] = {}
+        for run in runs:
+            group = run.get_current_group()
+            for stage in group:
+                input_data = (
+                    run.input_data if len(group) == 1 else run.input_data.fork()
+                )
+                batches.setdefault((stage.type, stage.layer), []).append(
+                    (run, stage, input_data)
+                )
+        if len(batches) == 1:
+            results = [self._run_batch(items) for items in batches.values()]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="PipelineEngine"
+                )
+            futures = [
+                self._executor.submit(self._run_batch, items)
+                for items in batches.values()
+            ]
+            results = [future.result() for future in futures]
+
+        stage_results = {}
+        for items, (output_datas, duration) in zip(batches.values(), results):
+            for (run, stage, _), output_data in zip(items, output_datas):
+                stage_results[(id(run), id(stage))] = (output_data, duration)
+        for run in runs:
+            group = run.get_current_group()
+            self.complete_group(
+                run, group, [stage_results[(id(run), id(stage))] for stage in group]
+            )
+
+    async def arun(self, input_data: CLIMData, pipeline: str = "standard") -> CLIMData:
+        """
+        Runs the input data through the pipelines like `run`, awaiting the async layer calls.
+
+        :param input_data: The CLIMData object containing the input data for processing.
+        :param pipeline: The name of the pipeline to start with.
+        :return: The processed input data.
+        """
+        run = self.start(input_data, pipeline)
+        while not run.finished:
+            await self.aadvance(run)
+        return run.input_data
+
+    async def aadvance(self, run: PipelineRun):
+        """Awaits the current stage group of a run and applies the resulting transition."""
+        group = run.get_current_group()
+        if not group:
+            return
+        if len(group) == 1:
+            results = [await self._arun_stage(run.pipeline, group[0], run.input_data)]
+        else:
+            results = await asyncio.gather(
+                *[
+                    self._arun_stage(run.pipeline, stage, run.input_data.fork())
+                    for stage in group
+                ]
+            )
+        self.complete_group(run, group, list(results))
+
+    def advance(self, run: PipelineRun):
+        """Runs the current stage group of a run and applies the resulting transition."""
+        group = run.get_current_group()
+        if not group:
+            return
+        if len(group) == 1:
+            results = [self._run_stage(run.pipeline, group[0], run.input_data)]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="PipelineEngine"
+                )
+            futures = [
+                self._executor.submit(
+                    self._run_stage, run.pipeline, stage, run.input_data.fork()
+                )
+                for stage in group
+            ]
+            results = [future.result() for future in futures]
+        self.complete_group(run, group, results)
+
+    def complete_group(
+        self,
+        run: PipelineRun,
+        group: tuple[PipelineStage, ...],
+        results: list[tuple[CLIMData, float]],
+    ):
+        """
+        Merges the results of a stage group into the run and applies the transition.
+
+        :param run: The run the group belongs to.
+        :param group: The stages of the group.
+        :param results: The tuple (processed input data, duration in seconds) of each stage.
+        """
+        decisions = []
+        for stage, (data, duration) in zip(group, results):
+            if data is not run.input_data:
+                run.input_data.merge(data)
+            decision_name = data.get_last_decision()
+            run.input_data.add_stage_timing(
+                run.pipeline.name, stage.name, stage.layer, duration, decision_name
+            )
+            decisions.append(
+                (stage, data, Decision.parse_translated_decision(decision_name))
+            )
+
+        # The first stage whose decision has a transition decides, else the last stage
+        target = None
+        deciding = decisions[-1]
+        for stage, data, decision in decisions:
+            transition = run.pipeline.get_transition(stage, decision)
+            if transition is not None and transition not in run.visited:
+                target, deciding = transition, (stage, data, decision)
+                break
+        _, data, _ = deciding
+        run.input_data.set_last_response(data.get_last_response())
+        run.input_data.set_last_decision(data.get_last_decision())
+
+        if target == CompiledPipeline.END:
+            skipped = run.pipeline.count_stages_after(run.group_index)
+            if skipped > 0:
+                self.protocol.info(
+                    f"Pipeline {run.pipeline.name}: decision {deciding[2]} of {deciding[0].name} ends the run, {skipped} stage(s) skipped."
+                )
+            run.finish()
+        elif target is not None:
+            self.protocol.info(
+                f"Pipeline {run.pipeline.name}: decision {deciding[2]} switches to pipeline {target}."
+            )
+            run.switch_to(self.get_pipeline(target))
+        else:
+            run.next_group()
+
+        with self._statistics_lock:
+            self._statistics["stages"] += len(group)
+            if run.finished:
+                self._statistics["runs"] += 1
+                self._statistics["skipped_stages"] += run.skipped_stages
+        if run.finished:
+            run.input_data.set_skipped_stages(run.skipped_stages)
+
+    def _get_layer(self, pipeline: CompiledPipeline, stage: PipelineStage):
+        layer = self.layers.get(stage.layer)
+        if layer is None:
+            raise KeyError(
+                f"Pipeline {pipeline.name} uses the unknown layer {stage.layer}."
+            )
+        return layer
+
+    async def _arun_stage(
+        self, pipeline: CompiledPipeline, stage: PipelineStage, input_data: CLIMData
+    ):
+        layer = self._get_layer(pipeline, stage)
+        started = time.perf_counter()
+        output_data = await layer.aprocess(type=stage.type, input_data=input_data)
+        return output_data, time.perf_counter() - started
+
+    def _run_batch(self, items: list[tuple[PipelineRun, PipelineStage, CLIMData]]):
+        """
+        Processes the inputs of one (type, layer) stage of several runs.
+
+        :return: The tuple (processed input data in item order, duration of the batch in seconds).
+        """
+        run, stage, _ = items[0]
+        layer = self._get_layer(run.pipeline, stage)
+        input_datas = [input_data for _, _, input_data in items]
+        started = time.perf_counter()
+        if len(items) > 1 and hasattr(layer, "process_many"):
+            output_datas = layer.process_many(type=stage.type, input_datas=input_datas)
+        else:
+            output_datas = [
+                layer.process(type=stage.type, input_data=input_data)
+                for input_data in input_datas
+            ]
+        return output_datas, time.perf_counter() - started
+
+    def _run_stage(
+        self, pipeline: CompiledPipeline, stage: PipelineStage, input_data: CLIMData
+    ):
+        layer = self._get_layer(pipeline, stage)
+        started = time.perf_counter()
+        output_data = layer.process(type=stage.type, input_data=input_data)
+        return output_data, time.perf_counter() - started
@@ -0,0 +1,47 @@
+from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.compiled_pipeline import CompiledPipeline
+from ethos_ai.clim.pipeline_stage import PipelineStage
+
+
+class PipelineRun:
+    """
+    The state of one input on its way through the pipelines.
+
+    The run knows the current pipeline and stage group, the pipelines it has entered, the
+    number of stages it skipped by leaving a pipeline early and whether it has finished. The engine advances it group by group, so several runs can be
+    advanced side by side.
+    """
+
+    def __init__(self, pipeline: CompiledPipeline, input_data: CLIMData):
+        self.input_data: CLIMData = input_data
+        self.pipeline: CompiledPipeline = pipeline
+        self.group_index: int = 0
+        self.visited: list[str] = [pipeline.name]
+        self.finished: bool = len(pipeline.groups) == 0
+        self.skipped_stages: int = 0
+
+    def get_current_group(self) -> tuple[PipelineStage, ...]:
+        """Returns the stages to run next, an empty tuple if the run has finished."""
+        if self.finished:
+            return ()
+        return self.pipeline.groups[self.group_index]
+
+    def switch_to(self, pipeline: CompiledPipeline):
+        """Continues with the first group of another pipeline."""
+        self.skipped_stages += self.pipeline.count_stages_after(self.group_index)
+        self.pipeline = pipeline
+        self.group_index = 0
+        self.visited.append(pipeline.name)
+        self.finished = len(pipeline.groups) == 0
+
+    def next_group(self):
+        """Continues with the next group of the current pipeline, or finishes the run."""
+        self.group_index += 1
+        if self.group_index >= len(self.pipeline.groups):
+            self.finished = True
+
+    def finish(self):
+        """Ends the run, skipping the remaining groups of the current pipeline."""
+        if not self.finished:
+            self.skipped_stages += self.pipeline.count_stages_after(self.group_index)
+        self.finished = True
@@ -0,0 +1,61 @@
+from ethos_ai.clim.decision import Decision
+
+
+class PipelineStage:
+    """
+    A compiled stage of a pipeline: one call of a CLIM layer with a processing type.
+
+    Stage transitions map decisions of this stage to a pipeline name or "end" and take
+    precedence over the transitions of the pipeline. Terminal decisions of a stage end the
+    processing right after the stage.
+    """
+
+    END = "end"
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        layer: str,
+        transitions: dict[Decision, str] = None,
+    ):
+        self.name: str = name
+        self.type: str = type
+        self.layer: str = layer
+        self.transitions: dict[Decision, str] = transitions or {}
+
+    @staticmethod
+    def from_definition(definition: dict) -> "PipelineStage":
+        """
+        Compiles a stage definition, e.g. {"type": "prerun", "layer": "ETHIC"}.
+
+        :param definition: The stage definition with type, layer and optional name, transitions
+            and terminal_decisions.
+        :raises KeyError: If the definition has no type or layer, or uses an unknown decision.
+        """
+        layer = definition["layer"].upper()
+        type = definition["type"]
+        return PipelineStage(
+            name=definition.get("name", f"{type}_{layer}".lower()),
+            type=type,
+            layer=layer,
+            transitions=PipelineStage.compile_transitions(definition),
+        )
+
+    @staticmethod
+    def compile_transitions(definition: dict) -> dict[Decision, str]:
+        """
+        Compiles the transitions and terminal decisions of a stage or pipeline definition.
+
+        A terminal decision is a transition to "end"; explicit transitions take precedence.
+        """
+        transitions = {
+            Decision[decision]: PipelineStage.END
+            for decision in definition.get("terminal_decisions", [])
+        }
+        for decision, target in definition.get("transitions", {}).items():
+            transitions[Decision[decision]] = target
+        return transitions
+
+    def __repr__(self):
+        return f"PipelineStage({self.name})"
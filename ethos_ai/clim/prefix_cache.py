@@ -0,0 +1,65 @@
+from threading import RLock
+
+
+class PrefixCache:
+    """
+    Caches the encoded state (`past_key_values`) of static prompt prefixes.
+
+    Every prompt of a template starts with the same instruction text, only the input slot
+    changes. The state of the encoded prefix is computed once and reused by every generation
+    that starts with this prefix.
+
+    Entries are keyed by template key, model identity and model version. Whenever the weights
+    of a model change, its version changes and all entries of older versions are dropped.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._entries = {}
+
+    def get(self, template_key: str, model_identity: str, model_version: int):
+        """
+        Returns the cached (prefix token ids, past key values) tuple or None.
+
+        :param template_key: The key of the prompt template (e.g. PRERUN_ETHIC).
+        :param model_identity: The identity of the model the state was computed with.
+        :param model_version: The version of the model weights.
+        """
+        with self._lock:
+            return self._entries.get((template_key, model_identity, model_version))
+
+    def put(
+        self,
+        template_key: str,
+        model_identity: str,
+        model_version: int,
+        prefix_ids: list[int],
+        past_key_values,
+    ):
+        """Stores the encoded state of a template prefix."""
+        with self._lock:
+            self._entries[(template_key, model_identity, model_version)] = (
+                prefix_ids,
+                past_key_values,
+            )
+
+    def invalidate(self, model_identity: str, current_version: int = None):
+        """
+        Drops the entries of a model, except those of the current version if given.
+
+        :param model_identity: The identity of the model whose entries are dropped.
+        :param current_version: The version whose entries are kept.
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if key[1] == model_identity and key[2] != current_version:
+                    del self._entries[key]
+
+    def clear(self):
+        """Drops all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
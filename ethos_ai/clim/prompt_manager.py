@@ -33,13 +33,22 @@ class PromptManager:
         for key in keys:
             self.prompts[key] = Translations.translate(key, "{}", "{}")
 
+    def get_prompt_key(self, type: str, layer_name: str) -> str:
+        return f"{type.upper()}_{layer_name.upper()}"
+
     def get_prompt(self, type: str, layer_name: str, input_data):
-        prompt_key = f"{type.upper()}_{layer_name.upper()}"
-        prompt = self.prompts.get(prompt_key)
+        prompt = self.prompts.get(self.get_prompt_key(type, layer_name))
         if prompt:
             return prompt.format(input_data, self.decisions)
         return None
 
+    def get_prompt_prefix(self, type: str, layer_name: str):
+        """Liefert den statischen Text vor dem Eingabefeld eines Prompts (gleich für alle Eingaben)."""
+        prompt = self.prompts.get(self.get_prompt_key(type, layer_name))
+        if prompt:
+            return prompt.split("{}", 1)[0].rstrip()
+        return None
+
     def get_error_prompt(self, reason, input_data):
         prompt = self.prompts.get("INTERNAL_ERROR")
         if prompt:
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from threading import RLock
+
+
+class ResponseCache:
+    """
+    LRU cache of generated responses.
+
+    Local generation is greedy, so the same prompt on the same weights always gives the same
+    response. Entries are keyed by layer name, prompt and generation parameters, and only hit
+    for the identity of the model weights they were generated with. They are evicted when the cache is full (least recently used first) or
+    when they are older than the time to live. The cache can be saved to and loaded from a
+    JSON file.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, ttl: float = None, persist_path: str = None
+    ):
+        """
+        Initializes the response cache and loads the persisted entries if available.
+
+        :param max_entries: The maximum number of cached responses.
+        :param ttl: The time to live of an entry in seconds, None keeps entries until evicted.
+        :param persist_path: Optional JSON file the cache is saved to and loaded from.
+        """
+        self._lock = RLock()
+        self._entries: OrderedDict[str, tuple[str, float, str]] = OrderedDict()
+        self.max_entries: int = max_entries
+        self.ttl: float = ttl
+        self.persist_path: str = persist_path
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        if persist_path and os.path.isfile(persist_path):
+            self.load()
+
+    @staticmethod
+    def create_key(layer_name: str, prompt: str, generation_parameters: dict) -> str:
+        """Returns the cache key of a prompt generated by a layer."""
+        return hashlib.sha256(
+            json.dumps(
+                [layer_name, prompt, generation_parameters], sort_keys=True
+            ).encode()
+        ).hexdigest()
+
+    def _is_expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str, weights_id: str):
+        """Returns the response cached for the given weights or None, and counts the hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != weights_id:
+                entry = None
+            elif entry is not None and self._is_expired(entry[1]):
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, response: str, weights_id: str):
+        """Stores a response, evicting the least recently used entries if the cache is full."""
+        with self._lock:
+            self._entries[key] = (weights_id, time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, current_weights_id: str):
+        """Drops all entries generated with other weights than the current ones."""
+        with self._lock:
+            for key in [
+                key
+                for key, entry in self._entries.items()
+                if entry[0] != current_weights_id
+            ]:
+                del self._entries[key]
+
+    def rebind(self, weights_id: str, new_weights_id: str):
+        """Assigns the entries of unchanged weights that got a new identity (e.g. when saved)."""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry[0] == weights_id:
+                    self._entries[key] = (new_weights_id, *entry[1:])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self) -> dict:
+        """Returns the number of entries, hits, misses, evictions and the hit rate."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0,
+            }
+
+    def save(self):
+        """Saves the entries that have not expired to the persist path."""
+        if not self.persist_path:
+            return
+        with self._lock:
+            entries = [
+                [key, *entry]
+                for key, entry in self._entries.items()
+                if not self._is_expired(entry[1])
+            ]
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        # Layers save on the training and the residency thread, each save has its own file
+        temp_path = f"{self.persist_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(entries, file)
+        os.replace(temp_path, self.persist_path)
+
+    def load(self):
+        """Loads the persisted entries that have not expired, in least recently used order."""
+        with open(self.persist_path, "r") as file:
+            entries = json.load(file)
+        with self._lock:
+            for key, weights_id, created, response in entries:
+                if not self._is_expired(created):
+                    self._entries[key] = (weights_id, created, response)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
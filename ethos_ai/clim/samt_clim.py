@@ -1,6 +1,3 @@
-import torch
-import torch.nn as nn
-
 from ethos_ai.clim.base_clim import BaseCLIM
 from ethos_ai.security.securied_identity_card import SecuredIdentityCard
 from ethos_ai.tool.tool_manager import ToolManager
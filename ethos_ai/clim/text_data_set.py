@@ -1,9 +1,25 @@
+import numpy as np
+import torch
 from torch.utils.data import DataLoader, Dataset
 
+from ethos_ai.clim.data_collator import DynamicPaddingCollator
+from ethos_ai.clim.length_bucket_sampler import LengthBucketSampler
+from ethos_ai.clim.tokenized_corpus_cache import TokenizedCorpusCache
+from ethos_ai.clim.training_corpus import TrainingCorpus
+
 
 class TextDataset(Dataset):
-    def __init__(self, text_list, tokenizer, block_size=512):
+    def __init__(
+        self,
+        text_list,
+        tokenizer,
+        block_size=512,
+        corpus_cache: TokenizedCorpusCache = None,
+    ):
         self.examples = []
+        # Flat token ids and offsets index, set if the samples are read from the corpus cache
+        self._ids: np.ndarray = None
+        self._offsets: np.ndarray = None
         # Add padding token if not present
         if tokenizer.pad_token is None:
             tokenizer.add_special_tokens(
@@ -14,18 +30,46 @@ class TextDataset(Dataset):
                 }
             )
             print("Pad Token:" + tokenizer.pad_token)
+        self.pad_token_id = tokenizer.pad_token_id
+        if (
+            corpus_cache is not None
+            and isinstance(text_list, TrainingCorpus)
+            and text_list.sources
+        ):
+            self._ids, self._offsets = corpus_cache.get_token_ids(
+                text_list, tokenizer, block_size
+            )
+            return
+        # Sequences keep their own length, padding is added per batch by the collator
         for text in text_list:
             tokenized_text = tokenizer(
                 text,
                 truncation=True,
                 max_length=block_size,
-                padding="max_length",  # Add padding to make all sequences the same length
                 return_tensors="pt",
             )
-            self.examples.append(tokenized_text.input_ids.squeeze())
+            self.examples.append(tokenized_text.input_ids.squeeze(0))
 
     def __len__(self):
+        if self._offsets is not None:
+            return len(self._offsets) - 1
         return len(self.examples)
 
     def __getitem__(self, i):
+        if self._offsets is not None:
+            # A view on the memory-mapped ids, no copy
+            return torch.from_numpy(self._ids[self._offsets[i] : self._offsets[i + 1]])
         return self.examples[i]
+
+    def lengths(self) -> list[int]:
+        if self._offsets is not None:
+            return np.diff(self._offsets).tolist()
+        return [len(example) for example in self.examples]
+
+    def create_data_loader(self, batch_size: int, shuffle: bool = True) -> DataLoader:
+        """Returns a loader of length-bucketed, dynamically padded batches."""
+        return DataLoader(
+            self,
+            batch_sampler=LengthBucketSampler(self.lengths(), batch_size, shuffle),
+            collate_fn=DynamicPaddingCollator(self.pad_token_id),
+        )
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from threading import Lock, RLock
+
+import numpy as np
+
+from ethos_ai.clim.training_corpus import TrainingCorpus
+from ethos_ai.util.protocol import Protocol
+
+
+class TokenizedCorpusCache:
+    """
+    On-disk cache of tokenized training corpora.
+
+    The token ids of a layer's corpus are stored in one flat array plus an offsets index
+    (sample i is ids[offsets[i]:offsets[i + 1]]), memory-mapped on load. Arrays are keyed by
+    tokenizer identity, block size and the content hashes of the source files.
+    Each source file is tokenized once into a shard; when files change, only the changed
+    files are tokenized again and the flat array is rebuilt from the shards.
+    Each entry is a directory with both arrays, written under a unique temporary name and
+    renamed when complete, so readers never see torn arrays or ids and offsets of different
+    writes. Caches of the same directory share one lock.
+    """
+
+    TEMP_PREFIX = ".tmp-"
+
+    _locks: dict[str, RLock] = {}
+    _locks_lock = Lock()
+
+    def __init__(self, cache_dir: str):
+        self.protocol = Protocol()
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with TokenizedCorpusCache._locks_lock:
+            self._lock = TokenizedCorpusCache._locks.setdefault(
+                os.path.realpath(cache_dir), RLock()
+            )
+
+    @staticmethod
+    def get_tokenizer_identity(tokenizer) -> str:
+        special_tokens = json.dumps(tokenizer.special_tokens_map, sort_keys=True)
+        return f"{type(tokenizer).__name__}:{tokenizer.name_or_path}:{len(tokenizer)}:{special_tokens}"
+
+    @staticmethod
+    def _hash(*parts) -> str:
+        return hashlib.sha256(
+            "\n".join(str(part) for part in parts).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def _paths(entry_dir: str) -> tuple[str, str]:
+        return (
+            os.path.join(entry_dir, "ids.npy"),
+            os.path.join(entry_dir, "offsets.npy"),
+        )
+
+    def _load(self, key: str):
+        ids_path, offsets_path = self._paths(os.path.join(self.cache_dir, key))
+        if not os.path.exists(offsets_path):
+            return None
+        # Copy-on-write mapping: zero-copy reads, tensors may be created from it without copying
+        return np.load(ids_path, mmap_mode="c"), np.load(offsets_path)
+
+    def _store(self, key: str, ids: np.ndarray, offsets: np.ndarray):
+        temp_dir = os.path.join(
+            self.cache_dir, f"{TokenizedCorpusCache.TEMP_PREFIX}{uuid.uuid4().hex}"
+        )
+        os.makedirs(temp_dir)
+        for path, array in zip(self._paths(temp_dir), (ids, offsets)):
+            with open(path, "wb") as file:
+                np.save(file, array)
+        try:
+            os.rename(temp_dir, os.path.join(self.cache_dir, key))
+        except OSError:
+            # Another process stored the entry first, its arrays are the same
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _tokenize(self, texts: list[str], tokenizer, block_size: int):
+        token_ids = [
+            tokenizer(text, truncation=True, max_length=block_size)["input_ids"]
+            for text in texts
+        ]
+        offsets = np.zeros(len(token_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in token_ids])
+        ids = np.fromiter(
+            (token for ids in token_ids for token in ids),
+            dtype=np.int32,
+            count=int(offsets[-1]),
+        )
+        return ids, offsets
+
+    def get_token_ids(self, corpus: TrainingCorpus, tokenizer, block_size: int):
+        """
+        Returns the flat token ids and the offsets index of the corpus.
+
+        :param corpus: The training corpus of one layer, with its source files.
+        :param tokenizer: The tokenizer of the model to train.
+        :param block_size: The maximum number of tokens per sample.
+        :return: The tuple (ids, offsets), ids memory-mapped from the cache.
+        """
+        tokenizer_identity = self.get_tokenizer_identity(tokenizer)
+        # A file contributes different texts to different layers, the shard key covers both
+        shard_keys = [
+            self._hash(tokenizer_identity, block_size, content_hash, *corpus[start:end])
+            for _, content_hash, start, end in corpus.sources
+        ]
+        key = self._hash(*shard_keys)
+        with self._lock:
+            cached = self._load(key)
+            if cached is not None:
+                return cached
+
+            shard_ids, shard_offsets = [], [np.zeros(1, dtype=np.int64)]
+            total = 0
+            for (path, _, start, end), shard_key in zip(corpus.sources, shard_keys):
+                shard = self._load(shard_key)
+                if shard is None:
+                    self.protocol.info(f"Tokenizing training data of {path}.")
+                    shard = self._tokenize(corpus[start:end], tokenizer, block_size)
+                    self._store(shard_key, *shard)
+                ids, offsets = shard
+                shard_offsets.append(offsets[1:] + total)
+                shard_ids.append(np.asarray(ids))
+                total += len(ids)
+            ids = (
+                np.concatenate(shard_ids) if shard_ids else np.zeros(0, dtype=np.int32)
+            )
+            self._store(key, ids, np.concatenate(shard_offsets))
+            return self._load(key)
@@ -1,10 +1,18 @@
 import os
 import json
+import hashlib
 from collections import defaultdict
+from threading import Lock
+
+from ethos_ai.clim.training_corpus import TrainingCorpus
 
 
 class TrainListGenerator:
 
+    # Parsed test case files by content hash, unchanged files are not parsed again
+    _parsed_files: dict[str, dict[str, list[str]]] = {}
+    _parsed_files_lock = Lock()
+
     @staticmethod
     def load_test_cases(test_case_file: str) -> dict[str, list[str]]:
         try:
@@ -44,26 +52,49 @@ class TrainListGenerator:
             raise Exception(f"Error loading test cases from {test_case_file}: {e}")
 
     @staticmethod
-    def load_test_cases_from_directory(directory: str) -> dict[str, list[str]]:
+    def _load_test_cases_cached(
+        test_case_file: str,
+    ) -> tuple[str, dict[str, list[str]]]:
+        """Returns the content hash and the test cases of a file, parsing it only if it changed."""
+        with open(test_case_file, "rb") as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        with TrainListGenerator._parsed_files_lock:
+            test_cases = TrainListGenerator._parsed_files.get(content_hash)
+        if test_cases is None:
+            test_cases = TrainListGenerator.load_test_cases(test_case_file)
+            with TrainListGenerator._parsed_files_lock:
+                TrainListGenerator._parsed_files[content_hash] = test_cases
+        return content_hash, test_cases
+
+    @staticmethod
+    def load_test_cases_from_directory(directory: str) -> dict[str, TrainingCorpus]:
+        """
+        Loads the test cases of all test_case_*.json files of a directory by layer.
+
+        The texts of each layer are returned as a TrainingCorpus, which remembers the
+        content hash of every source file so the tokenized corpus cache can skip unchanged files.
+        """
         try:
             # Check if the directory exists
             if not os.path.isdir(directory):
                 raise FileNotFoundError(f"The directory '{directory}' does not exist.")
 
-            combined_layer_dict = defaultdict(list)
-            # Loop through all files in the directory
-            for filename in os.listdir(directory):
+            combined_layer_dict = defaultdict(TrainingCorpus)
+            # Loop through all files in the directory, in a stable order
+            for filename in sorted(os.listdir(directory)):
                 # Check if the file matches the pattern 'test_case_xxx.json'
                 if filename.startswith("test_case_") and filename.endswith(".json"):
                     test_case_file = os.path.join(directory, filename)
                     # Load and append test cases from each file
                     try:
-                        file_layer_dict = TrainListGenerator.load_test_cases(
-                            test_case_file
+                        content_hash, file_layer_dict = (
+                            TrainListGenerator._load_test_cases_cached(test_case_file)
                         )
                         # Merge the dictionaries by layer
                         for layer, test_list in file_layer_dict.items():
-                            combined_layer_dict[layer].extend(test_list)
+                            combined_layer_dict[layer].extend_from_source(
+                                test_case_file, content_hash, test_list
+                            )
                     except Exception as e:
                         raise Exception(f"Error processing file {filename}: {e}")
 
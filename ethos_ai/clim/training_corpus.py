@@ -0,0 +1,21 @@
+class TrainingCorpus(list):
+    """
+    The training texts of one CLIM layer, together with the files they were loaded from.
+
+    It behaves like the plain list of texts. Each source is a tuple
+    (file path, content hash, start index, end index) of the texts loaded from that file,
+    which lets the tokenized corpus cache reuse the token ids of unchanged files.
+    """
+
+    def __init__(self, texts=None, sources: list[tuple[str, str, int, int]] = None):
+        super().__init__(texts or [])
+        self.sources: list[tuple[str, str, int, int]] = sources or []
+
+    def extend_from_source(self, path: str, content_hash: str, texts: list[str]):
+        """Appends the texts loaded from one source file."""
+        start = len(self)
+        self.extend(texts)
+        self.sources.append((path, content_hash, start, len(self)))
+
+    def get_content_hashes(self) -> list[str]:
+        return [content_hash for _, content_hash, _, _ in self.sources]
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from ethos_ai.state.priority import Priority
+
+
+class TrainingJob:
+    """
+    A queued layer training run of the TrainingScheduler.
+
+    The job tracks its state (queued, running, done, failed or cancelled) and the progress
+    reported by the training loop.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, name: str, target, priority: Priority, sequence: int):
+        self.name: str = name
+        self.target = target
+        self.priority: Priority = priority
+        self.sequence: int = sequence
+        self.state: str = TrainingJob.QUEUED
+        self.progress: float = 0.0
+        self.error: Exception = None
+        self.submitted_at: float = time.time()
+        self.started_at: float = None
+        self.finished_at: float = None
+        self._lock = threading.Lock()
+
+    def __lt__(self, other: "TrainingJob") -> bool:
+        # Higher priority first (lower priority value), then first come first served
+        return (self.priority.priority, self.sequence) < (
+            other.priority.priority,
+            other.sequence,
+        )
+
+    def report_progress(self, progress: float):
+        """Sets the progress of the job, a fraction between 0 and 1."""
+        with self._lock:
+            self.progress = min(max(progress, 0.0), 1.0)
+
+    def is_finished(self) -> bool:
+        return self.state in (
+            TrainingJob.DONE,
+            TrainingJob.FAILED,
+            TrainingJob.CANCELLED,
+        )
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "priority": self.priority.name,
+                "progress": self.progress,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": str(self.error) if self.error else None,
+            }
@@ -0,0 +1,110 @@
+import heapq
+import os
+import threading
+import time
+
+from ethos_ai.clim.training_job import TrainingJob
+from ethos_ai.state.priority import Priority
+from ethos_ai.util.protocol import Protocol
+
+
+class TrainingScheduler:
+    """
+    Runs layer training jobs with bounded concurrency.
+
+    Jobs are queued by priority and run on at most max_concurrent_jobs worker threads. Every
+    running job gets threads_per_job intra-op threads (torch.set_num_threads), by default the
+    CPU cores divided by the number of concurrent jobs, so concurrent jobs do not oversubscribe
+    the cores. Worker threads are started on demand and end when the queue is empty.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = 1, threads_per_job: int = None):
+        self.protocol = Protocol()
+        self.max_concurrent_jobs: int = max(1, max_concurrent_jobs)
+        self.threads_per_job: int = threads_per_job or max(
+            1, (os.cpu_count() or 1) // self.max_concurrent_jobs
+        )
+        self._lock = threading.Lock()
+        self._queue: list[TrainingJob] = []
+        self._running: list[TrainingJob] = []
+        self._workers: int = 0
+        self._sequence: int = 0
+
+    def submit(self, name: str, target, priority: Priority = Priority.NORMAL):
+        """
+        Queues a training job.
+
+        :param name: The name of the job, usually the layer name.
+        :param target: The training function, called with the job to report progress.
+        :param priority: The priority of the job, higher priorities run first.
+        :return: The queued TrainingJob.
+        """
+        with self._lock:
+            self._sequence += 1
+            job = TrainingJob(name, target, priority, self._sequence)
+            heapq.heappush(self._queue, job)
+            start_worker = self._workers < self.max_concurrent_jobs
+            if start_worker:
+                self._workers += 1
+        self.protocol.info(f"Training job {name} queued with priority {priority}.")
+        if start_worker:
+            threading.Thread(
+                target=self._work, name=f"TrainingScheduler-{self._sequence}"
+            ).start()
+        return job
+
+    def cancel(self, job: TrainingJob) -> bool:
+        """Removes a job from the queue. Returns False if the job is not queued anymore."""
+        with self._lock:
+            if job not in self._queue:
+                return False
+            self._queue.remove(job)
+            heapq.heapify(self._queue)
+            job.state = TrainingJob.CANCELLED
+            job.finished_at = time.time()
+        self.protocol.info(f"Training job {job.name} removed from the queue.")
+        return True
+
+    def get_queue_position(self, job: TrainingJob) -> int:
+        """Returns the 1-based position of a queued job, 0 if it is not queued."""
+        with self._lock:
+            if job not in self._queue:
+                return 0
+            return sorted(self._queue).index(job) + 1
+
+    def get_status(self) -> dict:
+        """Returns the running and queued jobs in execution order."""
+        with self._lock:
+            return {
+                "running": [job.to_dict() for job in self._running],
+                "queued": [job.to_dict() for job in sorted(self._queue)],
+            }
+
+    def _work(self):
+        import torch
+
+        torch.set_num_threads(self.threads_per_job)
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._workers -= 1
+                    return
+                job = heapq.heappop(self._queue)
+                job.state = TrainingJob.RUNNING
+                job.started_at = time.time()
+                self._running.append(job)
+            self.protocol.info(
+                f"Training job {job.name} started with {self.threads_per_job} threads."
+            )
+            try:
+                job.target(job)
+                job.state = TrainingJob.DONE
+                job.report_progress(1.0)
+            except Exception as e:
+                self.protocol.error(f"Training job {job.name} failed: {str(e)}")
+                job.error = e
+                job.state = TrainingJob.FAILED
+            finally:
+                job.finished_at = time.time()
+                with self._lock:
+                    self._running.remove(job)
@@ -1,7 +1,3 @@
-import torch
-import torch.nn as nn
-
-
 class EthicsDomain:
     def __init__(self, name, threshold, importance):
         self.name = name
@@ -15,6 +11,8 @@ class EthicsDomain:
         return evaluated_value
 
     def get_mean(self, gpt_output):
+        import torch
+
         # Ensure the tensor is a floating point type
         if isinstance(gpt_output, torch.Tensor):
             if gpt_output.dtype != torch.float32 and gpt_output.dtype != torch.float64:
@@ -30,6 +28,8 @@ class EthicsDomain:
             return logits.mean()
 
     def calculate_score(self, gpt_output):
+        import torch
+
         mean_logit = self.get_mean(gpt_output)
         normalized_score = torch.sigmoid(mean_logit)
         return normalized_score
@@ -5,24 +5,71 @@ from ethos_ai.util.translate import Translations
 
 
 class EthicsModule(nn.Module):
+    """
+    Evaluates model outputs in all ethics domains at once.
+
+    The thresholds and importances of the domains are packed into tensors, the symmetric
+    ethic values of all domains (see EthicsDomain) are computed in one vectorized operation,
+    for a single output or a batch of outputs.
+    """
+
     def __init__(self, domains):
         super(EthicsModule, self).__init__()
         self.domains = domains
         self.aggregator = nn.Sequential(
             nn.Linear(len(domains), 64), nn.ReLU(), nn.Linear(64, 1)
         )
+        thresholds = torch.tensor(
+            [domain.threshold for domain in domains], dtype=torch.float64
+        )
+        self.register_buffer("thresholds", thresholds, persistent=False)
+        # Value of a score of 1.0 before the importance, as in EthicsDomain
+        self.register_buffer(
+            "threshold_scales", 1.0 - thresholds.clamp(max=0.99), persistent=False
+        )
+        self.register_buffer(
+            "importances",
+            torch.tensor(
+                [domain.importance for domain in domains], dtype=torch.float64
+            ),
+            persistent=False,
+        )
+
+    @staticmethod
+    def _as_tensor(gpt_output) -> torch.Tensor:
+        # Outputs of a model call carry the tensor in their logits
+        if not isinstance(gpt_output, torch.Tensor):
+            gpt_output = gpt_output.logits
+        if not gpt_output.is_floating_point():
+            gpt_output = gpt_output.float()
+        return gpt_output
+
+    def evaluate_batch(self, gpt_outputs) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Evaluates a batch of outputs in all domains.
+
+        :param gpt_outputs: A tensor (or model output with logits) whose first dimension is the
+            batch; each output is scored by the mean over its remaining dimensions.
+        :return: The ethic values of the domains (batch x domains) and the overall ethic values
+            (batch).
+        """
+        gpt_outputs = EthicsModule._as_tensor(gpt_outputs)
+        scores = torch.sigmoid(gpt_outputs.reshape(gpt_outputs.shape[0], -1).mean(1))
+        domain_ethic_values = (
+            (scores.double().unsqueeze(1) - self.thresholds)
+            / self.threshold_scales
+            * 10
+            * self.importances
+        )
+        return domain_ethic_values, domain_ethic_values.sum(1)
 
     def forward(self, gpt_output, original_input):
-        domain_scores = []
-        domain_ethic_values = []
-        for domain in self.domains:
-            ethic_value = domain.evaluate(gpt_output)
-            domain_ethic_values.append(ethic_value)
-            domain_scores.append(torch.tensor(ethic_value))
-
-        domain_scores = torch.stack(domain_scores).unsqueeze(0)
-        overall_score = self.aggregator(domain_scores)
-        overall_ethic_value = sum(domain_ethic_values)
+        # A single output is scored by the mean over all of its elements
+        domain_ethic_values, overall_ethic_values = self.evaluate_batch(
+            EthicsModule._as_tensor(gpt_output).reshape(1, -1)
+        )
+        domain_ethic_values = domain_ethic_values[0].tolist()
+        overall_ethic_value = overall_ethic_values[0].item()
 
         decision = "GO" if overall_ethic_value > 0 else "NO GO"
         summary_reason = self.generate_summary(domain_ethic_values, decision)
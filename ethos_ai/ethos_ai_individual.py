@@ -12,7 +12,6 @@ from ethos_ai.tool.tool_manager import ToolManager
 from ethos_ai.util.protocol import Protocol
 from ethos_ai.process_model import ProcessModel
 from ethos_ai.ethic.ethics_domains import EthicsDomains
-from ethos_ai.ethic.ethics_module import EthicsModule
 from ethos_ai.simulation.simulation_grid import SimulationsGrid
 from enum import Enum
 
@@ -37,6 +36,9 @@ class EthosAIIndividual:
             security_level=SecurityLevel.LOW,
             responsible="Advisor",
         )
+        # The ethics module is a torch module, torch loads when the life is initialized
+        from ethos_ai.ethic.ethics_module import EthicsModule
+
         self.ethic_module = EthicsModule(EthicsDomains.get_domains())
         self.clim: CLIM = CLIM(
             identity_card=self.identity, password="123", tool_manager=self.tool_manager
@@ -3,16 +3,15 @@ import time
 
 from ethos_ai.clim.clim_interface import CLIMInterface
 from ethos_ai.clim.train_list_generator import TrainListGenerator
-from ethos_ai.clim.training_status import TrainingStatus
 from ethos_ai.ethic.ethics import Ethics
 from ethos_ai.state.phase import Phase
 from ethos_ai.state.process_phase import ProcessPhase, ProcessPhaseDetails
 from ethos_ai.task.task import Task
+from ethos_ai.simulation.evaluation_engine import EvaluationEngine
 from ethos_ai.simulation.simulation_grid import SimulationsGrid
 from ethos_ai.state.priority import Priority
 from ethos_ai.topic.aspiration_topic import AspirationTopic
 from ethos_ai.topic.to_do_topic import ToDoTopic
-from ethos_ai.util.data_handler import DataHandler
 from ethos_ai.util.protocol import Protocol
 from ethos_ai.util.translate import Translations
 
@@ -165,14 +164,13 @@ class ProcessModel:
         train_data = TrainListGenerator.load_test_cases_from_directory("test_data")
         self._life_imagination.start_training_async(train_data)
 
-        status_all = None
-        while (status_all := self._life_imagination.get_training_status()) and not all(
-            status
-            in [TrainingStatus.NONE, TrainingStatus.STOPPED, TrainingStatus.FAILED]
-            for status in status_all.values()
-        ):
-            time.sleep(10)
-            self.protocol.info(f"Training status: {status_all}")
+        if not self._life_imagination.wait_for_training(stop_event=self._stop_event):
+            self.protocol.info("Integration of experiences interrupted, stopping...")
+            self._life_imagination.request_cancellation_of_training()
+            return None
+        self.protocol.info(
+            f"Training status: {self._life_imagination.get_training_status()}"
+        )
 
         # Step 2: Persist the model(s)
         # self._life_imagination.persist_model()
@@ -180,63 +178,16 @@ class ProcessModel:
         # Step 3: Restart the CLIM
         # self.life_imagination.restart()
 
-        # Step 4: Test the trained layers on the test cases
+        # Step 4: Test the trained layers on the test cases, the results are
+        # written to the Markdown exports while the layers are evaluated
         self.protocol.info("Training completed.")
-
-        # Store the test results for each layer and compare with expected results
-        test_results: dict[str, list[dict[str, any]]] = {}
-
-        for layer_name, data in train_data.items():
-            test_results[layer_name] = []
-            for request in data:
-                scenario = TrainListGenerator.get_scenario_description(request)
-                expected_decision = TrainListGenerator.get_decision(request)
-                expected_response = TrainListGenerator.get_output(request)
-                expected_analysis = TrainListGenerator.get_analysis(request)
-                type = (
-                    "prerun" if layer_name in ["ETHIC", "INDIVIDUAL", "SAMT"] else "all"
-                )
-                layer_result = self.layer_request(type, layer_name, scenario)
-                layer_response = layer_result.get("response")
-                layer_decision = layer_result.get("decision")
-                layer_score = self.evaluate_clim_output(
-                    layer_decision, expected_decision
-                )
-                # Append the result for the current test case
-                test_results[layer_name].append(
-                    {
-                        "Scenario": scenario,
-                        "Score": layer_score,
-                        "Response": layer_response,
-                        "Expected Response": expected_response
-                        + "\n"
-                        + expected_analysis,
-                        "Decision": layer_decision,
-                        "Expected Decision": expected_decision,
-                    }
-                )
-                self.protocol.info(
-                    f"Test result for {layer_name}: {scenario}, "
-                    f"Layer Score: {layer_score}, Layer Response: {layer_response}, "
-                    f"Layer Decision: {layer_decision}, Expected Decision: {expected_decision}"
-                )
+        test_results, metrics = EvaluationEngine(
+            self._life_imagination, score_function=self.evaluate_clim_output
+        ).evaluate(train_data)
 
         # Step 5: Analyze the results and provide feedback
-        total_score = sum(
-            [
-                item.get("Score") or 0
-                for layer_list in test_results.values()
-                for item in layer_list
-            ]
-        )
+        total_score = sum(layer_metrics["Score"] for layer_metrics in metrics.values())
         self.protocol.info(f"Overall CLIM performance score: {total_score}")
-
-        # Step 6: Write test results to Markdown file
-        for dataKey in test_results.keys():
-            filename = dataKey + "_Test_Results"
-            DataHandler.save_list_to_markdown(
-                DataHandler.ExportPath, filename, test_results[dataKey], True
-            )
         return test_results
 
     def evaluate_clim_output(self, output, expected_decision):
@@ -0,0 +1,183 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ethos_ai.clim.base_clim import BaseCLIM
+from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.clim_interface import CLIMInterface
+from ethos_ai.clim.train_list_generator import TrainListGenerator
+from ethos_ai.util.data_handler import DataHandler
+from ethos_ai.util.protocol import Protocol
+
+
+class EvaluationEngine:
+    """
+    Runs the test cases of the trained CLIM layers.
+
+    The cases of each layer are processed in chunks through the batched generation path
+    (`BaseCLIM.process_many`), the layers run in parallel on a worker pool. The results of
+    each chunk are appended to the markdown export of the layer as soon as they are complete.
+    The engine reports the latency and the accuracy of every layer.
+    """
+
+    PRERUN_LAYERS = ["ETHIC", "INDIVIDUAL", "SAMT"]
+
+    def __init__(
+        self,
+        life_imagination: CLIMInterface,
+        score_function=None,
+        chunk_size: int = 8,
+        max_workers: int = None,
+        export_path: str = DataHandler.ExportPath,
+    ):
+        """
+        Initializes the evaluation engine.
+
+        :param life_imagination: The CLIM whose layers are evaluated.
+        :param score_function: Scores a layer decision against the expected decision,
+            by default 1 for an equal decision and 0 otherwise.
+        :param chunk_size: The number of test cases processed in one batched call.
+        :param max_workers: The number of layers evaluated at the same time, default all.
+        :param export_path: The directory of the markdown exports.
+        """
+        self.protocol = Protocol()
+        self.life_imagination = life_imagination
+        self.score_function = score_function or (
+            lambda output, expected: 1 if output == expected else 0
+        )
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max_workers
+        self.export_path = export_path
+
+    @staticmethod
+    def get_process_type(layer_name: str) -> str:
+        return "prerun" if layer_name in EvaluationEngine.PRERUN_LAYERS else "all"
+
+    def evaluate(self, test_cases: dict[str, list[str]]):
+        """
+        Evaluates the layers on their test cases.
+
+        :param test_cases: The combined test case inputs by layer name (see TrainListGenerator).
+        :return: The tuple (test results by layer, metrics by layer). The metrics contain the
+            number of cases, the total score, the accuracy, the total and mean latency in seconds.
+        """
+        test_results: dict[str, list[dict[str, any]]] = {}
+        metrics: dict[str, dict[str, any]] = {}
+        if not test_cases:
+            return test_results, metrics
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers or len(test_cases),
+            thread_name_prefix="EvaluationEngine",
+        ) as executor:
+            futures = {
+                executor.submit(self.evaluate_layer, layer_name, cases): layer_name
+                for layer_name, cases in test_cases.items()
+            }
+            for future in as_completed(futures):
+                layer_name = futures[future]
+                try:
+                    test_results[layer_name], metrics[layer_name] = future.result()
+                except Exception as e:
+                    self.protocol.error(
+                        f"Evaluation of layer {layer_name} failed: {str(e)}"
+                    )
+        # Keep the order of the test cases
+        test_results = {
+            layer_name: test_results[layer_name]
+            for layer_name in test_cases
+            if layer_name in test_results
+        }
+        metrics = {
+            layer_name: metrics[layer_name]
+            for layer_name in test_cases
+            if layer_name in metrics
+        }
+        if metrics:
+            DataHandler.save_list_to_markdown(
+                self.export_path,
+                "CLIM_Evaluation_Summary",
+                [
+                    dict(Layer=layer_name, **values)
+                    for layer_name, values in metrics.items()
+                ],
+                True,
+            )
+        return test_results, metrics
+
+    def evaluate_layer(self, layer_name: str, cases: list[str]):
+        """
+        Evaluates one layer on its test cases and streams the results into its markdown export.
+
+        :param layer_name: The name of the layer (e.g. ETHIC).
+        :param cases: The combined test case inputs of the layer.
+        :return: The tuple (test results, metrics) of the layer.
+        """
+        layer = self.life_imagination.get_layer(layer_name)
+        if not isinstance(layer, BaseCLIM):
+            raise TypeError(
+                f"Expected layer to be of type BaseCLIM, got {type(layer).__name__}"
+            )
+        type = EvaluationEngine.get_process_type(layer_name)
+        filepath = DataHandler.create_markdown_file(
+            self.export_path, layer_name + "_Test_Results", True
+        )
+        results = []
+        latency = 0.0
+        for start in range(0, len(cases), self.chunk_size):
+            chunk = cases[start : start + self.chunk_size]
+            input_datas = []
+            for request in chunk:
+                input_data = CLIMData()
+                input_data.get_or_create_clim_data(layer.get_name(), type)
+                input_data.set_last_response(
+                    TrainListGenerator.get_scenario_description(request)
+                )
+                input_datas.append(input_data)
+
+            started = time.perf_counter()
+            layer.process_many(type, input_datas)
+            latency += time.perf_counter() - started
+
+            rows = [
+                self._create_result(layer, type, request, input_data)
+                for request, input_data in zip(chunk, input_datas)
+            ]
+            DataHandler.append_list_to_markdown(filepath, rows, write_header=start == 0)
+            results.extend(rows)
+
+        score = sum(row.get("Score") or 0 for row in results)
+        metrics = {
+            "Cases": len(results),
+            "Score": score,
+            "Accuracy": score / len(results) if results else 0.0,
+            "Latency": latency,
+            "Mean Latency": latency / len(results) if results else 0.0,
+        }
+        self.protocol.info(
+            f"Evaluation of {layer_name}: {metrics['Cases']} cases, accuracy {metrics['Accuracy']:.2f}, "
+            f"latency {metrics['Latency']:.2f}s ({metrics['Mean Latency']:.3f}s per case)"
+        )
+        return results, metrics
+
+    def _create_result(
+        self, layer: BaseCLIM, type: str, request: str, input_data: CLIMData
+    ) -> dict[str, any]:
+        that_dict = input_data.get_or_create_clim_data(layer.get_name(), type)
+        scenario = TrainListGenerator.get_scenario_description(request)
+        expected_decision = TrainListGenerator.get_decision(request)
+        layer_decision = that_dict.get("decision")
+        layer_score = self.score_function(layer_decision, expected_decision)
+        self.protocol.info(
+            f"Test result for {layer.get_name()}: {scenario}, "
+            f"Layer Score: {layer_score}, Layer Response: {that_dict.get('response')}, "
+            f"Layer Decision: {layer_decision}, Expected Decision: {expected_decision}"
+        )
+        return {
+            "Scenario": scenario,
+            "Score": layer_score,
+            "Response": that_dict.get("response"),
+            "Expected Response": TrainListGenerator.get_output(request)
+            + "\n"
+            + TrainListGenerator.get_analysis(request),
+            "Decision": layer_decision,
+            "Expected Decision": expected_decision,
+        }
@@ -0,0 +1,126 @@
+from statistics import NormalDist
+
+import torch
+
+from ethos_ai.ethic.ethics_module import EthicsModule
+
+
+class RobustnessEvaluator:
+    """
+    Monte-Carlo evaluation of the ethic values of topics under noise.
+
+    The noisy model outputs of all topics are drawn as one (topics x versions x dim) tensor
+    from a seeded generator and scored in one batched EthicsModule call. Each output is
+    standard normal noise plus a second noise term scaled by a uniform factor in
+    [-noise_scale, noise_scale]. The evaluator reports the mean, variance and confidence
+    interval of the overall ethic value per topic. With a tolerance, further versions are
+    drawn for the topics whose interval is wider than the tolerance, up to max_versions; the
+    size of the next round is estimated from the variance of the versions drawn so far.
+    """
+
+    def __init__(
+        self,
+        ethics_module: EthicsModule,
+        num_versions: int = 5,
+        max_versions: int = None,
+        tolerance: float = None,
+        confidence: float = 0.95,
+        noise_scale: float = 0.1,
+        dim: int = 512,
+        seed: int = None,
+    ):
+        """
+        :param ethics_module: The module scoring the noisy outputs.
+        :param num_versions: The noisy versions drawn per topic in each round.
+        :param max_versions: The maximum versions per topic, by default num_versions.
+        :param tolerance: The half width of the confidence interval at which a topic stops;
+            None draws exactly one round.
+        :param confidence: The confidence level of the intervals.
+        :param noise_scale: The maximum scale of the second noise term.
+        :param dim: The size of one noisy output.
+        :param seed: The seed of the noise generator, None for a random seed.
+        """
+        self.ethics_module = ethics_module
+        self.num_versions = max(2, num_versions)
+        self.max_versions = max(self.num_versions, max_versions or self.num_versions)
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.noise_scale = noise_scale
+        self.dim = dim
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self._generator = torch.Generator()
+        if seed is None:
+            self._generator.seed()
+        else:
+            self._generator.manual_seed(seed)
+
+    def sample(self, num_topics: int, num_versions: int) -> torch.Tensor:
+        """Returns noisy outputs of the shape (topics x versions x dim)."""
+        shape = (num_topics, num_versions, self.dim)
+        scales = (
+            torch.rand(num_topics, num_versions, 1, generator=self._generator) * 2 - 1
+        ) * self.noise_scale
+        return (
+            torch.randn(shape, generator=self._generator)
+            + torch.randn(shape, generator=self._generator) * scales
+        )
+
+    def score(self, num_topics: int, num_versions: int) -> torch.Tensor:
+        """Returns the overall ethic values (topics x versions) of fresh noisy outputs."""
+        samples = self.sample(num_topics, num_versions)
+        _, overall_ethic_values = self.ethics_module.evaluate_batch(
+            samples.reshape(num_topics * num_versions, self.dim)
+        )
+        return overall_ethic_values.reshape(num_topics, num_versions)
+
+    def evaluate(self, num_topics: int) -> list[dict]:
+        """
+        Evaluates the given number of topics.
+
+        :return: One dictionary per topic with the mean, variance, lower and upper bound of
+            the confidence interval, and the number of versions drawn.
+        """
+        if num_topics == 0:
+            return []
+        count = torch.zeros(num_topics, dtype=torch.float64)
+        total = torch.zeros(num_topics, dtype=torch.float64)
+        total_squares = torch.zeros(num_topics, dtype=torch.float64)
+        active = torch.ones(num_topics, dtype=torch.bool)
+        num_versions = self.num_versions
+        while active.any():
+            indices = active.nonzero().squeeze(1)
+            scores = self.score(len(indices), num_versions)
+            count[indices] += num_versions
+            total[indices] += scores.sum(1)
+            total_squares[indices] += (scores * scores).sum(1)
+
+            mean = total / count.clamp(min=1)
+            variance = (
+                (total_squares - count * mean * mean) / (count - 1).clamp(min=1)
+            ).clamp(min=0)
+            half_width = self._z * (variance / count.clamp(min=1)).sqrt()
+            if self.tolerance is None:
+                break
+            active = (
+                active & (count < self.max_versions) & (half_width > self.tolerance)
+            )
+            if active.any():
+                # Active topics were drawn in the same rounds and have the same count
+                drawn = int(count[active][0])
+                needed = int(
+                    (self._z**2 * variance[active].mean() / self.tolerance**2).ceil()
+                )
+                num_versions = min(
+                    max(self.num_versions, needed - drawn), self.max_versions - drawn
+                )
+
+        return [
+            {
+                "mean": mean[index].item(),
+                "variance": variance[index].item(),
+                "lower": (mean[index] - half_width[index]).item(),
+                "upper": (mean[index] + half_width[index]).item(),
+                "versions": int(count[index]),
+            }
+            for index in range(num_topics)
+        ]
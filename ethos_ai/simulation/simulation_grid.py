@@ -1,25 +1,49 @@
-import random
-import torch
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
 from ethos_ai.clim.base_clim import BaseCLIM
 from ethos_ai.clim.clim_data import CLIMData
 from ethos_ai.clim.clim_interface import CLIMInterface
 from ethos_ai.clim.decision import Decision
+from ethos_ai.simulation.simulation_memo_store import SimulationMemoStore
 from ethos_ai.simulation.simulation_topic import SimulationTopic
-from ethos_ai.ethic.ethics_module import EthicsModule
 from ethos_ai.util.protocol import Protocol
 
+if TYPE_CHECKING:
+    from ethos_ai.ethic.ethics_module import EthicsModule
+    from ethos_ai.simulation.robustness_evaluator import RobustnessEvaluator
+
 
 class SimulationsGrid:
     def __init__(
         self,
         tecllife_individual,
         life_imagination: CLIMInterface,
-        ethics_module: EthicsModule,
+        ethics_module: "EthicsModule",
+        robustness_evaluator: "RobustnessEvaluator" = None,
+        max_workers: int = 4,
+        batch_simulations: bool = False,
+        memo_store: SimulationMemoStore = None,
     ):
+        # EthicsModule is a torch module, torch is imported with the first simulation grid
+        from ethos_ai.ethic.ethics_module import EthicsModule
+        from ethos_ai.simulation.robustness_evaluator import RobustnessEvaluator
+
         self.protocol = Protocol()
         self.tecllife_individual = tecllife_individual
         self.life_imagination = life_imagination
         self.ethics_module = ethics_module
+        # Scores the noisy copies of the top list
+        self.robustness_evaluator = robustness_evaluator or RobustnessEvaluator(
+            ethics_module
+        )
+        # The number of scenarios simulated at the same time, 1 simulates them one by one
+        self.max_workers: int = max_workers
+        self._executor: ThreadPoolExecutor = None
+        # Simulate the scenario and its options in lockstep with batched stages instead
+        self.batch_simulations: bool = batch_simulations
+        # Results of scenarios simulated before with the same model version of the stack
+        self.memo_store: SimulationMemoStore = memo_store or SimulationMemoStore()
 
         if not isinstance(life_imagination, CLIMInterface):
             raise TypeError(
@@ -30,7 +54,39 @@ class SimulationsGrid:
                 f"Expected ethics_module to be of type EthicsModule, got {type(ethics_module).__name__}"
             )
 
+    def _get_model_version(self) -> str:
+        """Returns the model version of the stack, None if it has none (nothing is memoized)."""
+        get_model_version = getattr(self.life_imagination, "get_model_version", None)
+        return get_model_version() if get_model_version is not None else None
+
+    def _get_memoized(
+        self, scenario_description: str, model_version: str
+    ) -> SimulationTopic:
+        if model_version is None:
+            return None
+        topic = self.memo_store.get(scenario_description, model_version)
+        if topic is not None:
+            self.protocol.info(f"Memoized simulation of: {scenario_description}")
+            # The memo matches normalized descriptions, keep the one asked for
+            topic.description = scenario_description
+        return topic
+
+    def _memoize(
+        self, scenario_description: str, model_version: str, topic: SimulationTopic
+    ):
+        if model_version is not None:
+            self.memo_store.put(scenario_description, model_version, topic)
+
     def simulate_scenario(self, scenario_description: str) -> SimulationTopic:
+        """Simulates a scenario, or returns its memoized result for the current model version."""
+        model_version = self._get_model_version()
+        topic = self._get_memoized(scenario_description, model_version)
+        if topic is None:
+            topic = self._simulate_scenario(scenario_description)
+            self._memoize(scenario_description, model_version, topic)
+        return topic
+
+    def _simulate_scenario(self, scenario_description: str) -> SimulationTopic:
         self.protocol.info(f"\n--- Simulating Scenario: {scenario_description} ---")
         version = 1
         if version == 0:
@@ -43,34 +99,86 @@ class SimulationsGrid:
             climData = CLIMData()
             climData.set_last_response(scenario_description)
             output_data = self.life_imagination.process("simulate", climData)
-            self.protocol.info(f"Output Data: {output_data}")
-            answer = output_data.get_last_response()
-            decision = Decision.parse_translated_decision(
-                decision_name=output_data.get_last_decision()
-            )
-            if decision == Decision.GO:
-                overall_ethic_value = 10.0
-            elif decision == Decision.NOGO:
-                overall_ethic_value = -5.0
-            elif decision == Decision.STOP:
-                overall_ethic_value = -10.0
-            elif decision == Decision.ESCALATE:
-                overall_ethic_value = -10.0
-            elif decision == Decision.EMERGENCY_SURVIVAL:
-                overall_ethic_value = 10.0
-            elif decision == Decision.EMERGENCY_ESSENTIAL:
-                overall_ethic_value = 10.0
-            elif decision == Decision.EMERGENCY_RECOMMENDED:
-                overall_ethic_value = 5.0
-            elif decision == Decision.WAIT:
-                overall_ethic_value = 0.0
-            elif decision == Decision.IMPROVE:
-                overall_ethic_value = 0.0
-            elif decision == Decision.ADJUST:
-                overall_ethic_value = 0.0
-            domain_ethic_values = "None specific, using CLIM Stack"
+            return self._create_topic(scenario_description, output_data)
+        return SimulationTopic(
+            scenario_description,
+            None,
+            answer,
             overall_ethic_value,
-            summary_reason = output_data
+            decision,
+            domain_ethic_values,
+            summary_reason,
+        )
+
+    def simulate_scenarios(
+        self, scenario_descriptions: list[str]
+    ) -> list[SimulationTopic]:
+        """
+        Simulates several scenarios in lockstep, each stage batched across the scenarios.
+
+        Scenarios with a memoized result for the current model version are not simulated.
+
+        :param scenario_descriptions: The scenarios to simulate.
+        :return: The simulation topics in the order of the scenarios.
+        """
+        model_version = self._get_model_version()
+        topics = [
+            self._get_memoized(scenario_description, model_version)
+            for scenario_description in scenario_descriptions
+        ]
+        pending = [index for index, topic in enumerate(topics) if topic is None]
+        input_datas = []
+        for index in pending:
+            self.protocol.info(
+                f"\n--- Simulating Scenario: {scenario_descriptions[index]} ---"
+            )
+            climData = CLIMData()
+            climData.set_last_response(scenario_descriptions[index])
+            input_datas.append(climData)
+        output_datas = (
+            self.life_imagination.process_many("simulate", input_datas)
+            if input_datas
+            else []
+        )
+        for index, output_data in zip(pending, output_datas):
+            topics[index] = self._create_topic(
+                scenario_descriptions[index], output_data
+            )
+            self._memoize(scenario_descriptions[index], model_version, topics[index])
+        return topics
+
+    def _create_topic(
+        self, scenario_description: str, output_data: CLIMData
+    ) -> SimulationTopic:
+        """Rates the decision of a simulated scenario on the ethics scale."""
+        self.protocol.info(f"Output Data: {output_data}")
+        answer = output_data.get_last_response()
+        decision = Decision.parse_translated_decision(
+            decision_name=output_data.get_last_decision()
+        )
+        if decision == Decision.GO:
+            overall_ethic_value = 10.0
+        elif decision == Decision.NOGO:
+            overall_ethic_value = -5.0
+        elif decision == Decision.STOP:
+            overall_ethic_value = -10.0
+        elif decision == Decision.ESCALATE:
+            overall_ethic_value = -10.0
+        elif decision == Decision.EMERGENCY_SURVIVAL:
+            overall_ethic_value = 10.0
+        elif decision == Decision.EMERGENCY_ESSENTIAL:
+            overall_ethic_value = 10.0
+        elif decision == Decision.EMERGENCY_RECOMMENDED:
+            overall_ethic_value = 5.0
+        elif decision == Decision.WAIT:
+            overall_ethic_value = 0.0
+        elif decision == Decision.IMPROVE:
+            overall_ethic_value = 0.0
+        elif decision == Decision.ADJUST:
+            overall_ethic_value = 0.0
+        domain_ethic_values = "None specific, using CLIM Stack"
+        overall_ethic_value,
+        summary_reason = output_data
         return SimulationTopic(
             scenario_description,
             None,
@@ -81,19 +189,45 @@ class SimulationsGrid:
             summary_reason,
         )
 
-    def simulate_scenario_with_options(self, scenario_description: str):
-        top_list = []
-        # Simulate the scenario itself
-        top_list.append((0, self.simulate_scenario(scenario_description)))
+    def _submit_simulation(self, scenario_description: str) -> Future:
+        """Simulates a scenario on the executor, or right away without parallel workers."""
+        if self.max_workers is None or self.max_workers <= 1:
+            future = Future()
+            try:
+                future.set_result(self.simulate_scenario(scenario_description))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="SimulationsGrid"
+            )
+        return self._executor.submit(self.simulate_scenario, scenario_description)
 
-        # Generate and simulate action options
+    def _generate_action_options(self, scenario_description: str) -> list[str]:
         action_options = self.life_imagination.generate_answer_list(
             f"Generate at least 3 possible action options for: {scenario_description}"
         )
         self.protocol.info("Action Options: {}".format(action_options))
+        return action_options
+
+    def simulate_scenario_with_options(self, scenario_description: str):
+        if self.batch_simulations:
+            # Generate the action options, then simulate all scenarios in lockstep
+            action_options = self._generate_action_options(scenario_description)
+            topics = self.simulate_scenarios([scenario_description] + action_options)
+            top_list = [(0, topics[0])] + list(enumerate(topics[1:]))
+        else:
+            # Simulate the scenario itself, while the action options are generated
+            simulations = [(0, self._submit_simulation(scenario_description))]
+
+            # Generate and simulate action options, each as an independent job
+            action_options = self._generate_action_options(scenario_description)
+            for i, option in enumerate(action_options):
+                simulations.append((i, self._submit_simulation(option)))
 
-        for i, option in enumerate(action_options):
-            top_list.append((i, self.simulate_scenario(option)))
+            # Collected in submission order, the stable sort ranks equal values in this order
+            top_list = [(i, future.result()) for i, future in simulations]
 
         # Sort the results by the ethics scale
         top_list.sort(key=lambda x: x[1].overall_ethic_value, reverse=True)
@@ -101,28 +235,23 @@ class SimulationsGrid:
         return top_list
 
     def evaluate_noisy_copies(self, top_list):
-        final_list = []
-        for option_index, topic in top_list:
-            noisy_results = self._simulate_noisy_versions(topic)
-            average_noisy_score = sum(noisy_results) / len(noisy_results)
-            final_list.append(
-                (topic, average_noisy_score, topic.decision, topic.summary_reason)
-            )
+        """
+        Scores the topics of a top list with noisy copies, all topics in one batch.
 
+        :return: The tuples (topic, mean noisy ethic value, decision, summary reason,
+            statistics) sorted by the mean; the statistics contain the mean, variance and
+            confidence interval of the topic (see RobustnessEvaluator).
+        """
+        statistics = self.robustness_evaluator.evaluate(len(top_list))
+        final_list = [
+            (topic, result["mean"], topic.decision, topic.summary_reason, result)
+            for (option_index, topic), result in zip(top_list, statistics)
+        ]
         final_list.sort(key=lambda x: x[1], reverse=True)
         return final_list
 
     def _simulate_noisy_versions(self, topic: SimulationTopic, num_versions: int = 5):
-        noisy_results = []
-        for _ in range(num_versions):
-            noisy_gpt_output = torch.randn(1, 512) + torch.randn(
-                1, 512
-            ) * random.uniform(-0.1, 0.1)
-            noisy_domain_ethic_values, noisy_overall_ethic_value, _, _ = (
-                self.ethics_module(noisy_gpt_output, topic.description)
-            )
-            noisy_results.append(noisy_overall_ethic_value)
-        return noisy_results
+        return self.robustness_evaluator.score(1, num_versions)[0].tolist()
 
     def run_simulation_on_layer(
         self, type: str, layer: str, request: str
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from threading import RLock
+
+from ethos_ai.simulation.simulation_topic import SimulationTopic
+
+
+class SimulationMemoStore:
+    """
+    LRU memo of simulation results (SimulationTopic) by scenario description.
+
+    Entries are keyed by the normalized description (Unicode normalized, case folded,
+    whitespace collapsed, trailing punctuation removed) and only hit for the model version of
+    the CLIM stack they were simulated with. The most recently used entries are kept in
+    memory. With a persist path, every entry is also written to an SQLite database, so memoized
+    results survive restarts; the database keeps the most recently used entries up to its own
+    limit.
+    """
+
+    _WHITESPACE = re.compile(r"\s+")
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        persist_path: str = None,
+        max_persisted_entries: int = None,
+    ):
+        """
+        Initializes the memo store and opens the database if a persist path is given.
+
+        :param max_entries: The maximum number of results kept in memory.
+        :param persist_path: Optional SQLite file the results are written to.
+        :param max_persisted_entries: The maximum number of results in the database,
+            by default ten times max_entries.
+        """
+        self._lock = RLock()
+        self._entries: OrderedDict[str, tuple[str, float, bytes]] = OrderedDict()
+        self.max_entries: int = max_entries
+        self.max_persisted_entries: int = max_persisted_entries or 10 * max_entries
+        self.persist_path: str = persist_path
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._connection: sqlite3.Connection = None
+        if persist_path:
+            os.makedirs(os.path.dirname(persist_path) or ".", exist_ok=True)
+            # Simulations run on several threads, all access is serialized by the lock
+            self._connection = sqlite3.connect(persist_path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS simulations (key TEXT PRIMARY KEY, "
+                    "model_version TEXT, last_used REAL, topic BLOB)"
+                )
+
+    @staticmethod
+    def normalize(description: str) -> str:
+        """Returns the normalized form of a scenario description."""
+        description = unicodedata.normalize("NFKC", description).casefold()
+        return SimulationMemoStore._WHITESPACE.sub(" ", description).strip(" .!?;:")
+
+    @staticmethod
+    def create_key(description: str) -> str:
+        """Returns the memo key of a scenario description."""
+        return hashlib.sha256(
+            json.dumps(SimulationMemoStore.normalize(description)).encode()
+        ).hexdigest()
+
+    def get(self, description: str, model_version: str) -> SimulationTopic:
+        """Returns a copy of the result memoized for the model version or None, and counts the hit or miss."""
+        key = SimulationMemoStore.create_key(description)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT model_version, topic FROM simulations WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], time.time(), row[1])
+                    self._store(key, entry)
+            if entry is None or entry[0] != model_version:
+                self.misses += 1
+                return None
+            self._entries[key] = (entry[0], time.time(), entry[2])
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pickle.loads(entry[2])
+
+    def put(self, description: str, model_version: str, topic: SimulationTopic):
+        """Memoizes the result of a scenario simulated with the model version."""
+        key = SimulationMemoStore.create_key(description)
+        entry = (model_version, time.time(), pickle.dumps(topic))
+        with self._lock:
+            self._store(key, entry)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO simulations VALUES (?, ?, ?, ?)",
+                        (key, *entry),
+                    )
+                    self._connection.execute(
+                        "DELETE FROM simulations WHERE key NOT IN (SELECT key FROM "
+                        "simulations ORDER BY last_used DESC LIMIT ?)",
+                        (self.max_persisted_entries,),
+                    )
+
+    def _store(self, key: str, entry: tuple[str, float, bytes]):
+        """Stores an entry in memory, evicting the least recently used entries if full."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._connection is not None:
+                # The database orders its entries by the last use in memory
+                with self._connection:
+                    self._connection.execute(
+                        "UPDATE simulations SET last_used = ? WHERE key = ?",
+                        (evicted[1], evicted_key),
+                    )
+
+    def invalidate(self, current_model_version: str):
+        """Drops all results simulated with other model versions than the current one."""
+        with self._lock:
+            for key in [
+                key
+                for key, entry in self._entries.items()
+                if entry[0] != current_model_version
+            ]:
+                del self._entries[key]
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "DELETE FROM simulations WHERE model_version != ?",
+                        (current_model_version,),
+                    )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM simulations")
+
+    def get_statistics(self) -> dict:
+        """Returns the number of entries in memory, hits, misses, evictions and the hit rate."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0,
+            }
+
+    def close(self):
+        """Closes the database; the memo keeps working in memory."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
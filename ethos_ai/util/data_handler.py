@@ -134,3 +134,80 @@ class DataHandler:
             raise Exception(
                 f"Error saving data {data} to markdown file (path: {path}) {filename} (use timestamps: {useTimeStamps}): {e}"
             )
+
+    @staticmethod
+    def create_markdown_file(
+        path: str,
+        filename: str,
+        useTimeStamps: bool = False,
+    ) -> str:
+        """
+        Create a markdown file with the export title, to which rows can be appended.
+        :param path: The directory path where the file will be saved.
+        :type path: str
+        :param filename: The name of the file.
+        :type filename: str
+        :param useTimeStamps: Optional. If True, a timestamp will be added to the filename. Default is False.
+        :type useTimeStamps: bool
+        :return: The path of the created file.
+        :raises Exception: If there is an error creating the markdown file.
+        """
+        try:
+            # Make sure the directory exists
+            os.makedirs(path, exist_ok=True)
+
+            if useTimeStamps:
+                # Generate a file path based on the current date and time
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filepath = os.path.join(path, f"{filename}_{timestamp}.md")
+            else:
+                # Use the provided filename
+                filepath = os.path.join(path, f"{filename}.md")
+
+            # Get the current date and time
+            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            with open(filepath, "w") as f:
+                # Write title with filepath and current date and time
+                title_line = f"# Exported Data\n\n**File Path:** `{filepath}`\n\n**Export Date & Time:** {current_time}\n\n"
+                f.write(title_line)
+            return filepath
+        except Exception as e:
+            raise Exception(
+                f"Error creating markdown file (path: {path}) {filename} (use timestamps: {useTimeStamps}): {e}"
+            )
+
+    @staticmethod
+    def append_list_to_markdown(
+        filepath: str,
+        data: list[dict[str, any]],
+        write_header: bool = False,
+    ):
+        """
+        Append rows to a markdown chart, e.g. of a file created by create_markdown_file.
+        :param filepath: The path of the markdown file.
+        :type filepath: str
+        :param data: The rows to append, the keys of the first row are the column names.
+        :type data: list[dict[str, str]]
+        :param write_header: Optional. If True, the chart header is written before the rows. Default is False.
+        :type write_header: bool
+        :raises Exception: If there is an error appending the data to the markdown file.
+        """
+        try:
+            with open(filepath, "a") as f:
+                if write_header and data:
+                    keys = data[0].keys()
+                    f.write("| " + " | ".join(keys) + " |\n")
+                    f.write("| " + " | ".join(["---" for _ in keys]) + " |\n")
+                for row in data:
+                    f.write(
+                        "| "
+                        + " | ".join(
+                            str(value).replace("\n", "<br>") for value in row.values()
+                        )
+                        + " |\n"
+                    )
+        except Exception as e:
+            raise Exception(
+                f"Error appending data {data} to markdown file {filepath}: {e}"
+            )
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from ethos_ai.clim.async_chat_client import AsyncChatClient
+
+
+class ChatCompletionsStub(BaseHTTPRequestHandler):
+    """Answers chat completions with the prompt, throttles the first request."""
+
+    lock = threading.Lock()
+    requests = 0
+    running = 0
+    max_running = 0
+
+    def do_POST(self):
+        cls = ChatCompletionsStub
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with cls.lock:
+            cls.requests += 1
+            first = cls.requests == 1
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.running -= 1
+        if first:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        content = payload["messages"][0]["content"].upper()
+        body = json.dumps(
+            {"choices": [{"message": {"role": "assistant", "content": content}}]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_async_chat_client_retries_and_limits_concurrency():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = AsyncChatClient(
+        api_key="test",
+        api_base=f"http://127.0.0.1:{server.server_port}/v1",
+        max_concurrency=2,
+        backoff=0.01,
+    )
+
+    async def chat_all():
+        try:
+            return await asyncio.gather(
+                *[
+                    client.chat([{"role": "user", "content": f"prompt {i}"}], "stub")
+                    for i in range(6)
+                ]
+            )
+        finally:
+            await client.aclose()
+
+    try:
+        answers = asyncio.run(chat_all())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert answers == [f"PROMPT {i}" for i in range(6)]
+    assert ChatCompletionsStub.requests == 7
+    assert ChatCompletionsStub.max_running <= 2
+
+
+def test_async_chat_client_limits_the_rate_across_event_loops():
+    ChatCompletionsStub.requests = 1  # No throttled first request
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = AsyncChatClient(
+        api_key="test",
+        api_base=f"http://127.0.0.1:{server.server_port}/v1",
+        max_concurrency=2,
+        requests_per_second=20,
+    )
+
+    async def chat_all(prefix: str):
+        return await asyncio.gather(
+            *[
+                client.chat([{"role": "user", "content": f"{prefix} {i}"}], "stub")
+                for i in range(4)
+            ]
+        )
+
+    async def close():
+        await client.aclose()
+
+    try:
+        first = asyncio.run(chat_all("first"))
+        start = time.perf_counter()
+        second = asyncio.run(chat_all("second"))
+        elapsed = time.perf_counter() - start
+        asyncio.run(close())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert first == [f"FIRST {i}" for i in range(4)]
+    assert second == [f"SECOND {i}" for i in range(4)]
+    # The bucket is kept across the loops, the second loop waits for its tokens
+    assert elapsed >= 0.1
@@ -0,0 +1,70 @@
+import os
+
+import torch
+
+from ethos_ai.clim import checkpoint_store
+from ethos_ai.clim.checkpoint_store import CheckpointStore
+
+
+def test_checkpoint_store_writes_changed_tensors_and_collects_old_versions(tmp_path):
+    store = CheckpointStore(str(tmp_path), retention=2)
+    tensors = {"a": torch.ones(4, 3), "b": torch.arange(5), "tied": None}
+    tensors["tied"] = tensors["a"]
+
+    first = store.save(tensors)
+    assert store.save(tensors) == first
+    tensors["b"] = tensors["b"] + 1
+    second = store.save(tensors)
+    tensors["b"] = tensors["b"] + 1
+    third = store.save(tensors)
+
+    assert store.get_versions() == ["000002", "000003"]
+    assert store.get_current() == third
+    assert not os.path.exists(first)
+    # "a" is stored once for all versions, "b" once per kept version
+    assert len(os.listdir(tmp_path / CheckpointStore.BLOBS_DIR)) == 3
+
+    loaded = CheckpointStore.load_tensors(second)
+    assert loaded["tied"] is loaded["a"]
+    assert torch.equal(loaded["b"], torch.arange(5) + 1)
+
+
+def test_checkpoint_store_maps_tensors_copy_on_write(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    version_path = store.save({"weight": torch.zeros(8)})
+
+    weight = CheckpointStore.load_tensors(version_path)["weight"]
+    weight += 1
+
+    assert torch.equal(
+        CheckpointStore.load_tensors(version_path)["weight"], torch.zeros(8)
+    )
+
+
+def test_checkpoint_stores_of_one_path_switch_the_current_version(
+    tmp_path, monkeypatch
+):
+    first, second = CheckpointStore(str(tmp_path)), CheckpointStore(str(tmp_path))
+    replace = os.replace
+    saved = []
+
+    def replace_with_nested_save(source, destination):
+        # The second store saves while the first one switches its current version
+        if destination.endswith(CheckpointStore.CURRENT_NAME) and not saved:
+            saved.append(None)
+            saved[0] = second.save({"a": torch.zeros(2)})
+        replace(source, destination)
+
+    monkeypatch.setattr(checkpoint_store.os, "replace", replace_with_nested_save)
+    version = first.save({"a": torch.ones(2)})
+    monkeypatch.undo()
+
+    assert first.get_current() == version
+    assert sorted(first.get_versions()) == sorted(
+        os.path.basename(path) for path in [version, saved[0]]
+    )
+    assert not [
+        name
+        for name in os.listdir(tmp_path)
+        if name.startswith(CheckpointStore.TEMP_PREFIX)
+    ]
@@ -0,0 +1,15 @@
+from ethos_ai.clim.decision import Decision
+
+
+def test_parse_matches_whole_decision_words_only():
+    assert Decision.parse("The answer is NOGO.") is Decision.NOGO
+    assert Decision.parse("go ahead") is Decision.GO
+    assert Decision.parse("GOOD to know, no decision") is None
+    assert Decision.parse(None) is None
+
+
+def test_parse_prefers_the_decision_declared_first():
+    assert Decision.parse("GO, but STOP if it burns") is Decision.STOP
+    assert Decision.parse_for_decision("ETHIC", "wait: emergency_survival") == {
+        "ETHIC": Decision.EMERGENCY_SURVIVAL.translated_name
+    }
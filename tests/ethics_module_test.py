@@ -0,0 +1,24 @@
+import pytest
+import torch
+
+from ethos_ai.ethic.ethics_domains import EthicsDomains
+from ethos_ai.ethic.ethics_module import EthicsModule
+
+
+def test_ethics_module_matches_domains_for_single_and_batched_outputs():
+    domains = EthicsDomains.get_domains()
+    module = EthicsModule(domains)
+    outputs = torch.randn(3, 512)
+
+    domain_values, overall_values = module.evaluate_batch(outputs)
+    single_values, single_overall, decision, _ = module(outputs[1:2], "input")
+
+    assert domain_values.shape == (3, len(domains))
+    assert overall_values.shape == (3,)
+    for row, output in enumerate(outputs):
+        expected = [domain.evaluate(output.unsqueeze(0)) for domain in domains]
+        assert domain_values[row].tolist() == pytest.approx(expected)
+        assert overall_values[row].item() == pytest.approx(sum(expected))
+    assert single_values == pytest.approx(domain_values[1].tolist())
+    assert single_overall == pytest.approx(overall_values[1].item())
+    assert decision == ("GO" if single_overall > 0 else "NO GO")
@@ -0,0 +1,97 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("transformers")
+
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel
+from transformers.models.gpt2.tokenization_gpt2 import bytes_to_unicode
+
+from ethos_ai.clim.gpt_model_wrapper import GPTModelWrapper
+from ethos_ai.clim.training_job import TrainingJob
+from ethos_ai.clim.training_scheduler import TrainingScheduler
+from ethos_ai.clim.training_status import TrainingStatus
+
+PROMPTS = ["Hello there", "A much longer prompt about ethics", "x", "Scenario: a child"]
+
+
+@pytest.fixture
+def model_directory(tmp_path, monkeypatch):
+    """Creates a tiny byte-level GPT-2 named "base" in the working directory."""
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "base"
+    base.mkdir()
+    vocabulary = {
+        character: index for index, character in enumerate(bytes_to_unicode().values())
+    }
+    vocabulary["<|endoftext|>"] = len(vocabulary)
+    (base / "vocab.json").write_text(json.dumps(vocabulary))
+    (base / "merges.txt").write_text("#version: 0.2\n")
+    (base / "tokenizer_config.json").write_text(
+        json.dumps({"tokenizer_class": "GPT2Tokenizer"})
+    )
+    torch.manual_seed(0)
+    config = GPT2Config(
+        vocab_size=len(vocabulary),
+        n_embd=32,
+        n_layer=2,
+        n_head=2,
+        bos_token_id=len(vocabulary) - 1,
+        eos_token_id=len(vocabulary) - 1,
+    )
+    GPT2LMHeadModel(config).save_pretrained(base)
+    return str(tmp_path / "models")
+
+
+def create_wrapper(model_directory: str, **kwargs) -> GPTModelWrapper:
+    return GPTModelWrapper(model_name="base", model_directory=model_directory, **kwargs)
+
+
+def test_generate_text_batch_gives_each_prompt_its_own_length_budget(model_directory):
+    wrapper = create_wrapper(
+        model_directory, max_length=40, max_new_tokens=None, response_cache_size=0
+    )
+
+    single = [wrapper.generate_text(prompt) for prompt in PROMPTS]
+    batch = wrapper.generate_text_batch(PROMPTS, batch_size=3)
+
+    assert batch == single
+    assert [len(text) for text in single] == [40] * len(PROMPTS)
+
+
+def test_generate_text_batch_caches_the_output_of_generate_text(model_directory):
+    uncached = create_wrapper(
+        model_directory, max_length=40, max_new_tokens=None, response_cache_size=0
+    )
+    wrapper = create_wrapper(model_directory, max_length=40, max_new_tokens=None)
+    too_long = "y" * 50
+
+    wrapper.generate_text_batch(PROMPTS + [too_long], batch_size=3)
+
+    assert wrapper.get_response_cache_statistics()["entries"] == len(PROMPTS)
+    assert [wrapper.generate_text(prompt) for prompt in PROMPTS] == [
+        uncached.generate_text(prompt) for prompt in PROMPTS
+    ]
+    assert wrapper.get_response_cache_statistics()["hits"] == len(PROMPTS)
+
+
+def test_failed_training_fails_its_scheduler_job(model_directory, monkeypatch):
+    wrapper = create_wrapper(model_directory, max_new_tokens=4)
+    wrapper.set_training_scheduler(TrainingScheduler(threads_per_job=1))
+
+    def run_training(*args):
+        raise RuntimeError("out of memory")
+
+    monkeypatch.setattr(wrapper, "_run_training", run_training)
+    wrapper.start_training_async(["some text"], epochs=1)
+    job = wrapper._training_job
+
+    assert wrapper.wait_for_training(timeout=10)
+    while not job.is_finished():
+        threading.Event().wait(0.01)
+    assert wrapper.get_training_status() == TrainingStatus.FAILED
+    assert job.state == TrainingJob.FAILED
+    assert str(job.error) == "out of memory"
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("torch", "transformers", "openai", "tqdm", "numpy", "httpx")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_in_subprocess(module: str) -> tuple[float, list[str]]:
+    """Imports a module in a fresh interpreter and returns (seconds, heavy modules loaded)."""
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(elapsed)\n"
+        "print(','.join(loaded))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "ethos_ai.clim.decision",
+        "ethos_ai.clim.clim_data",
+        "ethos_ai.clim.clim_stack",
+        "ethos_ai.simulation.simulation_grid",
+        "ethos_ai.ethic.ethics_domains",
+    ],
+)
+def test_import_does_not_load_ml_backends(module):
+    elapsed, loaded = _import_in_subprocess(module)
+
+    assert loaded == []
+    assert elapsed < 1.0
@@ -0,0 +1,114 @@
+from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.decision import Decision
+from ethos_ai.clim.pipeline_engine import PipelineEngine
+
+
+class DecidingLayer:
+    def __init__(self, name: str, decision: Decision = None):
+        self.name = name
+        self.decision = decision
+
+    def process(self, type: str, input_data: CLIMData) -> CLIMData:
+        input_data.get_or_create_clim_data(self.name, type)["response"] = self.name
+        if self.decision is not None:
+            input_data.set_last_decision(self.decision.translated_name)
+        return input_data
+
+
+def test_pipeline_engine_switches_to_emergency_pipeline_once():
+    layers = {
+        name: DecidingLayer(name) for name in ["ETHIC", "INDIVIDUAL", "SAMT", "LTCLIM"]
+    }
+    layers["SAMT"].decision = Decision.EMERGENCY_SURVIVAL
+
+    output_data = PipelineEngine(layers).run(CLIMData())
+
+    stages = [
+        (timing["pipeline"], timing["stage"])
+        for timing in output_data.get_stage_timings()
+    ]
+    assert stages == [
+        ("standard", "prerun_ethic"),
+        ("standard", "prerun_individual"),
+        ("standard", "prerun_samt"),
+        ("emergency_survival", "emergency_survival_ethic"),
+        ("emergency_survival", "emergency_survival_samt"),
+    ]
+
+
+def test_pipeline_engine_runs_parallel_group_on_forks(tmp_path):
+    pipelines_file = tmp_path / "pipelines.json"
+    pipelines_file.write_text(
+        '{"check": {"stages": [{"parallel": ['
+        '{"type": "prerun", "layer": "ETHIC"}, {"type": "prerun", "layer": "SAMT"}]},'
+        '{"type": "final", "layer": "ETHIC"}], "transitions": {"STOP": "end"}}}'
+    )
+    layers = {"ETHIC": DecidingLayer("ETHIC"), "SAMT": DecidingLayer("SAMT")}
+    layers["SAMT"].decision = Decision.STOP
+
+    output_data = PipelineEngine(layers, str(pipelines_file)).run(CLIMData(), "check")
+
+    assert output_data.get_clim_data("ETHIC", "prerun") == {"response": "ETHIC"}
+    assert output_data.get_clim_data("SAMT", "prerun") == {"response": "SAMT"}
+    assert output_data.get_clim_data("ETHIC", "final") is None
+    assert output_data.get_last_decision() == Decision.STOP.translated_name
+
+
+def test_pipeline_engine_ends_on_terminal_decision_of_ethic_prerun():
+    layers = {
+        name: DecidingLayer(name) for name in ["ETHIC", "INDIVIDUAL", "SAMT", "LTCLIM"]
+    }
+    layers["ETHIC"].decision = Decision.NOGO
+    engine = PipelineEngine(layers)
+
+    output_data = engine.run(CLIMData())
+
+    assert len(output_data.get_stage_timings()) == 1
+    assert output_data.get_skipped_stages() == 6
+    assert engine.get_statistics() == {"runs": 1, "stages": 1, "skipped_stages": 6}
+
+
+class BatchingLayer(DecidingLayer):
+    def __init__(self, name: str, decisions: dict = None):
+        super().__init__(name)
+        self.decisions = decisions or {}
+        self.batches = []
+
+    def process(self, type: str, input_data: CLIMData) -> CLIMData:
+        self.decision = self.decisions.get(input_data.get_last_response())
+        return super().process(type, input_data)
+
+    def process_many(self, type: str, input_datas: list[CLIMData]) -> list[CLIMData]:
+        self.batches.append((type, len(input_datas)))
+        return [self.process(type, input_data) for input_data in input_datas]
+
+
+def test_pipeline_engine_runs_many_inputs_in_lockstep_with_own_transitions():
+    layers = {
+        name: BatchingLayer(name) for name in ["ETHIC", "INDIVIDUAL", "SAMT", "LTCLIM"]
+    }
+    layers["SAMT"].decisions = {"urgent": Decision.EMERGENCY_SURVIVAL}
+    input_datas = []
+    for text in ["calm", "urgent", "calm"]:
+        input_datas.append(CLIMData())
+        input_datas[-1].set_last_response(text)
+
+    output_datas = PipelineEngine(layers).run_many(input_datas)
+
+    def stages(output_data):
+        return [
+            (timing["pipeline"], timing["stage"])
+            for timing in output_data.get_stage_timings()
+        ]
+
+    single = CLIMData()
+    single.set_last_response("calm")
+    expected = stages(PipelineEngine(layers).run(single))
+    assert stages(output_datas[0]) == expected
+    assert stages(output_datas[2]) == expected
+    assert stages(output_datas[1])[-2:] == [
+        ("emergency_survival", "emergency_survival_ethic"),
+        ("emergency_survival", "emergency_survival_samt"),
+    ]
+    assert layers["ETHIC"].batches[0] == ("prerun", 3)
+    assert layers["SAMT"].batches[0] == ("prerun", 3)
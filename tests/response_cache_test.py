@@ -0,0 +1,57 @@
+import json
+import os
+import time
+
+from ethos_ai.clim import response_cache
+from ethos_ai.clim.response_cache import ResponseCache
+
+
+def test_response_cache_evicts_least_recently_used_and_checks_weights():
+    cache = ResponseCache(max_entries=2)
+    keys = [ResponseCache.create_key("ETHIC", prompt, {}) for prompt in "abc"]
+    cache.put(keys[0], "A", "v1")
+    cache.put(keys[1], "B", "v1")
+    assert cache.get(keys[0], "v1") == "A"
+    cache.put(keys[2], "C", "v1")
+
+    assert cache.get(keys[1], "v1") is None
+    assert cache.get(keys[0], "v2") is None
+    assert cache.get(keys[2], "v1") == "C"
+    assert cache.get_statistics()["hits"] == 2
+    assert cache.get_statistics()["misses"] == 2
+    assert cache.get_statistics()["evictions"] == 1
+
+
+def test_response_cache_expires_and_persists_entries(tmp_path):
+    path = str(tmp_path / "response_cache.json")
+    cache = ResponseCache(ttl=60, persist_path=path)
+    cache.put("fresh", "F", "v1")
+    cache.put("old", "O", "v1")
+    cache._entries["old"] = ("v1", time.time() - 120, "O")
+    cache.save()
+
+    loaded = ResponseCache(ttl=60, persist_path=path)
+    assert len(loaded) == 1
+    assert loaded.get("fresh", "v1") == "F"
+
+
+def test_response_cache_saves_concurrently(tmp_path, monkeypatch):
+    path = str(tmp_path / "response_cache.json")
+    cache = ResponseCache(persist_path=path)
+    cache.put(ResponseCache.create_key("ETHIC", "a", {}), "A", "v1")
+    dump = json.dump
+    nested = []
+
+    def dump_with_nested_save(entries, file):
+        # A second save (e.g. of the residency thread) runs while the first one writes
+        if not nested:
+            nested.append(True)
+            cache.save()
+        dump(entries, file)
+
+    monkeypatch.setattr(response_cache.json, "dump", dump_with_nested_save)
+    cache.save()
+    monkeypatch.undo()
+
+    assert len(ResponseCache(persist_path=path)) == 1
+    assert os.listdir(tmp_path) == ["response_cache.json"]
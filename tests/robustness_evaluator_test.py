@@ -0,0 +1,19 @@
+from ethos_ai.ethic.ethics_domains import EthicsDomains
+from ethos_ai.ethic.ethics_module import EthicsModule
+from ethos_ai.simulation.robustness_evaluator import RobustnessEvaluator
+
+
+def test_robustness_evaluator_is_seeded_and_stops_at_the_tolerance():
+    module = EthicsModule(EthicsDomains.get_domains())
+
+    first = RobustnessEvaluator(module, seed=7).evaluate(3)
+    assert first == RobustnessEvaluator(module, seed=7).evaluate(3)
+    assert [result["versions"] for result in first] == [5, 5, 5]
+    for result in first:
+        assert result["lower"] <= result["mean"] <= result["upper"]
+        assert result["variance"] >= 0
+
+    evaluator = RobustnessEvaluator(module, max_versions=500, tolerance=2.0, seed=7)
+    for result in evaluator.evaluate(4):
+        assert 5 <= result["versions"] <= 500
+        assert result["upper"] - result["lower"] <= 4.0 or result["versions"] == 500
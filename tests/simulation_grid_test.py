@@ -0,0 +1,42 @@
+import time
+from unittest.mock import Mock
+
+from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.clim_interface import CLIMInterface
+from ethos_ai.clim.decision import Decision
+from ethos_ai.ethic.ethics_domains import EthicsDomains
+from ethos_ai.ethic.ethics_module import EthicsModule
+from ethos_ai.simulation.simulation_grid import SimulationsGrid
+
+DECISIONS = {
+    "scenario": Decision.WAIT,
+    "option a": Decision.GO,
+    "option b": Decision.NOGO,
+    "option c": Decision.GO,
+}
+
+
+def simulate(type: str, input_data: CLIMData) -> CLIMData:
+    time.sleep(0.2)
+    decision = DECISIONS[input_data.get_last_response()]
+    input_data.set_last_decision(decision.translated_name)
+    return input_data
+
+
+def test_simulations_grid_simulates_options_in_parallel_with_stable_ranking():
+    clim = Mock(spec=CLIMInterface)
+    clim.process.side_effect = simulate
+    clim.generate_answer_list.return_value = ["option a", "option b", "option c"]
+    grid = SimulationsGrid(None, clim, EthicsModule(EthicsDomains.get_domains()))
+
+    start = time.perf_counter()
+    top_list = grid.simulate_scenario_with_options("scenario")
+    elapsed = time.perf_counter() - start
+
+    assert [(index, topic.description) for index, topic in top_list] == [
+        (0, "option a"),
+        (2, "option c"),
+        (0, "scenario"),
+        (1, "option b"),
+    ]
+    assert elapsed < 0.6
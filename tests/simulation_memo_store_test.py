@@ -0,0 +1,63 @@
+from unittest.mock import Mock
+
+from ethos_ai.clim.clim_data import CLIMData
+from ethos_ai.clim.clim_interface import CLIMInterface
+from ethos_ai.clim.decision import Decision
+from ethos_ai.ethic.ethics_domains import EthicsDomains
+from ethos_ai.ethic.ethics_module import EthicsModule
+from ethos_ai.simulation.simulation_grid import SimulationsGrid
+from ethos_ai.simulation.simulation_memo_store import SimulationMemoStore
+from ethos_ai.simulation.simulation_topic import SimulationTopic
+
+
+def create_topic(description: str) -> SimulationTopic:
+    return SimulationTopic(description, None, "answer", 1.5, "GO", [0.5, 1.0], "reason")
+
+
+def test_simulation_memo_store_matches_normalized_descriptions_per_model_version():
+    store = SimulationMemoStore(max_entries=2)
+    store.put("Help  the Neighbour.", "v1", create_topic("Help  the Neighbour."))
+
+    topic = store.get("help the neighbour", "v1")
+    assert topic.answer == "answer" and topic.overall_ethic_value == 1.5
+    assert store.get("help the neighbour", "v2") is None
+
+    store.put("second", "v1", create_topic("second"))
+    store.put("third", "v1", create_topic("third"))
+    assert store.get("help the neighbour", "v1") is None
+    assert len(store) == 2
+    assert store.get_statistics()["evictions"] == 1
+
+
+def test_simulation_memo_store_persists_results(tmp_path):
+    path = str(tmp_path / "memo" / "simulations.db")
+    store = SimulationMemoStore(persist_path=path)
+    store.put("scenario", "v1", create_topic("scenario"))
+    store.close()
+
+    store = SimulationMemoStore(persist_path=path)
+    assert store.get("Scenario!", "v1").decision == "GO"
+    store.invalidate("v2")
+    assert store.get("scenario", "v1") is None
+    store.close()
+
+
+def test_simulations_grid_simulates_a_scenario_once_per_model_version():
+    def simulate(type: str, input_data: CLIMData) -> CLIMData:
+        input_data.set_last_decision(Decision.GO.translated_name)
+        return input_data
+
+    clim = Mock(spec=CLIMInterface)
+    clim.process.side_effect = simulate
+    clim.get_model_version = Mock(return_value="v1")
+    grid = SimulationsGrid(None, clim, EthicsModule(EthicsDomains.get_domains()))
+
+    first = grid.simulate_scenario("Share the food")
+    second = grid.simulate_scenario("share the food.")
+    assert clim.process.call_count == 1
+    assert second.description == "share the food."
+    assert second.overall_ethic_value == first.overall_ethic_value
+
+    clim.get_model_version.return_value = "v2"
+    grid.simulate_scenario("Share the food")
+    assert clim.process.call_count == 2
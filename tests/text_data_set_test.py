@@ -0,0 +1,78 @@
+import torch
+
+from ethos_ai.clim.data_collator import DynamicPaddingCollator
+from ethos_ai.clim.length_bucket_sampler import LengthBucketSampler
+from ethos_ai.clim.text_data_set import TextDataset
+from ethos_ai.clim.tokenized_corpus_cache import TokenizedCorpusCache
+from ethos_ai.clim.training_corpus import TrainingCorpus
+
+
+class ByteTokenizer:
+    """Minimal tokenizer stand-in: one token per byte."""
+
+    name_or_path = "bytes"
+    pad_token = "<pad>"
+    pad_token_id = 0
+    special_tokens_map = {"pad_token": "<pad>"}
+
+    def __init__(self):
+        self.calls = 0
+
+    def __len__(self):
+        return 256
+
+    def __call__(self, text, truncation=True, max_length=512, return_tensors=None):
+        self.calls += 1
+        ids = list(text.encode())[:max_length]
+        if return_tensors == "pt":
+            return {"input_ids": torch.tensor([ids])}
+        return {"input_ids": ids}
+
+
+def test_collator_pads_to_longest_and_masks_labels():
+    collator = DynamicPaddingCollator(pad_token_id=0)
+    batch = collator([torch.tensor([5, 6, 7]), torch.tensor([8])])
+    assert batch["input_ids"].tolist() == [[5, 6, 7], [8, 0, 0]]
+    assert batch["attention_mask"].tolist() == [[1, 1, 1], [1, 0, 0]]
+    assert batch["labels"].tolist() == [[5, 6, 7], [8, -100, -100]]
+
+
+def test_collator_keeps_real_tokens_equal_to_pad_token():
+    # GPT-2 pads with its end-of-text token, which may also appear as a real token
+    collator = DynamicPaddingCollator(pad_token_id=9)
+    batch = collator([torch.tensor([9, 1]), torch.tensor([2])])
+    assert batch["labels"].tolist() == [[9, 1], [2, -100]]
+
+
+def test_sampler_covers_all_examples_with_similar_lengths():
+    lengths = [1, 50, 2, 49, 3, 48, 4, 47]
+    sampler = LengthBucketSampler(lengths, batch_size=2, seed=1)
+    batches = list(sampler)
+    assert len(batches) == len(sampler) == 4
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert max(lengths[i] for i in batch) - min(lengths[i] for i in batch) <= 2
+
+
+def test_corpus_cache_reads_same_samples_and_skips_unchanged_files(tmp_path):
+    tokenizer = ByteTokenizer()
+    cache = TokenizedCorpusCache(str(tmp_path))
+    corpus = TrainingCorpus()
+    corpus.extend_from_source("a.json", "hash-a", ["abc", "de"])
+    corpus.extend_from_source("b.json", "hash-b", ["fghij"])
+
+    dataset = TextDataset(corpus, tokenizer, block_size=4, corpus_cache=cache)
+    assert [sample.tolist() for sample in dataset] == [
+        list(b"abc"),
+        list(b"de"),
+        list(b"fghi"),
+    ]
+    assert dataset.lengths() == [3, 2, 4]
+
+    changed = TrainingCorpus()
+    changed.extend_from_source("a.json", "hash-a", ["abc", "de"])
+    changed.extend_from_source("b.json", "hash-b2", ["xy"])
+    tokenizer.calls = 0
+    dataset = TextDataset(changed, tokenizer, block_size=4, corpus_cache=cache)
+    assert tokenizer.calls == 1
+    assert dataset[2].tolist() == list(b"xy")
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+from ethos_ai.clim.tokenized_corpus_cache import TokenizedCorpusCache
+from ethos_ai.clim.training_corpus import TrainingCorpus
+
+
+class WordTokenizer:
+    special_tokens_map = {}
+    name_or_path = "words"
+
+    def __len__(self):
+        return 100
+
+    def __call__(self, text, truncation=True, max_length=None):
+        return {"input_ids": [len(word) for word in text.split()][:max_length]}
+
+
+def test_tokenized_corpus_caches_of_one_directory_store_complete_entries(
+    tmp_path, monkeypatch
+):
+    corpus = TrainingCorpus()
+    corpus.extend_from_source("a.txt", "hash-a", ["one two", "three"])
+    corpus.extend_from_source("b.txt", "hash-b", ["four five six"])
+    first, second = TokenizedCorpusCache(str(tmp_path)), TokenizedCorpusCache(
+        str(tmp_path)
+    )
+    save = np.save
+    nested = []
+
+    def save_with_nested_store(file, array):
+        # The second cache stores the same entries while the first one writes its ids
+        if not nested:
+            nested.append(None)
+            nested[0] = second.get_token_ids(corpus, WordTokenizer(), 16)
+        save(file, array)
+
+    monkeypatch.setattr(np, "save", save_with_nested_store)
+    result = first.get_token_ids(corpus, WordTokenizer(), 16)
+    monkeypatch.undo()
+
+    for ids, offsets in (
+        result,
+        nested[0],
+        second.get_token_ids(corpus, WordTokenizer(), 16),
+    ):
+        assert ids.tolist() == [3, 3, 5, 4, 4, 3]
+        assert offsets.tolist() == [0, 2, 3, 6]
+    assert not [
+        name
+        for name in os.listdir(tmp_path)
+        if name.startswith(TokenizedCorpusCache.TEMP_PREFIX)
+    ]
@@ -0,0 +1,39 @@
+import threading
+
+from ethos_ai.clim.training_job import TrainingJob
+from ethos_ai.clim.training_scheduler import TrainingScheduler
+from ethos_ai.state.priority import Priority
+
+
+def test_scheduler_runs_jobs_one_at_a_time_by_priority():
+    scheduler = TrainingScheduler(max_concurrent_jobs=1, threads_per_job=1)
+    release = threading.Event()
+    order = []
+
+    def target(name):
+        def run(job):
+            if name == "first":
+                release.wait(5)
+            order.append(name)
+            job.report_progress(0.5)
+
+        return run
+
+    first = scheduler.submit("first", target("first"))
+    while first.state == TrainingJob.QUEUED:
+        threading.Event().wait(0.01)
+    low = scheduler.submit("low", target("low"), Priority.PRIO_LOW)
+    urgent = scheduler.submit("urgent", target("urgent"), Priority.EMERGENCY)
+    cancelled = scheduler.submit("cancelled", target("cancelled"))
+
+    assert scheduler.get_queue_position(urgent) == 1
+    assert scheduler.get_queue_position(low) == 3
+    assert scheduler.cancel(cancelled)
+    release.set()
+    for job in (first, low, urgent):
+        while not job.is_finished():
+            threading.Event().wait(0.01)
+
+    assert order == ["first", "urgent", "low"]
+    assert cancelled.state == TrainingJob.CANCELLED
+    assert low.state == TrainingJob.DONE and low.progress == 1.0